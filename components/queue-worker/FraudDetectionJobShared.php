@@ -211,6 +211,8 @@ class FraudDetectionJob implements ShouldQueue
             $headers = [
                 'Content-Type' => 'application/json',
                 'Accept' => 'application/json',
+                // Let the ML service abandon work once we stop waiting for it
+                'X-Request-Timeout-Ms' => (string) ($timeout * 1000),
             ];
 
             if ($apiKey) {
@@ -0,0 +1,32 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        Schema::table('model_registry', function (Blueprint $table) {
+            $table->string('base_model_id')->nullable()->after('training_job_id'); // model this one was warm-started from
+            $table->string('warm_start_mode')->nullable()->after('base_model_id'); // boost, refit
+
+            $table->index('base_model_id');
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        Schema::table('model_registry', function (Blueprint $table) {
+            $table->dropIndex(['base_model_id']);
+            $table->dropColumn(['base_model_id', 'warm_start_mode']);
+        });
+    }
+};
@@ -3,7 +3,7 @@ FastAPI ML Inference Service for Fraud Detection
 Provides machine learning model inference for the fraud detection pipeline
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
@@ -15,10 +15,16 @@ from contextlib import asynccontextmanager
 
 from .models.requests import FraudPredictionRequest, HealthCheckResponse
 from .models.responses import FraudPredictionResponse, ModelInfoResponse
-from .services.model_service import ModelService
+from .services.model_service import ModelService, ModelLoadRejected
 from .services.feature_service import FeatureService
+from .services.scheduler import RequestScheduler, Overloaded, INTERACTIVE, BULK
+from .services.resource_monitor import ResourceMonitor, PRESSURE_CRITICAL
+from .services.shadow_service import ShadowScorer
+from .services.model_sync import ModelDirectorySync, create_registry
 from .utils.logging_config import setup_logging
 from .utils.config import get_settings
+from .utils.traffic_capture import TrafficRecorder
+from .utils.deadline import Deadline, DeadlineExceeded, run_stage, timeout_stats
 
 # Setup logging
 setup_logging()
@@ -27,24 +33,88 @@ logger = logging.getLogger(__name__)
 # Global model service instance
 model_service: Optional[ModelService] = None
 feature_service: Optional[FeatureService] = None
+traffic_recorder: Optional[TrafficRecorder] = None
+request_scheduler: Optional[RequestScheduler] = None
+resource_monitor: Optional[ResourceMonitor] = None
+shadow_scorer: Optional[ShadowScorer] = None
+model_sync: Optional[ModelDirectorySync] = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager for startup and shutdown events"""
-    global model_service, feature_service
+    global model_service, feature_service, traffic_recorder, request_scheduler, resource_monitor, shadow_scorer
+    global model_sync
     
     logger.info("Starting ML Inference Service...")
     
     try:
         # Initialize services
         settings = get_settings()
-        model_service = ModelService(settings.model_path)
+        pinned_versions = settings.get_pinned_model_versions()
+        if settings.shadow_model_version:
+            # Keep the challenger resident so shadow scoring never reloads it
+            pinned_versions.add(settings.shadow_model_version)
         feature_service = FeatureService()
+        model_service = ModelService(
+            settings.model_path,
+            pinned_versions=pinned_versions,
+            max_loaded_models=settings.model_cache_size,
+            feature_bounds=feature_service.feature_bounds,
+            warmup_iterations=settings.model_warmup_iterations,
+            warmup_batch_size=settings.model_warmup_batch_size,
+            max_prediction_time_ms=settings.max_prediction_time_ms,
+            reject_slow_models=settings.model_warmup_reject_slow
+        )
+        request_scheduler = RequestScheduler.from_settings(settings)
         
         # Load models
         await model_service.load_models()
         logger.info("Models loaded successfully")
         
+        # Start the memory guard
+        resource_monitor = ResourceMonitor(
+            max_memory_mb=settings.max_memory_mb,
+            max_cpu_percent=settings.max_cpu_percent,
+            soft_limit_ratio=settings.memory_soft_limit_ratio,
+            hard_limit_ratio=settings.memory_hard_limit_ratio,
+            interval=settings.resource_check_interval
+        )
+        resource_monitor.register_shrinker("models", model_service.evict_models)
+        model_service.load_guard = resource_monitor.allow_model_load
+        await resource_monitor.start()
+        
+        # Pick up new, changed and removed artifacts and registry promotions incrementally
+        if settings.model_sync_enabled:
+            model_sync = ModelDirectorySync(
+                model_service,
+                registry=create_registry(settings.model_registry_url),
+                interval=settings.model_sync_interval
+            )
+            await model_sync.start()
+        
+        # Start traffic capture if enabled
+        if settings.traffic_capture_enabled:
+            traffic_recorder = TrafficRecorder(
+                path=settings.traffic_capture_path,
+                sample_rate=settings.traffic_capture_sample_rate,
+                salt=settings.traffic_capture_salt,
+                queue_size=settings.traffic_capture_queue_size
+            )
+            traffic_recorder.start()
+        
+        # Start shadow scoring of the challenger model if configured
+        if settings.shadow_model_version:
+            shadow_scorer = ShadowScorer(
+                model_service,
+                challenger_version=settings.shadow_model_version,
+                store_path=settings.shadow_store_path,
+                sample_rate=settings.shadow_sample_rate,
+                max_pending=settings.shadow_max_pending,
+                flush_rows=settings.shadow_flush_rows,
+                should_shed=_shadow_should_shed
+            )
+            logger.info(f"Shadow scoring enabled for challenger {settings.shadow_model_version}")
+        
         yield
         
     except Exception as e:
@@ -52,6 +122,14 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         logger.info("Shutting down ML Inference Service...")
+        if model_sync:
+            await model_sync.stop()
+        if resource_monitor:
+            await resource_monitor.stop()
+        if traffic_recorder:
+            traffic_recorder.stop()
+        if shadow_scorer:
+            shadow_scorer.close()
         if model_service:
             await model_service.cleanup()
 
@@ -84,6 +162,24 @@ def get_feature_service() -> FeatureService:
         raise HTTPException(status_code=503, detail="Feature service not initialized")
     return feature_service
 
+def get_request_scheduler() -> RequestScheduler:
+    """Dependency to get request scheduler instance"""
+    if request_scheduler is None:
+        raise HTTPException(status_code=503, detail="Request scheduler not initialized")
+    return request_scheduler
+
+def get_request_deadline(http_request: Request) -> Deadline:
+    """Dependency to build the request deadline from client headers and settings"""
+    return Deadline.from_headers(http_request.headers, get_settings().prediction_timeout)
+
+def _shadow_should_shed() -> bool:
+    """Shadow work is skipped under resource pressure or while live requests are queued"""
+    if resource_monitor and resource_monitor.under_pressure:
+        return True
+    if request_scheduler and any(lane.queue_depth for lane in request_scheduler.lanes.values()):
+        return True
+    return False
+
 @app.get("/", response_model=Dict[str, str])
 async def root():
     """Root endpoint"""
@@ -101,13 +197,16 @@ async def health_check(
     try:
         # Check model availability
         model_status = await model_svc.health_check()
+        resources = resource_monitor.get_stats() if resource_monitor else None
         
         return HealthCheckResponse(
-            status="healthy",
+            status="degraded" if resources and resources["pressure"] == PRESSURE_CRITICAL else "healthy",
             timestamp=time.time(),
             version="1.0.0",
             models_loaded=model_status["models_loaded"],
-            model_versions=model_status["versions"]
+            model_versions=model_status["versions"],
+            memory_pressure=resources["pressure"] if resources else None,
+            memory_usage_mb=resources["rss_mb"] if resources else None
         )
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -128,8 +227,11 @@ async def get_model_info(
 @app.post("/predict", response_model=FraudPredictionResponse)
 async def predict_fraud(
     request: FraudPredictionRequest,
+    background_tasks: BackgroundTasks,
     model_svc: ModelService = Depends(get_model_service),
-    feature_svc: FeatureService = Depends(get_feature_service)
+    feature_svc: FeatureService = Depends(get_feature_service),
+    scheduler: RequestScheduler = Depends(get_request_scheduler),
+    deadline: Deadline = Depends(get_request_deadline)
 ):
     """
     Predict fraud probability for a given application
@@ -145,20 +247,28 @@ async def predict_fraud(
     try:
         logger.info(f"Processing fraud prediction request: {request.request_id}")
         
-        # Preprocess features if raw data provided
-        if request.raw_features:
-            features = await feature_svc.preprocess_features(request.raw_features)
-        else:
-            features = request.feature_vector
+        if traffic_recorder:
+            traffic_recorder.record("/predict", request.model_dump(exclude_none=True))
+        
+        # Wait for a slot in the interactive lane
+        async with scheduler.slot(INTERACTIVE, deadline):
+            # Preprocess features if raw data provided
+            if request.raw_features:
+                features = await run_stage(
+                    "preprocessing", feature_svc.preprocess_features_sync, request.raw_features,
+                    deadline=deadline, stage_limit=get_settings().feature_preprocessing_timeout
+                )
+            else:
+                features = request.feature_vector
         
-        if not features:
-            raise HTTPException(status_code=400, detail="No features provided")
+            if not features:
+                raise HTTPException(status_code=400, detail="No features provided")
         
-        # Get prediction from model
-        prediction_result = await model_svc.predict(
-            features=features,
-            model_version=request.model_version
-        )
+            # Get prediction from model
+            prediction_result = await run_stage(
+                "model_inference", model_svc.predict_sync, features, request.model_version,
+                deadline=deadline
+            )
         
         processing_time = (time.time() - start_time) * 1000
         
@@ -173,10 +283,16 @@ async def predict_fraud(
             timestamp=time.time()
         )
         
+        if shadow_scorer:
+            # Runs after the response has been sent
+            background_tasks.add_task(shadow_scorer.submit, [
+                (request.request_id, response.model_version, response.fraud_probability, features)
+            ])
+        
         logger.info(f"Prediction completed in {processing_time:.2f}ms: {response.fraud_probability:.3f}")
         return response
         
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded, Overloaded, ModelLoadRejected):
         raise
     except Exception as e:
         logger.error(f"Prediction failed: {e}")
@@ -185,8 +301,11 @@ async def predict_fraud(
 @app.post("/predict/batch", response_model=List[FraudPredictionResponse])
 async def predict_fraud_batch(
     requests: List[FraudPredictionRequest],
+    background_tasks: BackgroundTasks,
     model_svc: ModelService = Depends(get_model_service),
-    feature_svc: FeatureService = Depends(get_feature_service)
+    feature_svc: FeatureService = Depends(get_feature_service),
+    scheduler: RequestScheduler = Depends(get_request_scheduler),
+    deadline: Deadline = Depends(get_request_deadline)
 ):
     """
     Batch prediction endpoint for multiple fraud assessments
@@ -202,26 +321,66 @@ async def predict_fraud_batch(
     try:
         logger.info(f"Processing batch prediction with {len(requests)} requests")
         
+        if traffic_recorder:
+            traffic_recorder.record(
+                "/predict/batch", [r.model_dump(exclude_none=True) for r in requests]
+            )
+        
         if len(requests) > 100:  # Limit batch size
             raise HTTPException(status_code=400, detail="Batch size too large (max 100)")
         
-        responses = []
+        responses: List[Optional[FraudPredictionResponse]] = [None] * len(requests)
+        shadow_items = []
         
-        for request in requests:
-            try:
-                # Process each request
-                if request.raw_features:
-                    features = await feature_svc.preprocess_features(request.raw_features)
-                else:
-                    features = request.feature_vector
-                
-                if features:
-                    prediction_result = await model_svc.predict(
-                        features=features,
-                        model_version=request.model_version
-                    )
+        # Bulk re-screens share CPU through the lower-priority lane
+        async with scheduler.slot(BULK, deadline):
+            # Preprocess each request; rows are grouped by model version for scoring
+            pending: Dict[Optional[str], List[tuple]] = {}
+            for index, request in enumerate(requests):
+                try:
+                    if request.raw_features:
+                        features = await run_stage(
+                            "preprocessing", feature_svc.preprocess_features_sync, request.raw_features,
+                            deadline=deadline, stage_limit=get_settings().feature_preprocessing_timeout
+                        )
+                    else:
+                        features = request.feature_vector
+                    
+                    if features:
+                        if len(features) != len(model_svc.feature_names):
+                            raise ValueError(
+                                f"Expected {len(model_svc.feature_names)} features, got {len(features)}"
+                            )
+                        pending.setdefault(request.model_version, []).append((index, features))
+                    else:
+                        # Invalid request: no features provided
+                        responses[index] = _batch_error_response(request, "unknown")
                     
-                    response = FraudPredictionResponse(
+                except DeadlineExceeded:
+                    raise
+                except Exception as e:
+                    logger.error(f"Failed to process request {request.request_id}: {e}")
+                    responses[index] = _batch_error_response(request, "error")
+            
+            # Score each model version's rows with a single vectorized call
+            for model_version, rows in pending.items():
+                try:
+                    results = await run_stage(
+                        "model_inference", model_svc.predict_batch_sync,
+                        [features for _, features in rows], model_version,
+                        deadline=deadline
+                    )
+                except (DeadlineExceeded, ModelLoadRejected):
+                    raise
+                except Exception as e:
+                    logger.error(f"Batch scoring with model {model_version or 'latest'} failed: {e}")
+                    for index, _ in rows:
+                        responses[index] = _batch_error_response(requests[index], "error")
+                    continue
+                
+                for (index, features), prediction_result in zip(rows, results):
+                    request = requests[index]
+                    responses[index] = FraudPredictionResponse(
                         request_id=request.request_id,
                         fraud_probability=prediction_result["fraud_probability"],
                         confidence_score=prediction_result["confidence_score"],
@@ -231,35 +390,10 @@ async def predict_fraud_batch(
                         processing_time_ms=0,  # Will be set after batch processing
                         timestamp=time.time()
                     )
-                    responses.append(response)
-                else:
-                    # Add error response for invalid request
-                    error_response = FraudPredictionResponse(
-                        request_id=request.request_id,
-                        fraud_probability=0.5,  # Default neutral score
-                        confidence_score=0.0,
-                        risk_tier="unknown",
-                        feature_importance=[],
-                        model_version="error",
-                        processing_time_ms=0,
-                        timestamp=time.time()
+                    shadow_items.append(
+                        (request.request_id, prediction_result["model_version"],
+                         prediction_result["fraud_probability"], features)
                     )
-                    responses.append(error_response)
-                    
-            except Exception as e:
-                logger.error(f"Failed to process request {request.request_id}: {e}")
-                # Add error response
-                error_response = FraudPredictionResponse(
-                    request_id=request.request_id,
-                    fraud_probability=0.5,
-                    confidence_score=0.0,
-                    risk_tier="error",
-                    feature_importance=[],
-                    model_version="error",
-                    processing_time_ms=0,
-                    timestamp=time.time()
-                )
-                responses.append(error_response)
         
         total_time = (time.time() - start_time) * 1000
         avg_time = total_time / len(responses) if responses else 0
@@ -268,15 +402,86 @@ async def predict_fraud_batch(
         for response in responses:
             response.processing_time_ms = avg_time
         
+        if shadow_scorer and shadow_items:
+            background_tasks.add_task(shadow_scorer.submit, shadow_items)
+        
         logger.info(f"Batch prediction completed in {total_time:.2f}ms ({avg_time:.2f}ms avg)")
         return responses
         
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded, Overloaded, ModelLoadRejected):
         raise
     except Exception as e:
         logger.error(f"Batch prediction failed: {e}")
         raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
 
+def _batch_error_response(request: FraudPredictionRequest, risk_tier: str) -> FraudPredictionResponse:
+    """Neutral placeholder response for a batch item that could not be scored"""
+    return FraudPredictionResponse(
+        request_id=request.request_id,
+        fraud_probability=0.5,  # Default neutral score
+        confidence_score=0.0,
+        risk_tier=risk_tier,
+        feature_importance=[],
+        model_version="error",
+        processing_time_ms=0,
+        timestamp=time.time()
+    )
+
+@app.get("/metrics")
+async def get_metrics(
+    model_svc: ModelService = Depends(get_model_service)
+):
+    """Service metrics: prediction counters and per-stage timeouts"""
+    model_status = await model_svc.health_check()
+    return {
+        "timestamp": time.time(),
+        "predictions": {
+            "count": model_status["prediction_count"],
+            "average_prediction_time_ms": model_status["average_prediction_time_ms"]
+        },
+        "models": {
+            "loaded": model_status["models_loaded"],
+            "available": model_status["models_available"],
+            "evicted": model_status["models_evicted"]
+        },
+        "resources": resource_monitor.get_stats() if resource_monitor else None,
+        "timeouts": timeout_stats.snapshot(),
+        "scheduler": request_scheduler.get_stats() if request_scheduler else None,
+        "traffic_capture": traffic_recorder.get_stats() if traffic_recorder else {"enabled": False},
+        "shadow": shadow_scorer.get_stats() if shadow_scorer else {"enabled": False},
+        "model_sync": model_sync.get_stats() if model_sync else {"enabled": False}
+    }
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request, exc):
+    """Answer abandoned requests promptly with a distinct timeout error"""
+    logger.warning(f"Request abandoned: {exc}")
+    return JSONResponse(
+        status_code=504,
+        content={"detail": str(exc), "error": "deadline_exceeded", "stage": exc.stage}
+    )
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request, exc):
+    """Shed load quickly with a retry hint"""
+    logger.warning(f"Request shed: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "error": "overloaded", "lane": exc.lane},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.exception_handler(ModelLoadRejected)
+async def model_load_rejected_handler(request, exc):
+    """Refuse requests that would load a model while memory is critical"""
+    logger.warning(f"Request rejected: {exc}")
+    retry_after = max(1, int(get_settings().resource_check_interval))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "error": "memory_pressure", "model_version": exc.version},
+        headers={"Retry-After": str(retry_after)}
+    )
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
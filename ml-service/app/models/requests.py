@@ -90,6 +90,8 @@ class HealthCheckResponse(BaseModel):
     version: str = Field(description="Service version")
     models_loaded: int = Field(description="Number of models loaded")
     model_versions: List[str] = Field(description="Available model versions")
+    memory_pressure: Optional[str] = Field(None, description="Memory pressure level: normal, elevated or critical")
+    memory_usage_mb: Optional[float] = Field(None, description="Current resident memory in MB")
     
     model_config = {
         "json_schema_extra": {
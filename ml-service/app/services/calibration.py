@@ -0,0 +1,89 @@
+"""
+Probability calibration served as a precomputed lookup table
+
+The training service fits an isotonic calibrator per model and stores its
+knots (``{'x': [...], 'y': [...]}``) in the model artifact. At serving time
+the knots become a monotone piecewise-linear table that is applied to a
+whole batch of raw scores with one ``np.searchsorted`` call, so calibration
+costs microseconds per batch instead of one sklearn call per row.
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CalibrationTable:
+    """Monotone piecewise-linear mapping from raw scores to calibrated probabilities"""
+
+    def __init__(self, x: Any, y: Any, method: str = "isotonic"):
+        x = np.asarray(x, dtype=np.float64).reshape(-1)
+        y = np.asarray(y, dtype=np.float64).reshape(-1)
+
+        if len(x) != len(y) or len(x) < 2:
+            raise ValueError(f"Calibration table needs at least 2 matching knots, got {len(x)} and {len(y)}")
+        if np.any(np.diff(x) < 0):
+            raise ValueError("Calibration knots must be sorted by raw score")
+
+        self.method = method
+        self.x = x
+        self.y = np.clip(y, 0.0, 1.0)
+
+        # Per-segment slope, precomputed so apply() is a lookup plus one multiply-add
+        dx = np.diff(self.x)
+        dy = np.diff(self.y)
+        self._slope = np.divide(dy, dx, out=np.zeros_like(dy), where=dx > 0)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CalibrationTable":
+        """Create a table from the dict stored in a model artifact"""
+        return cls(data['x'], data['y'], method=data.get('method', 'isotonic'))
+
+    @classmethod
+    def from_isotonic(cls, calibrator: Any) -> "CalibrationTable":
+        """Create a table from a fitted sklearn IsotonicRegression"""
+        return cls(calibrator.X_thresholds_, calibrator.y_thresholds_, method="isotonic")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable form, as stored in a model artifact"""
+        return {'method': self.method, 'x': self.x.tolist(), 'y': self.y.tolist()}
+
+    @property
+    def knots(self) -> int:
+        """Number of knots in the table"""
+        return len(self.x)
+
+    def apply(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Calibrate a batch of raw scores
+
+        Scores outside the fitted range are clipped to the end knots, matching
+        ``IsotonicRegression(out_of_bounds='clip')``.
+        """
+        scores = np.clip(np.asarray(scores, dtype=np.float64), self.x[0], self.x[-1])
+        segment = np.searchsorted(self.x, scores, side='right') - 1
+        np.clip(segment, 0, len(self.x) - 2, out=segment)
+        return self.y[segment] + (scores - self.x[segment]) * self._slope[segment]
+
+
+def load_calibration(model_data: Dict[str, Any]) -> Optional[CalibrationTable]:
+    """
+    Get the calibration table of a loaded model artifact, if it has one
+
+    Accepts the serialized knots under ``calibration`` or, for older
+    artifacts, a fitted sklearn calibrator under ``calibrator``.
+    """
+    calibration = model_data.get('calibration')
+    if isinstance(calibration, dict):
+        return CalibrationTable.from_dict(calibration)
+
+    calibrator = model_data.get('calibrator')
+    if calibrator is not None and hasattr(calibrator, 'X_thresholds_'):
+        return CalibrationTable.from_isotonic(calibrator)
+
+    if calibration is not None or calibrator is not None:
+        logger.warning("Ignoring unsupported calibration object in model artifact")
+    return None
@@ -53,9 +53,15 @@ class FeatureService:
         }
     
     async def preprocess_features(self, raw_features: Dict[str, Any]) -> List[float]:
+        """Convert raw feature data to model-ready feature vector"""
+        return self.preprocess_features_sync(raw_features)
+
+    def preprocess_features_sync(self, raw_features: Dict[str, Any]) -> List[float]:
         """
         Convert raw feature data to model-ready feature vector
-        
+
+        Synchronous variant, for running preprocessing in an executor thread
+
         Args:
             raw_features: Dictionary of raw feature data
             
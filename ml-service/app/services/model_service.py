@@ -5,9 +5,10 @@ Model service for loading and managing LightGBM models
 import asyncio
 import logging
 import pickle
+import threading
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterable, List, Optional, Any, Set
 import numpy as np
 import joblib
 from sklearn.calibration import CalibratedClassifierCV
@@ -20,17 +21,63 @@ except ImportError:
     lgb = None
 
 from ..models.responses import RiskTier, FeatureImportance
+from .calibration import CalibrationTable, load_calibration
+from .native_model import NATIVE_SUFFIX, load_native_model
 
 logger = logging.getLogger(__name__)
 
 
+class ModelLoadRejected(Exception):
+    """Raised when loading a model is refused because the service is under memory pressure"""
+
+    def __init__(self, version: str):
+        self.version = version
+        super().__init__(f"Loading model {version} rejected: service is near its memory limit")
+
+
+class ModelWarmupFailed(Exception):
+    """Raised when a newly loaded model is slower than the prediction time limit"""
+
+    def __init__(self, version: str, warmup: Dict[str, Any]):
+        self.version = version
+        self.warmup = warmup
+        super().__init__(
+            f"Model {version} failed warm-up: p99 {warmup['single_p99_ms']:.2f}ms single-row, "
+            f"{warmup['batch_per_row_ms']:.3f}ms per batch row (limit {warmup['limit_ms']}ms)"
+        )
+
+
 class ModelService:
     """Service for managing ML models and predictions"""
     
-    def __init__(self, model_path: str = "models/"):
+    def __init__(
+        self,
+        model_path: str = "models/",
+        pinned_versions: Optional[Iterable[str]] = None,
+        max_loaded_models: Optional[int] = None,
+        feature_bounds: Optional[Dict[str, tuple]] = None,
+        warmup_iterations: int = 0,
+        warmup_batch_size: int = 100,
+        max_prediction_time_ms: Optional[float] = None,
+        reject_slow_models: bool = False
+    ):
         self.model_path = Path(model_path)
         self.models: Dict[str, Any] = {}
         self.model_metadata: Dict[str, Dict[str, Any]] = {}
+        self.calibrations: Dict[str, CalibrationTable] = {}
+        self.model_files: Dict[str, Path] = {}  # every known artifact, loaded or not
+        self.failed_versions: Dict[str, str] = {}  # versions whose artifact failed to load, with the error
+        self.pinned_versions: Set[str] = set(pinned_versions or [])
+        self.max_loaded_models = max_loaded_models
+        self.load_guard: Optional[Callable[[], bool]] = None  # returns False to refuse new loads
+        self.last_used: Dict[str, float] = {}
+        self.evicted_count = 0
+        self._load_lock = threading.RLock()  # re-entered when a load evicts to stay within the cache size
+        self.feature_bounds = feature_bounds
+        self.warmup_iterations = warmup_iterations
+        self.warmup_batch_size = warmup_batch_size
+        self.max_prediction_time_ms = max_prediction_time_ms
+        self.reject_slow_models = reject_slow_models
         self.feature_names = [
             "credit_score",
             "debt_to_income_ratio", 
@@ -49,6 +96,7 @@ class ModelService:
             "applicant_age"
         ]
         self.default_model_version = "v1.0.0"
+        self.production_version: Optional[str] = None  # set from the model registry, overrides "latest"
         self.prediction_count = 0
         self.total_prediction_time = 0.0
         
@@ -60,26 +108,73 @@ class ModelService:
         self.model_path.mkdir(parents=True, exist_ok=True)
         
         # Try to load existing models
-        model_files = list(self.model_path.glob("*.pkl")) + list(self.model_path.glob("*.joblib"))
+        found = self.discover_model_files()
+        self.model_files.update(found)
         
-        if not model_files:
+        if not found:
             logger.warning("No model files found, creating mock model")
             await self._create_mock_model()
         else:
-            for model_file in model_files:
+            for model_file in found.values():
                 try:
                     await self._load_model_file(model_file)
                 except Exception as e:
                     logger.error(f"Failed to load model {model_file}: {e}")
+                    self._mark_failed(model_file.stem, e)
         
         if not self.models:
             logger.warning("No models loaded successfully, creating fallback mock model")
             await self._create_mock_model()
+        
+        self._enforce_cache_size()
             
         logger.info(f"Loaded {len(self.models)} models: {list(self.models.keys())}")
     
+    def discover_model_files(self) -> Dict[str, Path]:
+        """Model artifacts in the model directory by version; a native artifact wins over a pickle"""
+        model_files = (
+            list(self.model_path.glob("*.pkl"))
+            + list(self.model_path.glob("*.joblib"))
+            + list(self.model_path.glob(f"*{NATIVE_SUFFIX}"))
+        )
+        found: Dict[str, Path] = {}
+        for model_file in model_files:
+            found[model_file.stem] = model_file
+        return found
+    
+    def load_version_sync(self, model_file: Path) -> None:
+        """
+        Load or replace the version stored in an artifact
+        
+        The previous model, if any, keeps serving until the new one has
+        loaded and warmed up.
+        """
+        with self._load_lock:
+            self._load_model_file_sync(model_file)
+            self._enforce_cache_size()
+    
+    def unload_version(self, version: str) -> bool:
+        """Forget a version whose artifact was removed"""
+        with self._load_lock:
+            known = version in self.models or version in self.model_files
+            self.models.pop(version, None)
+            self.model_files.pop(version, None)
+            self.model_metadata.pop(version, None)
+            self.failed_versions.pop(version, None)
+            self.calibrations.pop(version, None)
+            self.last_used.pop(version, None)
+            if self.production_version == version:
+                self.production_version = None
+        if known:
+            logger.info(f"Unloaded model {version}")
+        return known
+    
     async def _load_model_file(self, model_file: Path) -> None:
         """Load a specific model file"""
+        self._load_model_file_sync(model_file)
+    
+    def _load_model_file_sync(self, model_file: Path) -> None:
+        """Load a specific model file (synchronous, also used for on-demand loads)"""
         try:
             # Determine model version from filename
             version = model_file.stem
@@ -92,13 +187,17 @@ class ModelService:
                     model_data = pickle.load(f)
             elif model_file.suffix == '.joblib':
                 model_data = joblib.load(model_file)
+            elif model_file.suffix == NATIVE_SUFFIX:
+                model_data = load_native_model(model_file)
             else:
                 raise ValueError(f"Unsupported model file format: {model_file.suffix}")
             
-            # Extract model and metadata
+            # Extract model, calibration and metadata
+            calibration = None
             if isinstance(model_data, dict):
                 model = model_data.get('model')
                 metadata = model_data.get('metadata', {})
+                calibration = load_calibration(model_data)
             else:
                 model = model_data
                 metadata = {}
@@ -106,14 +205,31 @@ class ModelService:
             if model is None:
                 raise ValueError("No model found in file")
             
+            # Warm up before the version becomes routable
+            warmup = None
+            if self.warmup_iterations > 0:
+                warmup = self._warm_up(version, model, calibration)
+            
             self.models[version] = model
+            if calibration is not None:
+                self.calibrations[version] = calibration
+            else:
+                self.calibrations.pop(version, None)
+            self.model_files[version] = model_file
+            self.failed_versions.pop(version, None)
+            self.last_used[version] = time.monotonic()
             self.model_metadata[version] = {
                 'version': version,
                 'file_path': str(model_file),
                 'loaded_at': time.time(),
+                'loaded': True,
                 'model_type': type(model).__name__,
+                'calibrated': calibration is not None,
+                'calibration_knots': calibration.knots if calibration is not None else 0,
                 **metadata
             }
+            if warmup is not None:
+                self.model_metadata[version]['warmup'] = warmup
             
             logger.info(f"Successfully loaded model {version}")
             
@@ -121,6 +237,88 @@ class ModelService:
             logger.error(f"Failed to load model from {model_file}: {e}")
             raise
     
+    def _warm_up(self, version: str, model: Any, calibration: Optional[CalibrationTable]) -> Dict[str, Any]:
+        """
+        Exercise a newly loaded model on representative vectors and measure its latency
+        
+        Runs the single-row prediction path ``warmup_iterations`` times and a
+        few batches of ``warmup_batch_size`` rows, then compares the latency
+        with ``max_prediction_time_ms``.
+        
+        Raises:
+            ModelWarmupFailed: if the model is too slow and slow models are rejected
+        """
+        start = time.perf_counter()
+        X = self._warmup_vectors(max(self.warmup_iterations, self.warmup_batch_size))
+        
+        def score(rows: np.ndarray) -> np.ndarray:
+            scores = self._score_matrix(model, rows)
+            return calibration.apply(scores) if calibration is not None else scores
+        
+        single_ms = []
+        for i in range(self.warmup_iterations):
+            row = X[i:i + 1]
+            call_start = time.perf_counter()
+            probability = float(score(row)[0])
+            self._calculate_confidence(probability, row[0].tolist())
+            self._get_feature_importance(model, row[0].tolist())
+            single_ms.append((time.perf_counter() - call_start) * 1000)
+        
+        batch = X[:self.warmup_batch_size]
+        batch_ms = []
+        for _ in range(max(3, self.warmup_iterations // 10)):
+            call_start = time.perf_counter()
+            score(batch)
+            batch_ms.append((time.perf_counter() - call_start) * 1000)
+        
+        # The first calls pay the one-off costs warm-up exists to absorb
+        measured = single_ms[len(single_ms) // 5:] or single_ms
+        warmup = {
+            'iterations': self.warmup_iterations,
+            'first_call_ms': round(single_ms[0], 3),
+            'single_p50_ms': round(float(np.percentile(measured, 50)), 3),
+            'single_p99_ms': round(float(np.percentile(measured, 99)), 3),
+            'batch_size': len(batch),
+            'batch_p50_ms': round(float(np.percentile(batch_ms, 50)), 3),
+            'batch_per_row_ms': round(float(np.percentile(batch_ms, 50)) / len(batch), 4),
+            'limit_ms': self.max_prediction_time_ms,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 1)
+        }
+        warmup['within_limit'] = self.max_prediction_time_ms is None or (
+            warmup['single_p99_ms'] <= self.max_prediction_time_ms
+            and warmup['batch_per_row_ms'] <= self.max_prediction_time_ms
+        )
+        
+        if not warmup['within_limit']:
+            if self.reject_slow_models:
+                raise ModelWarmupFailed(version, warmup)
+            logger.warning(
+                f"Model {version} is slower than {self.max_prediction_time_ms}ms after warm-up: "
+                f"p99 {warmup['single_p99_ms']}ms single-row"
+            )
+        
+        logger.info(
+            f"Warmed up model {version} in {warmup['duration_ms']}ms: first call {warmup['first_call_ms']}ms, "
+            f"p50 {warmup['single_p50_ms']}ms, p99 {warmup['single_p99_ms']}ms, "
+            f"batch of {warmup['batch_size']} {warmup['batch_p50_ms']}ms"
+        )
+        return warmup
+    
+    def _warmup_vectors(self, n: int) -> np.ndarray:
+        """Deterministic feature vectors spread across the feature bounds"""
+        rng = np.random.default_rng(0)
+        if self.feature_bounds:
+            low = np.array([self.feature_bounds[name][0] for name in self.feature_names], dtype=np.float64)
+            high = np.array([self.feature_bounds[name][1] for name in self.feature_names], dtype=np.float64)
+        else:
+            low = np.zeros(len(self.feature_names))
+            high = np.ones(len(self.feature_names))
+        
+        X = rng.uniform(low, high, size=(n, len(self.feature_names)))
+        # Include the bound midpoints so every model sees a typical application first
+        X[0] = (low + high) / 2
+        return X
+    
     async def _create_mock_model(self) -> None:
         """Create a mock model for testing purposes"""
         logger.info("Creating mock model for testing")
@@ -192,11 +390,19 @@ class ModelService:
         logger.info(f"Created mock model {version}")
     
     async def predict(
-        self, 
-        features: List[float], 
+        self,
+        features: List[float],
         model_version: Optional[str] = None
     ) -> Dict[str, Any]:
         """Make a fraud prediction"""
+        return self.predict_sync(features, model_version)
+
+    def predict_sync(
+        self,
+        features: List[float],
+        model_version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Make a fraud prediction (synchronous, for use from executor threads)"""
         start_time = time.time()
         
         try:
@@ -204,10 +410,7 @@ class ModelService:
             if model_version is None or model_version == "latest":
                 model_version = self._get_latest_model_version()
             
-            if model_version not in self.models:
-                raise ValueError(f"Model version {model_version} not found")
-            
-            model = self.models[model_version]
+            model = self._get_model(model_version)
             
             # Validate features
             if len(features) != 15:
@@ -217,13 +420,7 @@ class ModelService:
             X = np.array(features).reshape(1, -1)
             
             # Make prediction
-            if hasattr(model, 'predict_proba'):
-                probabilities = model.predict_proba(X)[0]
-                fraud_probability = float(probabilities[1])  # Probability of fraud (class 1)
-            else:
-                # Fallback for models without predict_proba
-                prediction = model.predict(X)[0]
-                fraud_probability = float(prediction)
+            fraud_probability = float(self._score_matrix(model, X, model_version)[0])
             
             # Calculate confidence score
             confidence_score = self._calculate_confidence(fraud_probability, features)
@@ -255,15 +452,197 @@ class ModelService:
             logger.error(f"Prediction failed: {e}")
             raise
     
+    def predict_probabilities(self, X: np.ndarray, model_version: Optional[str] = None) -> np.ndarray:
+        """
+        Score a matrix of feature vectors without explanations or service metrics
+        
+        Args:
+            X: Array of shape (n_rows, 15)
+            model_version: Model version to use (latest if None)
+            
+        Returns:
+            Fraud probabilities, one per row
+        """
+        if model_version is None or model_version == "latest":
+            model_version = self._get_latest_model_version()
+        
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected {len(self.feature_names)} features, got {X.shape[1]}")
+        
+        return self._score_matrix(self._get_model(model_version), X, model_version)
+    
+    def predict_batch_sync(
+        self,
+        features_batch: List[List[float]],
+        model_version: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Make fraud predictions for many feature vectors with one model call
+        
+        Args:
+            features_batch: Feature vectors, 15 values each
+            model_version: Model version to use (latest if None)
+            
+        Returns:
+            One prediction result per feature vector, as returned by predict_sync
+        """
+        start_time = time.time()
+        
+        if not features_batch:
+            return []
+        
+        if model_version is None or model_version == "latest":
+            model_version = self._get_latest_model_version()
+        
+        model = self._get_model(model_version)
+        
+        X = np.asarray(features_batch, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected rows of {len(self.feature_names)} features, got shape {X.shape}")
+        
+        probabilities = self._score_matrix(model, X, model_version)
+        
+        results = []
+        for features, probability in zip(features_batch, probabilities):
+            fraud_probability = float(probability)
+            results.append({
+                'fraud_probability': fraud_probability,
+                'confidence_score': self._calculate_confidence(fraud_probability, features),
+                'risk_tier': self._get_risk_tier(fraud_probability),
+                'feature_importance': self._get_feature_importance(model, features),
+                'model_version': model_version
+            })
+        
+        # Update metrics
+        processing_time = (time.time() - start_time) * 1000
+        self.prediction_count += len(results)
+        self.total_prediction_time += processing_time
+        for result in results:
+            result['processing_time_ms'] = processing_time / len(results)
+        
+        logger.debug(f"Batch prediction of {len(results)} rows completed in {processing_time:.2f}ms")
+        return results
+    
+    def _score_matrix(self, model: Any, X: np.ndarray, version: Optional[str] = None) -> np.ndarray:
+        """Fraud probability (class 1) for each row of X, calibrated if the model has a table"""
+        if hasattr(model, 'predict_proba'):
+            scores = np.asarray(model.predict_proba(X))[:, 1]
+        else:
+            # Fallback for models without predict_proba (e.g. a raw LightGBM Booster)
+            scores = np.asarray(model.predict(X), dtype=np.float64).reshape(-1)
+        
+        calibration = self.calibrations.get(version)
+        if calibration is not None:
+            scores = calibration.apply(scores)
+        return scores
+    
     def _get_latest_model_version(self) -> str:
         """Get the latest model version"""
-        if not self.models:
-            raise ValueError("No models loaded")
+        # The registry's production model takes precedence once it is available
+        if self.production_version and (
+            self.production_version in self.models or self.production_version in self.model_files
+        ):
+            return self.production_version
         
-        # Sort versions and return the latest
-        versions = sorted(self.models.keys(), reverse=True)
+        # Sort versions that have loaded (resident or evicted) and return the latest
+        versions = sorted(self._servable_versions(), reverse=True)
+        if not versions:
+            raise ValueError("No models loaded")
         return versions[0]
     
+    def _servable_versions(self) -> Set[str]:
+        """Loaded versions plus evicted ones that loaded before and can be reloaded"""
+        return set(self.models) | {v for v in self.model_files if v in self.model_metadata}
+    
+    def _mark_failed(self, version: str, error: Exception) -> None:
+        """Stop routing to a version whose artifact cannot be loaded (a resident model keeps serving)"""
+        self.failed_versions[version] = str(error)
+        if version not in self.models:
+            self.model_files.pop(version, None)
+            self.model_metadata.pop(version, None)
+    
+    def _get_model(self, version: str) -> Any:
+        """Get a loaded model, loading it from disk if it was evicted"""
+        model = self.models.get(version)
+        if model is None:
+            if version not in self.model_files:
+                raise ValueError(f"Model version {version} not found")
+            model = self._load_on_demand(version)
+        
+        self.last_used[version] = time.monotonic()
+        return model
+    
+    def _load_on_demand(self, version: str) -> Any:
+        """Load a known but unloaded model, unless the load guard refuses"""
+        if self.load_guard is not None and not self.load_guard():
+            raise ModelLoadRejected(version)
+        
+        with self._load_lock:
+            if version not in self.models:
+                if version not in self.model_files:
+                    raise ValueError(f"Model version {version} not found")
+                logger.info(f"Loading model {version} on demand")
+                try:
+                    self._load_model_file_sync(self.model_files[version])
+                except Exception as e:
+                    self._mark_failed(version, e)
+                    raise
+                self._enforce_cache_size()
+            
+            return self.models[version]
+    
+    def _protected_versions(self) -> Set[str]:
+        """Versions that must stay loaded"""
+        protected = set(self.pinned_versions)
+        protected.add(self.default_model_version)
+        if self.production_version:
+            protected.add(self.production_version)
+        if self._servable_versions():
+            protected.add(self._get_latest_model_version())
+        return protected
+    
+    def _enforce_cache_size(self) -> None:
+        """Evict least recently used models beyond max_loaded_models"""
+        if self.max_loaded_models and len(self.models) > self.max_loaded_models:
+            self.evict_models(len(self.models) - self.max_loaded_models)
+    
+    def evict_models(self, count: Optional[int] = None) -> List[str]:
+        """
+        Unload least recently used models that are not pinned
+        
+        Only models backed by a file are evicted, so they can be reloaded on
+        demand later.
+        
+        Args:
+            count: Maximum number of models to evict (all eligible if None)
+            
+        Returns:
+            Evicted model versions
+        """
+        # Serialized with on-demand loads, which return the model they just loaded
+        with self._load_lock:
+            protected = self._protected_versions()
+            candidates = sorted(
+                (v for v in self.models if v not in protected and v in self.model_files),
+                key=lambda v: self.last_used.get(v, 0.0)
+            )
+            if count is not None:
+                candidates = candidates[:count]
+            
+            for version in candidates:
+                self.models.pop(version, None)
+                self.calibrations.pop(version, None)
+                if version in self.model_metadata:
+                    self.model_metadata[version]['loaded'] = False
+                    self.model_metadata[version]['evicted_at'] = time.time()
+                self.evicted_count += 1
+                logger.info(f"Evicted model {version}")
+        
+        return candidates
+    
     def _calculate_confidence(self, fraud_probability: float, features: List[float]) -> float:
         """Calculate confidence score for the prediction"""
         # Simple confidence calculation based on probability distance from 0.5
@@ -339,6 +718,9 @@ class ModelService:
         """Check service health"""
         return {
             'models_loaded': len(self.models),
+            'models_available': len(set(self.models) | set(self.model_files)),
+            'models_evicted': self.evicted_count,
+            'models_failed': len(self.failed_versions),
             'versions': list(self.models.keys()),
             'prediction_count': self.prediction_count,
             'average_prediction_time_ms': (
@@ -350,9 +732,10 @@ class ModelService:
     async def get_model_info(self) -> Dict[str, Any]:
         """Get detailed model information"""
         return {
-            'available_models': list(self.models.keys()),
-            'active_model': self._get_latest_model_version() if self.models else None,
+            'available_models': sorted(set(self.models) | set(self.model_files)),
+            'active_model': self._get_latest_model_version() if self._servable_versions() else None,
             'model_details': self.model_metadata,
+            'failed_versions': self.failed_versions,
             'feature_names': self.feature_names,
             'last_updated': max(
                 (meta.get('loaded_at', 0) for meta in self.model_metadata.values()),
@@ -369,7 +752,10 @@ class ModelService:
         try:
             if model_version:
                 # Reload specific model
-                model_files = list(self.model_path.glob(f"{model_version}.*"))
+                model_files = sorted(
+                    self.model_path.glob(f"{model_version}.*"),
+                    key=lambda path: path.suffix != NATIVE_SUFFIX
+                )
                 if model_files:
                     await self._load_model_file(model_files[0])
                     reloaded.append(model_version)
@@ -379,6 +765,9 @@ class ModelService:
                 # Reload all models
                 self.models.clear()
                 self.model_metadata.clear()
+                self.model_files.clear()
+                self.failed_versions.clear()
+                self.calibrations.clear()
                 await self.load_models()
                 reloaded = list(self.models.keys())
             
@@ -407,3 +796,4 @@ class ModelService:
         logger.info("Cleaning up model service")
         self.models.clear()
         self.model_metadata.clear()
+        self.model_files.clear()
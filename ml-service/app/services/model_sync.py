@@ -0,0 +1,357 @@
+"""
+Incremental sync of the model directory and the model registry
+
+Keeps an index of the artifacts in the model directory (stat plus content
+hash) and, on an interval, loads, reloads or unloads only the versions that
+were added, changed or removed, instead of reloading everything. It also
+polls the model registry for the production model, so promoting a registry
+entry (``TrainingService.deploy_model``) reaches every serving worker within
+one sync interval. A SQLite registry stands in for the Laravel database in
+development and tests.
+"""
+
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import logging
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+    asyncpg = None
+
+from .model_service import ModelLoadRejected
+
+logger = logging.getLogger(__name__)
+
+PRODUCTION_MODEL_QUERY = """
+    SELECT model_id, version, model_path, deployed_at
+    FROM model_registry
+    WHERE is_production
+    ORDER BY deployed_at DESC
+    LIMIT 1
+"""
+
+
+class ModelRegistry(ABC):
+    """Source of the production model entry"""
+
+    @abstractmethod
+    async def get_production_model(self) -> Optional[Dict[str, Any]]:
+        """Get the registry entry currently marked as production, if any"""
+
+    async def close(self) -> None:
+        """Release registry connections"""
+
+
+class SQLiteModelRegistry(ModelRegistry):
+    """Local stand-in for the model_registry table"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS model_registry (
+                model_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                version TEXT NOT NULL,
+                model_path TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'ready',
+                is_production INTEGER NOT NULL DEFAULT 0,
+                deployed_at REAL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    async def get_production_model(self) -> Optional[Dict[str, Any]]:
+        """Get the registry entry currently marked as production, if any"""
+        row = self._conn.execute(PRODUCTION_MODEL_QUERY).fetchone()
+        return dict(row) if row else None
+
+    def register(self, model_id: str, model_path: str, name: Optional[str] = None, version: str = "1.0.0") -> None:
+        """Add a registry entry"""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO model_registry (model_id, name, version, model_path, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (model_id, name or f"Model_{model_id}", version, model_path, time.time())
+            )
+
+    def promote(self, model_id: str) -> bool:
+        """Mark an entry as the production model, as TrainingService.deploy_model does"""
+        with self._conn:
+            self._conn.execute("UPDATE model_registry SET is_production = 0")
+            cursor = self._conn.execute(
+                "UPDATE model_registry SET is_production = 1, deployed_at = ?, status = 'deployed' "
+                "WHERE model_id = ?",
+                (time.time(), model_id)
+            )
+        return cursor.rowcount > 0
+
+    async def close(self) -> None:
+        """Close the database"""
+        self._conn.close()
+
+
+class PostgresModelRegistry(ModelRegistry):
+    """The model_registry table in the application database"""
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self._pool = None
+
+    async def get_production_model(self) -> Optional[Dict[str, Any]]:
+        """Get the registry entry currently marked as production, if any"""
+        if self._pool is None:
+            self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=1)
+        row = await self._pool.fetchrow(PRODUCTION_MODEL_QUERY)
+        return dict(row) if row else None
+
+    async def close(self) -> None:
+        """Close the connection pool"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+def create_registry(url: str) -> Optional[ModelRegistry]:
+    """Create a registry client from a URL (sqlite:///path or postgresql://...); None if empty"""
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteModelRegistry(url[len("sqlite:///"):])
+    if url.startswith(("postgres://", "postgresql://")):
+        if not ASYNCPG_AVAILABLE:
+            raise RuntimeError("asyncpg is required for a PostgreSQL model registry")
+        return PostgresModelRegistry(url)
+    raise ValueError(f"Unsupported model registry URL: {url}")
+
+
+class ModelDirectorySync:
+    """Applies model directory and registry changes to a ModelService in the background"""
+
+    def __init__(self, model_service, registry: Optional[ModelRegistry] = None, interval: float = 5.0):
+        self.model_service = model_service
+        self.registry = registry
+        self.interval = interval
+
+        # version -> (path, mtime_ns, size, sha256)
+        self.index: Dict[str, Tuple[str, int, int, str]] = {}
+        # Artifacts that failed to load, by the fingerprint they failed with; retried once it changes
+        self.failed_artifacts: Dict[str, Tuple[str, int, int, str]] = {}
+
+        self.syncs = 0
+        self.loaded = 0
+        self.unloaded = 0
+        self.failed = 0
+        self.promotions = 0
+        self.registry_errors = 0
+        self.last_sync_at = 0.0
+        self.last_sync_ms = 0.0
+        self._waiting_for: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Index the artifacts already loaded at startup and start the sync loop"""
+        await asyncio.to_thread(self._prime)
+        await self._sync_registry()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Model directory sync started: {len(self.index)} artifacts indexed, every {self.interval}s")
+
+    async def stop(self) -> None:
+        """Stop the sync loop and close the registry"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.registry:
+            await self.registry.close()
+
+    async def sync_once(self) -> Dict[str, List[str]]:
+        """Apply directory changes since the last sync, then registry changes"""
+        start = time.perf_counter()
+        added, changed, removed, entries = await asyncio.to_thread(self._scan)
+
+        for version in removed:
+            self.index.pop(version, None)
+            self.failed_artifacts.pop(version, None)
+            if self.model_service.unload_version(version):
+                self.unloaded += 1
+
+        for version in added + changed:
+            path = Path(entries[version][0])
+            try:
+                await self._apply(version, path, reload=version in changed)
+                self.index[version] = entries[version]
+                self.failed_artifacts.pop(version, None)
+            except ModelLoadRejected as e:
+                # Memory pressure, not the artifact: retried on the next sync
+                logger.warning(f"Deferred syncing model {version} from {path}: {e}")
+            except Exception as e:
+                # Not retried until the file changes (e.g. a copy still in progress completes)
+                self.failed += 1
+                self.failed_artifacts[version] = entries[version]
+                logger.error(f"Failed to sync model {version} from {path}: {e}")
+
+        await self._sync_registry()
+
+        self.syncs += 1
+        self.last_sync_at = time.time()
+        self.last_sync_ms = (time.perf_counter() - start) * 1000
+        if added or changed or removed:
+            logger.info(f"Model sync: added {added}, changed {changed}, removed {removed} in {self.last_sync_ms:.0f}ms")
+        return {'added': added, 'changed': changed, 'removed': removed}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sync statistics"""
+        return {
+            'enabled': True,
+            'interval_s': self.interval,
+            'indexed_artifacts': len(self.index),
+            'registry': type(self.registry).__name__ if self.registry else None,
+            'production_version': self.model_service.production_version,
+            'waiting_for_artifact': self._waiting_for,
+            'syncs': self.syncs,
+            'loaded': self.loaded,
+            'unloaded': self.unloaded,
+            'failed': self.failed,
+            'failed_artifacts': sorted(self.failed_artifacts),
+            'promotions': self.promotions,
+            'registry_errors': self.registry_errors,
+            'last_sync_at': self.last_sync_at,
+            'last_sync_ms': round(self.last_sync_ms, 1)
+        }
+
+    async def _run(self) -> None:
+        """Sync loop"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync_once()
+            except Exception as e:
+                logger.error(f"Model sync failed: {e}")
+
+    async def _apply(self, version: str, path: Path, reload: bool) -> None:
+        """Load a new or changed artifact, or just register it if it is loaded on demand"""
+        service = self.model_service
+
+        if reload and version not in service.models:
+            # Not resident: the next use loads the new file
+            service.model_files[version] = path
+            return
+
+        if service.load_guard is not None and not service.load_guard():
+            if reload:
+                # The old model keeps serving; retried on the next sync
+                raise ModelLoadRejected(version)
+            service.model_files[version] = path
+            return
+
+        # Loaded off the event loop; the old model serves until the new one is ready
+        await asyncio.to_thread(service.load_version_sync, path)
+        self.loaded += 1
+
+    def _prime(self) -> None:
+        """Index the current directory contents without reloading anything"""
+        for version, path in self.model_service.discover_model_files().items():
+            try:
+                self.index[version] = _fingerprint(path)
+            except OSError as e:
+                logger.warning(f"Could not index model artifact {path}: {e}")
+
+    def _scan(self) -> Tuple[List[str], List[str], List[str], Dict[str, Tuple[str, int, int, str]]]:
+        """Compare the directory with the index; only files whose stat changed are hashed"""
+        found = self.model_service.discover_model_files()
+        added, changed = [], []
+        entries = {}
+
+        for version, path in found.items():
+            previous = self.index.get(version)
+            failed = self.failed_artifacts.get(version)
+            try:
+                stat = path.stat()
+                current = (str(path), stat.st_mtime_ns, stat.st_size)
+                if previous and previous[:3] == current:
+                    continue
+                if failed and failed[:3] == current:
+                    # Same file that failed last time; loading it again would fail again
+                    continue
+                entry = _fingerprint(path)
+            except OSError as e:
+                logger.warning(f"Could not read model artifact {path}: {e}")
+                continue
+
+            if previous is None:
+                added.append(version)
+            elif previous[0] != entry[0] or previous[3] != entry[3]:
+                changed.append(version)
+            else:
+                # Touched but identical content: refresh the stat only
+                self.index[version] = entry
+                continue
+            entries[version] = entry
+
+        removed = [version for version in self.index if version not in found]
+        for version in [v for v in self.failed_artifacts if v not in found]:
+            del self.failed_artifacts[version]
+        return sorted(added), sorted(changed), sorted(removed), entries
+
+    async def _sync_registry(self) -> None:
+        """Route "latest" to the registry's production model once its artifact is loaded"""
+        if self.registry is None:
+            return
+
+        try:
+            entry = await self.registry.get_production_model()
+        except Exception as e:
+            self.registry_errors += 1
+            logger.warning(f"Model registry query failed: {e}")
+            return
+
+        version = Path(entry['model_path']).stem if entry else None
+        service = self.model_service
+        if version == service.production_version:
+            return
+
+        if version is not None and version not in service.model_files and version not in service.models:
+            if self._waiting_for != version:
+                logger.warning(f"Production model {version} is not in the model directory yet")
+                self._waiting_for = version
+            return
+
+        if version is not None and version not in service.models:
+            await asyncio.to_thread(service.load_version_sync, service.model_files[version])
+            self.loaded += 1
+
+        logger.info(f"Production model changed: {service.production_version} -> {version}")
+        service.production_version = version
+        self._waiting_for = None
+        self.promotions += 1
+
+
+def _fingerprint(path: Path) -> Tuple[str, int, int, str]:
+    """Path, mtime, size and SHA-256 of an artifact"""
+    stat = path.stat()
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return str(path), stat.st_mtime_ns, stat.st_size, digest.hexdigest()
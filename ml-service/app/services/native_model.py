@@ -0,0 +1,335 @@
+"""
+Compact, memory-mappable model artifact format (.fdm)
+
+A LightGBM model is flattened into a handful of numpy arrays (split
+feature, threshold, children, missing-value handling and leaf values for
+every node of every tree) and written with a JSON header holding the
+feature schema, calibration table and metadata:
+
+    magic (8 bytes) | header length (uint32 LE) | JSON header | padding
+    | array 0 | padding | array 1 | ...
+
+Arrays are little-endian and 64-byte aligned, so loading is an mmap plus
+``np.frombuffer`` views: no unpickling, no copies, and pages are shared by
+every process serving the same file. ``NativeTreeModel`` scores with a
+vectorized tree traversal that follows LightGBM's numerical decision rules
+and sums trees in the same order, so scores match the original model.
+"""
+
+import json
+import logging
+import math
+import mmap
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NATIVE_SUFFIX = ".fdm"
+MAGIC = b"FDMODEL\x01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# LightGBM missing value handling per split
+MISSING_NONE = 0
+MISSING_ZERO = 1
+MISSING_NAN = 2
+_MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+
+# LightGBM treats |x| <= kZeroThreshold as zero
+ZERO_THRESHOLD = 1e-35
+
+# Objectives whose output is a raw score or a sigmoid of it
+_IDENTITY_OBJECTIVES = {"regression", "regression_l1", "huber", "fair", "quantile", "mape"}
+_SIGMOID_OBJECTIVES = {"binary", "cross_entropy", "xentropy"}
+
+
+class NativeTreeModel:
+    """Gradient boosted trees scored directly from flattened (optionally memory-mapped) arrays"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], header: Dict[str, Any], buffer: Any = None):
+        self.header = header
+        self.feature_names: List[str] = header.get('feature_names', [])
+        self.n_features_ = header['num_features']
+        self.num_trees = header['num_trees']
+        self.transform = header['transform']
+        self.sigmoid = header.get('sigmoid', 1.0)
+
+        self.split_feature = arrays['split_feature']
+        self.threshold = arrays['threshold']
+        self.left_child = arrays['left_child']
+        self.right_child = arrays['right_child']
+        self.default_left = arrays['default_left'].astype(bool)
+        self.missing_type = arrays['missing_type']
+        self.leaf_value = arrays['leaf_value']
+        self.tree_root = arrays['tree_root']
+
+        if 'feature_importance' in arrays:
+            # Only present when the source model exposed feature_importances_
+            self.feature_importances_ = arrays['feature_importance']
+
+        # Keeps the memory map alive for as long as the array views are used
+        self._buffer = buffer
+
+    def raw_score(self, X: Any) -> np.ndarray:
+        """Sum of leaf values over all trees for each row of X"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_:
+            raise ValueError(f"Expected {self.n_features_} features, got {X.shape[1]}")
+
+        n_rows = X.shape[0]
+        if n_rows == 0 or self.num_trees == 0:
+            return np.zeros(n_rows, dtype=np.float64)
+
+        # Current node of every (row, tree) pair; negative values encode leaves as ~leaf_index
+        node = np.broadcast_to(self.tree_root, (n_rows, self.num_trees)).copy()
+        active = node >= 0
+
+        while active.any():
+            rows, trees = np.nonzero(active)
+            current = node[rows, trees]
+
+            value = X[rows, self.split_feature[current]]
+            missing_type = self.missing_type[current]
+            is_nan = np.isnan(value)
+            value = np.where(is_nan & (missing_type != MISSING_NAN), 0.0, value)
+
+            is_missing = (
+                ((missing_type == MISSING_ZERO) & (np.abs(value) <= ZERO_THRESHOLD))
+                | ((missing_type == MISSING_NAN) & is_nan)
+            )
+            go_left = np.where(is_missing, self.default_left[current], value <= self.threshold[current])
+
+            child = np.where(go_left, self.left_child[current], self.right_child[current])
+            node[rows, trees] = child
+            active[rows, trees] = child >= 0
+
+        leaf_values = self.leaf_value[~node]
+        # Sequential sum over trees, in LightGBM's order, so results match bit for bit
+        return np.cumsum(leaf_values, axis=1)[:, -1]
+
+    def predict(self, X: Any) -> np.ndarray:
+        """Model output for each row, like ``Booster.predict``"""
+        raw = self.raw_score(X)
+        if self.transform == "sigmoid":
+            # C library exp, as LightGBM uses; numpy's vectorized exp can differ in the last bit
+            exp = np.fromiter((math.exp(v) for v in (-self.sigmoid * raw).tolist()), dtype=np.float64, count=len(raw))
+            return 1.0 / (1.0 + exp)
+        return raw
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """Class probabilities, like ``LGBMClassifier.predict_proba``"""
+        if self.transform != "sigmoid":
+            raise ValueError("predict_proba requires a binary classification model")
+        probability = self.predict(X)
+        return np.column_stack([1.0 - probability, probability])
+
+
+def flatten_booster(booster: Any) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Flatten the trees of a LightGBM Booster into node and leaf arrays
+
+    Returns:
+        (arrays, info) where info holds the objective and tree counts
+    """
+    dump = booster.dump_model()
+
+    if dump.get('num_class', 1) != 1 or dump.get('num_tree_per_iteration', 1) != 1:
+        raise ValueError("Only single-output (binary or regression) models are supported")
+
+    objective_parts = str(dump.get('objective', '')).split()
+    objective = objective_parts[0] if objective_parts else ''
+    sigmoid = 1.0
+    if objective in _SIGMOID_OBJECTIVES:
+        transform = "sigmoid"
+        for part in objective_parts[1:]:
+            if part.startswith("sigmoid:"):
+                sigmoid = float(part.split(":", 1)[1])
+    elif objective in _IDENTITY_OBJECTIVES:
+        transform = "identity"
+    else:
+        raise ValueError(f"Unsupported objective for native conversion: {dump.get('objective')}")
+
+    split_feature: List[int] = []
+    threshold: List[float] = []
+    left_child: List[int] = []
+    right_child: List[int] = []
+    default_left: List[bool] = []
+    missing_type: List[int] = []
+    leaf_value: List[float] = []
+
+    def add_node(node: Dict[str, Any]) -> int:
+        if 'split_index' not in node:
+            leaf_value.append(float(node['leaf_value']))
+            return ~(len(leaf_value) - 1)
+
+        if node.get('decision_type', '<=') != '<=':
+            raise ValueError("Categorical splits are not supported by the native format")
+
+        index = len(split_feature)
+        split_feature.append(int(node['split_feature']))
+        threshold.append(float(node['threshold']))
+        default_left.append(bool(node.get('default_left', True)))
+        missing_type.append(_MISSING_TYPES[node.get('missing_type', 'None')])
+        left_child.append(0)
+        right_child.append(0)
+
+        left_child[index] = add_node(node['left_child'])
+        right_child[index] = add_node(node['right_child'])
+        return index
+
+    tree_root = []
+    for tree in dump['tree_info']:
+        if tree.get('is_linear'):
+            raise ValueError("Linear trees are not supported by the native format")
+        tree_root.append(add_node(tree['tree_structure']))
+
+    arrays = {
+        'split_feature': np.asarray(split_feature, dtype='<i4'),
+        'threshold': np.asarray(threshold, dtype='<f8'),
+        'left_child': np.asarray(left_child, dtype='<i4'),
+        'right_child': np.asarray(right_child, dtype='<i4'),
+        'default_left': np.asarray(default_left, dtype='u1'),
+        'missing_type': np.asarray(missing_type, dtype='u1'),
+        'leaf_value': np.asarray(leaf_value, dtype='<f8'),
+        'tree_root': np.asarray(tree_root, dtype='<i4')
+    }
+    info = {
+        'objective': dump.get('objective'),
+        'transform': transform,
+        'sigmoid': sigmoid,
+        'num_features': int(dump['max_feature_idx']) + 1,
+        'feature_names': list(dump.get('feature_names', [])),
+        'num_trees': len(tree_root),
+        'num_nodes': len(split_feature),
+        'num_leaves': len(leaf_value)
+    }
+    return arrays, info
+
+
+def save_native_model(
+    path: Union[str, Path],
+    booster: Any,
+    feature_names: Optional[List[str]] = None,
+    calibration: Optional[Dict[str, Any]] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    feature_importance: Optional[Any] = None
+) -> Dict[str, Any]:
+    """
+    Write a LightGBM Booster as a native .fdm artifact
+
+    Args:
+        path: Output file
+        booster: Trained LightGBM Booster
+        feature_names: Feature schema (defaults to the booster's names)
+        calibration: Calibration table dict ({'method', 'x', 'y'})
+        metadata: Model metadata to carry over
+        feature_importance: Importances exposed as ``feature_importances_``
+
+    Returns:
+        The header written to the file
+    """
+    arrays, info = flatten_booster(booster)
+    if feature_importance is not None:
+        arrays['feature_importance'] = np.asarray(feature_importance, dtype='<f8')
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _align(offset + array.nbytes)
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        **info,
+        'feature_names': list(feature_names) if feature_names else info['feature_names'],
+        'calibration': calibration,
+        'metadata': metadata or {},
+        'arrays': layout
+    }
+    header_bytes = json.dumps(header, default=_json_default).encode('utf-8')
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.write(b'\0' * (data_start + layout[name]['offset'] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+
+    logger.info(
+        f"Wrote native model {path}: {info['num_trees']} trees, "
+        f"{info['num_nodes']} nodes, {info['num_leaves']} leaves"
+    )
+    return header
+
+
+def load_native_model(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Memory-map a native .fdm artifact
+
+    Returns:
+        Model data dict in the shape ModelService expects from pickled
+        artifacts: ``{'model', 'metadata', 'calibration'}``
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        buffer.close()
+        raise ValueError(f"{path} is not a native model file")
+
+    (header_length,) = struct.unpack_from('<I', buffer, len(MAGIC))
+    header_start = len(MAGIC) + 4
+    header = json.loads(bytes(buffer[header_start:header_start + header_length]).decode('utf-8'))
+    if header.get('format_version') != FORMAT_VERSION:
+        buffer.close()
+        raise ValueError(f"Unsupported native model format version: {header.get('format_version')}")
+
+    data_start = _align(header_start + header_length)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        shape = tuple(spec['shape'])
+        count = int(np.prod(shape))
+        if count == 0:
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.frombuffer(
+                buffer, dtype=dtype, count=count, offset=data_start + spec['offset']
+            ).reshape(shape)
+
+    return {
+        'model': NativeTreeModel(arrays, header, buffer),
+        'metadata': header.get('metadata', {}),
+        'calibration': header.get('calibration')
+    }
+
+
+def extract_booster(model: Any) -> Any:
+    """Get the LightGBM Booster behind a Booster or an sklearn-API LightGBM model"""
+    if hasattr(model, 'dump_model'):
+        return model
+    if hasattr(model, 'booster_'):
+        return model.booster_
+    raise TypeError(f"Cannot convert {type(model).__name__}: not a LightGBM model")
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to the array alignment"""
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _json_default(value: Any) -> Any:
+    """JSON encoder fallback for numpy values in metadata"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
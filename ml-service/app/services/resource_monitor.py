@@ -0,0 +1,199 @@
+"""
+Background resource monitor enforcing the service memory budget
+
+Samples the process RSS and CPU usage on an interval and compares RSS with
+``max_memory_mb``. Above the soft limit it asks registered shrinkers (model
+eviction, caches) to release memory; above the hard limit it additionally
+refuses work that would load new models until usage drops again.
+
+Checks run in a worker thread: a shrinker may wait for a model load in
+progress (model eviction takes the model service's load lock), and that
+wait must not stall the event loop. CPU usage is a percentage of all the
+machine's cores, so ``max_cpu_percent`` means the same on any host.
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+PRESSURE_NORMAL = "normal"
+PRESSURE_ELEVATED = "elevated"
+PRESSURE_CRITICAL = "critical"
+
+
+class ResourceMonitor:
+    """Tracks memory and CPU usage against the configured limits"""
+
+    def __init__(
+        self,
+        max_memory_mb: float,
+        max_cpu_percent: float,
+        soft_limit_ratio: float = 0.85,
+        hard_limit_ratio: float = 0.95,
+        interval: float = 5.0
+    ):
+        self.max_memory_mb = max_memory_mb
+        self.max_cpu_percent = max_cpu_percent
+        self.soft_limit_mb = max_memory_mb * soft_limit_ratio
+        self.hard_limit_mb = max_memory_mb * hard_limit_ratio
+        self.interval = interval
+
+        self.pressure = PRESSURE_NORMAL
+        self.rss_mb = 0.0
+        self.cpu_percent = 0.0
+        self.last_sample_at = 0.0
+        self.shrink_runs = 0
+        self.rejected_loads = 0
+
+        self._shrinkers: Dict[str, Callable[[], Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._process = psutil.Process() if PSUTIL_AVAILABLE else None
+        self._last_cpu_times: Optional[float] = None
+        self._last_cpu_wall: Optional[float] = None
+        self._cpu_count = (psutil.cpu_count() if PSUTIL_AVAILABLE else None) or os.cpu_count() or 1
+
+    def register_shrinker(self, name: str, shrink: Callable[[], Any]) -> None:
+        """Register a callback that releases memory when the service is under pressure"""
+        self._shrinkers[name] = shrink
+
+    async def start(self) -> None:
+        """Take a first sample and start the background monitoring loop"""
+        await asyncio.to_thread(self.check)
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Resource monitor started: max {self.max_memory_mb}MB "
+            f"(soft {self.soft_limit_mb:.0f}MB, hard {self.hard_limit_mb:.0f}MB)"
+        )
+
+    async def stop(self) -> None:
+        """Stop the background monitoring loop"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def under_pressure(self) -> bool:
+        """Whether optional work should be skipped"""
+        return self.pressure != PRESSURE_NORMAL or self.cpu_percent > self.max_cpu_percent
+
+    def allow_model_load(self) -> bool:
+        """Whether a new model may be loaded into memory"""
+        if self.pressure == PRESSURE_CRITICAL:
+            self.rejected_loads += 1
+            return False
+        return True
+
+    def check(self) -> str:
+        """Sample usage, release memory if needed and update the pressure level"""
+        self._sample()
+        level = self._level()
+
+        if level != PRESSURE_NORMAL:
+            self._shrink(level)
+            self._sample()
+            level = self._level()
+
+        if level != self.pressure:
+            log = logger.warning if level != PRESSURE_NORMAL else logger.info
+            log(f"Memory pressure {self.pressure} -> {level} (RSS {self.rss_mb:.0f}MB of {self.max_memory_mb}MB)")
+        self.pressure = level
+        return level
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get current usage and pressure"""
+        return {
+            'pressure': self.pressure,
+            'rss_mb': round(self.rss_mb, 1),
+            'max_memory_mb': self.max_memory_mb,
+            'soft_limit_mb': round(self.soft_limit_mb, 1),
+            'hard_limit_mb': round(self.hard_limit_mb, 1),
+            'memory_percent_of_limit': round(100.0 * self.rss_mb / self.max_memory_mb, 1) if self.max_memory_mb else 0.0,
+            'cpu_percent': round(self.cpu_percent, 1),
+            'max_cpu_percent': self.max_cpu_percent,
+            'cpu_over_limit': self.cpu_percent > self.max_cpu_percent,
+            'shrink_runs': self.shrink_runs,
+            'rejected_model_loads': self.rejected_loads,
+            'last_sample_at': self.last_sample_at
+        }
+
+    async def _run(self) -> None:
+        """Monitoring loop"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                # Off the event loop: shrinkers may block on a model load in progress
+                await asyncio.to_thread(self.check)
+            except Exception as e:
+                logger.error(f"Resource check failed: {e}")
+
+    def _level(self) -> str:
+        """Pressure level for the current RSS"""
+        if self.rss_mb >= self.hard_limit_mb:
+            return PRESSURE_CRITICAL
+        if self.rss_mb >= self.soft_limit_mb:
+            return PRESSURE_ELEVATED
+        return PRESSURE_NORMAL
+
+    def _shrink(self, level: str) -> None:
+        """Ask every registered shrinker to release memory"""
+        self.shrink_runs += 1
+        for name, shrink in self._shrinkers.items():
+            try:
+                released = shrink()
+                logger.info(f"Shrinker {name} released {released} under {level} memory pressure")
+            except Exception as e:
+                logger.error(f"Shrinker {name} failed: {e}")
+        gc.collect()
+
+    def _sample(self) -> None:
+        """Read the current RSS and CPU usage of this process"""
+        self.rss_mb = _current_rss_mb(self._process)
+        self.cpu_percent = self._current_cpu_percent()
+        self.last_sample_at = time.time()
+
+    def _current_cpu_percent(self) -> float:
+        """CPU usage since the previous sample, as a percentage of all cores"""
+        if self._process is not None:
+            # psutil reports a percentage of one core (up to cores x 100)
+            return self._process.cpu_percent(interval=None) / self._cpu_count
+
+        times = os.times()
+        cpu = times.user + times.system
+        wall = time.monotonic()
+        percent = 0.0
+        if self._last_cpu_times is not None and wall > self._last_cpu_wall:
+            percent = 100.0 * (cpu - self._last_cpu_times) / (wall - self._last_cpu_wall) / self._cpu_count
+        self._last_cpu_times = cpu
+        self._last_cpu_wall = wall
+        return percent
+
+
+def _current_rss_mb(process=None) -> float:
+    """Resident set size of this process in MB"""
+    if process is not None:
+        return process.memory_info().rss / (1024 * 1024)
+
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, but better than nothing
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
@@ -0,0 +1,257 @@
+"""
+Request scheduler with priority lanes and admission control
+
+Interactive traffic (single /predict calls from the live application flow)
+and bulk traffic (/predict/batch re-screens) wait in separate lanes. Each
+lane has its own concurrency limit, queue depth limit and queue wait limit,
+and free slots are handed out by weighted fair queuing so a bulk backlog
+cannot starve interactive requests. Requests that would exceed a lane's
+queue limits are shed immediately with an Overloaded error.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from ..utils.deadline import Deadline, DeadlineExceeded, timeout_stats
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+
+class Overloaded(Exception):
+    """Raised when a lane sheds a request"""
+
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Service overloaded ({lane} lane {reason}), retry after {retry_after}s")
+
+
+class Lane:
+    """Queue and counters for one class of traffic"""
+
+    def __init__(
+        self,
+        name: str,
+        weight: float,
+        max_concurrency: int,
+        max_queue_depth: int,
+        max_queue_wait_ms: float
+    ):
+        self.name = name
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.max_queue_wait_ms = max_queue_wait_ms
+
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.active = 0
+        self.virtual_time = 0.0
+        self.avg_service_ms = 0.0
+
+        self.admitted = 0
+        self.completed = 0
+        self.shed_queue_full = 0
+        self.shed_wait_timeout = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot"""
+        return len(self.waiters)
+
+    def retry_after(self) -> int:
+        """Estimate in whole seconds when a retry is likely to be admitted"""
+        backlog_ms = (self.queue_depth + 1) * max(self.avg_service_ms, 1.0) / max(self.max_concurrency, 1)
+        return max(1, math.ceil(backlog_ms / 1000.0))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get lane statistics"""
+        return {
+            'weight': self.weight,
+            'max_concurrency': self.max_concurrency,
+            'max_queue_depth': self.max_queue_depth,
+            'max_queue_wait_ms': self.max_queue_wait_ms,
+            'active': self.active,
+            'queue_depth': self.queue_depth,
+            'admitted': self.admitted,
+            'completed': self.completed,
+            'shed': self.shed_queue_full + self.shed_wait_timeout,
+            'shed_queue_full': self.shed_queue_full,
+            'shed_wait_timeout': self.shed_wait_timeout,
+            'average_wait_ms': self.total_wait_ms / self.admitted if self.admitted else 0.0,
+            'max_wait_ms': self.max_wait_ms,
+            'average_service_ms': self.avg_service_ms
+        }
+
+
+class RequestScheduler:
+    """Weighted admission control across traffic lanes"""
+
+    def __init__(self, total_concurrency: int, lanes: Dict[str, Lane]):
+        self.total_concurrency = total_concurrency
+        self.lanes = lanes
+        self.active = 0
+        self._virtual_clock = 0.0
+
+    @classmethod
+    def from_settings(cls, settings) -> "RequestScheduler":
+        """Create the interactive and bulk lanes from settings"""
+        return cls(
+            total_concurrency=settings.scheduler_total_concurrency,
+            lanes={
+                INTERACTIVE: Lane(
+                    INTERACTIVE,
+                    weight=settings.interactive_lane_weight,
+                    max_concurrency=settings.interactive_max_concurrency,
+                    max_queue_depth=settings.interactive_max_queue_depth,
+                    max_queue_wait_ms=settings.interactive_max_queue_wait_ms
+                ),
+                BULK: Lane(
+                    BULK,
+                    weight=settings.bulk_lane_weight,
+                    max_concurrency=settings.bulk_max_concurrency,
+                    max_queue_depth=settings.bulk_max_queue_depth,
+                    max_queue_wait_ms=settings.bulk_max_queue_wait_ms
+                )
+            }
+        )
+
+    @asynccontextmanager
+    async def slot(self, lane_name: str, deadline: Optional[Deadline] = None) -> AsyncIterator[None]:
+        """Hold an execution slot in a lane for the duration of the block"""
+        await self.acquire(lane_name, deadline)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(lane_name, (time.perf_counter() - start) * 1000)
+
+    async def acquire(self, lane_name: str, deadline: Optional[Deadline] = None) -> None:
+        """
+        Wait for an execution slot in a lane
+
+        Raises:
+            Overloaded: if the lane queue is full or the wait limit is reached
+            DeadlineExceeded: if the request deadline passes while queued
+        """
+        lane = self.lanes[lane_name]
+
+        if lane.queue_depth == 0 and self._has_capacity(lane):
+            self._grant(lane)
+            return
+
+        if lane.queue_depth >= lane.max_queue_depth:
+            lane.shed_queue_full += 1
+            raise Overloaded(lane.name, "queue full", lane.retry_after())
+
+        if lane.queue_depth == 0:
+            # A lane that was idle starts level with the others instead of with banked credit
+            lane.virtual_time = max(lane.virtual_time, self._virtual_clock)
+
+        timeout = lane.max_queue_wait_ms / 1000.0
+        deadline_bound = deadline is not None and deadline.remaining() < timeout
+        if deadline is not None:
+            timeout = min(timeout, max(deadline.remaining(), 0.0))
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        queued_at = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(waiter, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._discard(lane, waiter)
+            if deadline_bound:
+                timeout_stats.record_timeout("queue")
+                raise DeadlineExceeded("queue", timeout * 1000)
+            lane.shed_wait_timeout += 1
+            raise Overloaded(lane.name, "wait limit reached", lane.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was granted just as the caller went away
+                self.release(lane_name)
+            else:
+                self._discard(lane, waiter)
+            raise
+
+        wait_ms = (time.perf_counter() - queued_at) * 1000
+        lane.total_wait_ms += wait_ms
+        lane.max_wait_ms = max(lane.max_wait_ms, wait_ms)
+
+    def release(self, lane_name: str, service_ms: Optional[float] = None) -> None:
+        """Return a slot and hand free capacity to waiting requests"""
+        lane = self.lanes[lane_name]
+        lane.active -= 1
+        lane.completed += 1
+        self.active -= 1
+
+        if service_ms is not None:
+            # Exponentially weighted average, used for Retry-After estimates
+            lane.avg_service_ms = service_ms if lane.completed == 1 else (
+                0.9 * lane.avg_service_ms + 0.1 * service_ms
+            )
+
+        self._dispatch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler and per-lane statistics"""
+        return {
+            'total_concurrency': self.total_concurrency,
+            'active': self.active,
+            'lanes': {name: lane.get_stats() for name, lane in self.lanes.items()}
+        }
+
+    def _has_capacity(self, lane: Lane) -> bool:
+        """Whether a lane may start another request now"""
+        return self.active < self.total_concurrency and lane.active < lane.max_concurrency
+
+    def _grant(self, lane: Lane) -> None:
+        """
+        Account for a started request
+
+        Start-time fair queuing: the request starts at the later of the lane's
+        finish tag and the scheduler clock, and the clock moves to that start.
+        This applies to fast-path grants as well, so a lane that ran alone
+        does not carry its solo usage as debt into later contention.
+        """
+        lane.active += 1
+        lane.admitted += 1
+        self.active += 1
+        start = max(lane.virtual_time, self._virtual_clock)
+        self._virtual_clock = start
+        lane.virtual_time = start + 1.0 / lane.weight
+
+    def _dispatch(self) -> None:
+        """Hand free slots to the eligible lane with the smallest virtual time"""
+        while self.active < self.total_concurrency:
+            candidates = [
+                lane for lane in self.lanes.values()
+                if lane.queue_depth > 0 and lane.active < lane.max_concurrency
+            ]
+            if not candidates:
+                return
+
+            lane = min(candidates, key=lambda l: l.virtual_time)
+            waiter = lane.waiters.popleft()
+            if waiter.done():
+                continue
+
+            self._grant(lane)
+            waiter.set_result(None)
+
+    def _discard(self, lane: Lane, waiter: asyncio.Future) -> None:
+        """Remove an abandoned waiter from its lane"""
+        try:
+            lane.waiters.remove(waiter)
+        except ValueError:
+            pass
@@ -0,0 +1,229 @@
+"""
+Off-path shadow scoring of a challenger model
+
+A sampled copy of production requests is re-scored with a configured
+challenger version after the champion response has been sent. Scoring runs
+on a single low-priority worker thread and the champion/challenger score
+pairs are written in batches to a local SQLite store. Shadow work is
+optional: it is dropped whenever the service is under pressure or the
+backlog is full, so it never competes with live traffic.
+"""
+
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Nice increment applied to the shadow worker thread (Linux only)
+SHADOW_THREAD_NICENESS = 10
+
+# (request_id, champion_version, champion_score, features)
+ShadowItem = Tuple[str, str, float, Sequence[float]]
+
+
+class ShadowScoreStore:
+    """Compact SQLite store for champion/challenger score pairs"""
+
+    def __init__(self, path: str, flush_rows: int = 200):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.rows_written = 0
+        self._buffer: List[tuple] = []
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Only ever used from the shadow worker thread after creation
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shadow_scores (
+                ts REAL NOT NULL,
+                request_id TEXT NOT NULL,
+                champion_version TEXT NOT NULL,
+                champion_score REAL NOT NULL,
+                challenger_version TEXT NOT NULL,
+                challenger_score REAL NOT NULL,
+                challenger_ms REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_shadow_scores_challenger "
+            "ON shadow_scores (challenger_version, ts)"
+        )
+        self._conn.commit()
+
+    def add(self, rows: List[tuple]) -> None:
+        """Buffer rows and write them once a full batch has accumulated"""
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered rows in one transaction"""
+        if not self._buffer:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO shadow_scores (ts, request_id, champion_version, champion_score, "
+                "challenger_version, challenger_score, challenger_ms) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._buffer
+            )
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self) -> None:
+        """Flush remaining rows and close the database"""
+        self.flush()
+        self._conn.close()
+
+
+class ShadowScorer:
+    """Scores sampled requests with a challenger model off the request path"""
+
+    def __init__(
+        self,
+        model_service,
+        challenger_version: str,
+        store_path: str,
+        sample_rate: float = 0.1,
+        max_pending: int = 256,
+        flush_rows: int = 200,
+        should_shed: Optional[Callable[[], bool]] = None
+    ):
+        self.model_service = model_service
+        self.challenger_version = challenger_version
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.should_shed = should_shed
+
+        self.store = ShadowScoreStore(store_path, flush_rows=flush_rows)
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="shadow", initializer=_lower_thread_priority
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+
+        self.submitted = 0
+        self.scored = 0
+        self.failed = 0
+        self.dropped_pressure = 0
+        self.dropped_backlog = 0
+        self.total_challenger_ms = 0.0
+
+    def submit(self, items: List[ShadowItem]) -> int:
+        """
+        Queue a sample of scored requests for challenger scoring
+
+        Meant to run as a background task after the response has been sent.
+
+        Args:
+            items: (request_id, champion_version, champion_score, features) tuples
+
+        Returns:
+            Number of items queued
+        """
+        if self._closed:
+            return 0
+
+        # Never shadow the champion with itself
+        sampled = [
+            item for item in items
+            if item[1] != self.challenger_version and random.random() < self.sample_rate
+        ]
+        if not sampled:
+            return 0
+
+        if self.should_shed is not None and self.should_shed():
+            self.dropped_pressure += len(sampled)
+            return 0
+
+        with self._lock:
+            if self._pending + len(sampled) > self.max_pending:
+                self.dropped_backlog += len(sampled)
+                return 0
+            self._pending += len(sampled)
+
+        self.submitted += len(sampled)
+        self._executor.submit(self._score, sampled)
+        return len(sampled)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get shadow scoring statistics"""
+        return {
+            'enabled': True,
+            'challenger_version': self.challenger_version,
+            'sample_rate': self.sample_rate,
+            'pending': self._pending,
+            'max_pending': self.max_pending,
+            'submitted': self.submitted,
+            'scored': self.scored,
+            'failed': self.failed,
+            'dropped_pressure': self.dropped_pressure,
+            'dropped_backlog': self.dropped_backlog,
+            'average_challenger_ms': self.total_challenger_ms / self.scored if self.scored else 0.0,
+            'rows_written': self.store.rows_written,
+            'store_path': self.store.path
+        }
+
+    def close(self) -> None:
+        """Finish queued work and flush the store"""
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        self.store.close()
+        logger.info(f"Shadow scorer stopped: {self.scored} scored, {self.store.rows_written} rows written")
+
+    def _score(self, items: List[ShadowItem]) -> None:
+        """Score a batch with the challenger and store the pairs (worker thread)"""
+        try:
+            # Pressure may have built up while the batch was queued
+            if self.should_shed is not None and self.should_shed():
+                self.dropped_pressure += len(items)
+                return
+
+            X = np.array([item[3] for item in items], dtype=np.float64)
+            start = time.perf_counter()
+            scores = self.model_service.predict_probabilities(X, self.challenger_version)
+            per_item_ms = (time.perf_counter() - start) * 1000 / len(items)
+
+            now = time.time()
+            self.store.add([
+                (now, request_id, champion_version, float(champion_score),
+                 self.challenger_version, float(score), per_item_ms)
+                for (request_id, champion_version, champion_score, _), score in zip(items, scores)
+            ])
+            self.scored += len(items)
+            self.total_challenger_ms += per_item_ms * len(items)
+        except Exception as e:
+            self.failed += len(items)
+            logger.warning(f"Shadow scoring with {self.challenger_version} failed: {e}")
+        finally:
+            with self._lock:
+                self._pending -= len(items)
+            if self._pending == 0:
+                # Idle: don't leave a partial batch unwritten indefinitely
+                try:
+                    self.store.flush()
+                except Exception as e:
+                    logger.error(f"Shadow score flush failed: {e}")
+
+
+def _lower_thread_priority() -> None:
+    """Raise the niceness of the current worker thread so it yields to request threads"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), SHADOW_THREAD_NICENESS)
+    except (AttributeError, OSError) as e:
+        logger.debug(f"Could not lower shadow thread priority: {e}")
@@ -27,12 +27,30 @@ class Settings(BaseSettings):
     model_path: str = Field(default="models/", env="MODEL_PATH")
     default_model_version: str = Field(default="v1.0.0", env="DEFAULT_MODEL_VERSION")
     model_cache_size: int = Field(default=5, env="MODEL_CACHE_SIZE")
+    pinned_model_versions: str = Field(default="", env="PINNED_MODEL_VERSIONS")  # Comma-separated list
+    model_warmup_iterations: int = Field(default=50, env="MODEL_WARMUP_ITERATIONS")  # 0 disables warm-up
+    model_warmup_batch_size: int = Field(default=100, env="MODEL_WARMUP_BATCH_SIZE")
+    model_warmup_reject_slow: bool = Field(default=False, env="MODEL_WARMUP_REJECT_SLOW")
+    model_sync_enabled: bool = Field(default=True, env="MODEL_SYNC_ENABLED")
+    model_sync_interval: float = Field(default=5.0, env="MODEL_SYNC_INTERVAL")
+    model_registry_url: str = Field(default="", env="MODEL_REGISTRY_URL")  # sqlite:///path or postgresql://...
     
     # Performance configuration
     max_batch_size: int = Field(default=100, env="MAX_BATCH_SIZE")
     prediction_timeout: float = Field(default=30.0, env="PREDICTION_TIMEOUT")
     feature_preprocessing_timeout: float = Field(default=5.0, env="FEATURE_PREPROCESSING_TIMEOUT")
     
+    # Scheduler configuration (interactive /predict vs bulk /predict/batch lanes)
+    scheduler_total_concurrency: int = Field(default=8, env="SCHEDULER_TOTAL_CONCURRENCY")
+    interactive_lane_weight: float = Field(default=4.0, env="INTERACTIVE_LANE_WEIGHT")
+    interactive_max_concurrency: int = Field(default=8, env="INTERACTIVE_MAX_CONCURRENCY")
+    interactive_max_queue_depth: int = Field(default=200, env="INTERACTIVE_MAX_QUEUE_DEPTH")
+    interactive_max_queue_wait_ms: float = Field(default=500.0, env="INTERACTIVE_MAX_QUEUE_WAIT_MS")
+    bulk_lane_weight: float = Field(default=1.0, env="BULK_LANE_WEIGHT")
+    bulk_max_concurrency: int = Field(default=2, env="BULK_MAX_CONCURRENCY")
+    bulk_max_queue_depth: int = Field(default=20, env="BULK_MAX_QUEUE_DEPTH")
+    bulk_max_queue_wait_ms: float = Field(default=5000.0, env="BULK_MAX_QUEUE_WAIT_MS")
+    
     # Logging configuration
     log_level: str = Field(default="INFO", env="LOG_LEVEL")
     log_format: str = Field(default="json", env="LOG_FORMAT")  # json or text
@@ -63,8 +81,25 @@ class Settings(BaseSettings):
     
     # Resource limits
     max_memory_mb: int = Field(default=2048, env="MAX_MEMORY_MB")
-    max_cpu_percent: float = Field(default=80.0, env="MAX_CPU_PERCENT")
-    
+    max_cpu_percent: float = Field(default=80.0, env="MAX_CPU_PERCENT")  # of all cores, not of one
+    memory_soft_limit_ratio: float = Field(default=0.85, env="MEMORY_SOFT_LIMIT_RATIO")
+    memory_hard_limit_ratio: float = Field(default=0.95, env="MEMORY_HARD_LIMIT_RATIO")
+    resource_check_interval: float = Field(default=5.0, env="RESOURCE_CHECK_INTERVAL")
+
+    # Traffic capture configuration
+    traffic_capture_enabled: bool = Field(default=False, env="TRAFFIC_CAPTURE_ENABLED")
+    traffic_capture_path: str = Field(default="captures/traffic.jsonl.gz", env="TRAFFIC_CAPTURE_PATH")
+    traffic_capture_sample_rate: float = Field(default=1.0, env="TRAFFIC_CAPTURE_SAMPLE_RATE")
+    traffic_capture_salt: str = Field(default="", env="TRAFFIC_CAPTURE_SALT")
+    traffic_capture_queue_size: int = Field(default=10000, env="TRAFFIC_CAPTURE_QUEUE_SIZE")
+
+    # Shadow scoring configuration
+    shadow_model_version: str = Field(default="", env="SHADOW_MODEL_VERSION")  # Empty disables shadow scoring
+    shadow_sample_rate: float = Field(default=0.1, env="SHADOW_SAMPLE_RATE")
+    shadow_store_path: str = Field(default="shadow/shadow_scores.db", env="SHADOW_STORE_PATH")
+    shadow_max_pending: int = Field(default=256, env="SHADOW_MAX_PENDING")
+    shadow_flush_rows: int = Field(default=200, env="SHADOW_FLUSH_ROWS")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -82,6 +117,12 @@ class Settings(BaseSettings):
             return set()
         return {key.strip() for key in self.api_keys.split(",") if key.strip()}
     
+    def get_pinned_model_versions(self) -> set:
+        """Get model versions that must never be evicted"""
+        if not self.pinned_model_versions:
+            return set()
+        return {v.strip() for v in self.pinned_model_versions.split(",") if v.strip()}
+    
     def is_production(self) -> bool:
         """Check if running in production environment"""
         return self.environment.lower() in ("production", "prod")
@@ -170,6 +211,15 @@ def validate_settings(settings: Settings) -> list:
     if settings.max_prediction_time_ms <= 0:
         issues.append(f"Invalid max prediction time: {settings.max_prediction_time_ms}")
     
+    if settings.model_sync_interval <= 0:
+        issues.append(f"Invalid model sync interval: {settings.model_sync_interval}")
+    
+    if settings.model_warmup_iterations < 0 or settings.model_warmup_batch_size <= 0:
+        issues.append(
+            f"Invalid model warm-up settings: {settings.model_warmup_iterations} iterations, "
+            f"batch size {settings.model_warmup_batch_size}"
+        )
+    
     # Validate batch size
     if settings.max_batch_size <= 0:
         issues.append(f"Invalid max batch size: {settings.max_batch_size}")
@@ -180,7 +230,38 @@ def validate_settings(settings: Settings) -> list:
     
     if settings.feature_preprocessing_timeout <= 0:
         issues.append(f"Invalid feature preprocessing timeout: {settings.feature_preprocessing_timeout}")
-    
+
+    # Validate resource limits
+    if settings.max_memory_mb <= 0:
+        issues.append(f"Invalid max memory: {settings.max_memory_mb}")
+    
+    if not (0.0 < settings.memory_soft_limit_ratio <= settings.memory_hard_limit_ratio <= 1.0):
+        issues.append(
+            f"Invalid memory limit ratios: soft {settings.memory_soft_limit_ratio}, "
+            f"hard {settings.memory_hard_limit_ratio}"
+        )
+    
+    # Validate scheduler lanes
+    if settings.scheduler_total_concurrency <= 0:
+        issues.append(f"Invalid scheduler concurrency: {settings.scheduler_total_concurrency}")
+    
+    if settings.interactive_lane_weight <= 0 or settings.bulk_lane_weight <= 0:
+        issues.append("Scheduler lane weights must be positive")
+    
+    # Validate traffic capture
+    if not (0.0 <= settings.traffic_capture_sample_rate <= 1.0):
+        issues.append(f"Invalid traffic capture sample rate: {settings.traffic_capture_sample_rate}")
+
+    if settings.traffic_capture_enabled and settings.is_production() and not settings.traffic_capture_salt:
+        issues.append("Traffic capture salt should be set in production")
+
+    # Validate shadow scoring
+    if not (0.0 <= settings.shadow_sample_rate <= 1.0):
+        issues.append(f"Invalid shadow sample rate: {settings.shadow_sample_rate}")
+
+    if settings.shadow_max_pending <= 0:
+        issues.append(f"Invalid shadow max pending: {settings.shadow_max_pending}")
+
     # Production-specific validations
     if settings.is_production():
         if settings.debug:
@@ -0,0 +1,154 @@
+"""
+Per-request deadlines for the prediction pipeline
+
+A request's deadline is the earlier of the client-supplied deadline (if
+any) and the configured prediction timeout. Each pipeline stage checks the
+deadline before it starts and runs with a timeout bounded by the time left,
+so work whose caller has already given up is abandoned and the caller gets
+a prompt, distinct timeout error instead of a late answer.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+# Client headers carrying a deadline
+TIMEOUT_HEADER = "X-Request-Timeout-Ms"
+DEADLINE_HEADER = "X-Request-Deadline"
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of time before or during a stage"""
+
+    def __init__(self, stage: str, timeout_ms: Optional[float] = None):
+        self.stage = stage
+        self.timeout_ms = timeout_ms
+        message = f"Deadline exceeded during {stage}"
+        if timeout_ms is not None:
+            message += f" (budget {timeout_ms:.1f}ms)"
+        super().__init__(message)
+
+
+class TimeoutStats:
+    """Thread-safe per-stage timeout counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expired_before: Dict[str, int] = {}
+        self._timed_out: Dict[str, int] = {}
+
+    def record_expired(self, stage: str) -> None:
+        """Count a stage skipped because the deadline had already passed"""
+        with self._lock:
+            self._expired_before[stage] = self._expired_before.get(stage, 0) + 1
+
+    def record_timeout(self, stage: str) -> None:
+        """Count a stage abandoned because it ran past the deadline"""
+        with self._lock:
+            self._timed_out[stage] = self._timed_out.get(stage, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a copy of the counters"""
+        with self._lock:
+            stages = set(self._expired_before) | set(self._timed_out)
+            return {
+                stage: {
+                    'expired_before_start': self._expired_before.get(stage, 0),
+                    'timed_out': self._timed_out.get(stage, 0),
+                    'total': self._expired_before.get(stage, 0) + self._timed_out.get(stage, 0)
+                }
+                for stage in sorted(stages)
+            }
+
+
+timeout_stats = TimeoutStats()
+
+
+class Deadline:
+    """Absolute point in time (monotonic clock) by which a request must finish"""
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_timeout(cls, seconds: float) -> "Deadline":
+        """Create a deadline a number of seconds from now"""
+        return cls(time.monotonic() + seconds)
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str], default_timeout: float) -> "Deadline":
+        """
+        Create a deadline from client headers, capped by the configured timeout
+
+        ``X-Request-Timeout-Ms`` is a relative budget in milliseconds;
+        ``X-Request-Deadline`` is an absolute Unix timestamp in seconds.
+        Malformed values are ignored.
+        """
+        timeout = default_timeout
+
+        relative = headers.get(TIMEOUT_HEADER)
+        if relative:
+            try:
+                timeout = min(timeout, float(relative) / 1000.0)
+            except ValueError:
+                pass
+
+        absolute = headers.get(DEADLINE_HEADER)
+        if absolute:
+            try:
+                timeout = min(timeout, float(absolute) - time.time())
+            except ValueError:
+                pass
+
+        return cls.from_timeout(timeout)
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (negative once expired)"""
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed"""
+        return self.remaining() <= 0
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded if the deadline passed before the stage starts"""
+        if self.expired:
+            timeout_stats.record_expired(stage)
+            raise DeadlineExceeded(stage)
+
+    def stage_timeout(self, stage_limit: Optional[float] = None) -> float:
+        """Time available to a stage: the time left, capped by the stage's own limit"""
+        remaining = self.remaining()
+        if stage_limit is not None:
+            return min(remaining, stage_limit)
+        return remaining
+
+
+async def run_stage(
+    stage: str,
+    func: Callable[..., Any],
+    *args: Any,
+    deadline: Deadline,
+    stage_limit: Optional[float] = None,
+    **kwargs: Any
+) -> Any:
+    """
+    Run a synchronous stage in the default executor under the deadline
+
+    The stage is skipped if the deadline has already passed. If it runs past
+    its timeout the caller is released with DeadlineExceeded; the worker
+    thread finishes in the background and its result is discarded.
+    """
+    deadline.check(stage)
+    timeout = deadline.stage_timeout(stage_limit)
+
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout=timeout)
+    except asyncio.TimeoutError:
+        timeout_stats.record_timeout(stage)
+        raise DeadlineExceeded(stage, timeout * 1000)
@@ -0,0 +1,185 @@
+"""
+Traffic capture for replaying production request mixes
+
+Captured requests are sanitized before they are written: direct identifiers
+are replaced by salted hashes (so repeated applicants still look repeated)
+and dates of birth are reduced to an age. Sanitizing and writing happen on a
+background thread; the request path only enqueues the payload. Records are
+appended to a gzip-compressed JSON Lines file, one segment per service start.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Keys whose values identify a person, vehicle or session
+PSEUDONYMIZE_KEYS = {
+    "sin", "email", "phone", "first_name", "last_name", "name", "full_name",
+    "street", "postal_code", "vin", "license_number", "drivers_license",
+    "employer", "session_id", "user_agent", "ip_address", "referral_code"
+}
+
+DATE_OF_BIRTH_KEYS = {"date_of_birth", "dob"}
+
+
+def sanitize_payload(payload: Any, salt: str = "") -> Any:
+    """
+    Remove personal data from a request payload while keeping its shape
+
+    Args:
+        payload: Request body (dict, list or scalar)
+        salt: Secret mixed into identifier hashes
+
+    Returns:
+        Sanitized copy of the payload
+    """
+    if isinstance(payload, list):
+        return [sanitize_payload(item, salt) for item in payload]
+
+    if not isinstance(payload, dict):
+        return payload
+
+    sanitized = {}
+    for key, value in payload.items():
+        lowered = key.lower()
+        if lowered in DATE_OF_BIRTH_KEYS:
+            age = _age_from_date_of_birth(value)
+            if age is not None and "age" not in payload:
+                sanitized["age"] = age
+        elif lowered in PSEUDONYMIZE_KEYS and value is not None:
+            sanitized[key] = _pseudonymize(value, salt)
+        else:
+            sanitized[key] = sanitize_payload(value, salt)
+
+    return sanitized
+
+
+def _pseudonymize(value: Any, salt: str) -> str:
+    """Replace an identifier with a stable salted hash token"""
+    digest = hashlib.sha256(f"{salt}:{value}".encode("utf-8")).hexdigest()
+    return f"h:{digest[:16]}"
+
+
+def _age_from_date_of_birth(value: Any) -> Optional[int]:
+    """Convert a date of birth string to an age in years"""
+    if not isinstance(value, str):
+        return None
+    try:
+        if 'T' in value:
+            dob = datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+        else:
+            dob = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+    today = date.today()
+    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+
+class TrafficRecorder:
+    """Records sanitized request payloads with their arrival times"""
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 1.0,
+        salt: str = "",
+        queue_size: int = 10000,
+        flush_interval: float = 1.0
+    ):
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.salt = salt
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = time.monotonic()
+        self.recorded_count = 0
+        self.dropped_count = 0
+
+    def start(self) -> None:
+        """Start the background writer thread"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._writer_loop, name="traffic-capture", daemon=True)
+        self._thread.start()
+        logger.info(f"Traffic capture enabled, writing to {self.path} (sample rate {self.sample_rate})")
+
+    def record(self, endpoint: str, payload: Any) -> None:
+        """Queue a request for capture without blocking the caller"""
+        if self._thread is None:
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+
+        arrival = time.monotonic() - self._started_at
+        try:
+            self._queue.put_nowait((arrival, endpoint, payload))
+        except queue.Full:
+            self.dropped_count += 1
+
+    def stop(self) -> None:
+        """Flush pending records and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=10)
+        self._thread = None
+        logger.info(
+            f"Traffic capture stopped: {self.recorded_count} recorded, {self.dropped_count} dropped"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get capture statistics"""
+        return {
+            'enabled': self._thread is not None,
+            'path': str(self.path),
+            'sample_rate': self.sample_rate,
+            'recorded': self.recorded_count,
+            'dropped': self.dropped_count,
+            'pending': self._queue.qsize()
+        }
+
+    def _writer_loop(self) -> None:
+        """Append queued records to the capture file"""
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            # Segment header: arrival offsets below are relative to this start time
+            f.write(json.dumps({"segment_start": time.time()}) + "\n")
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    record = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    f.flush()
+                    last_flush = time.monotonic()
+                    continue
+
+                if record is None:
+                    break
+
+                arrival, endpoint, payload = record
+                try:
+                    line = {
+                        "t": round(arrival, 6),
+                        "e": endpoint,
+                        "p": sanitize_payload(payload, self.salt)
+                    }
+                    f.write(json.dumps(line, separators=(",", ":"), default=str))
+                    f.write("\n")
+                    self.recorded_count += 1
+                except Exception as e:
+                    logger.warning(f"Failed to write captured request: {e}")
+
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    f.flush()
+                    last_flush = time.monotonic()
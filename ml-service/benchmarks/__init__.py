@@ -0,0 +1,8 @@
+"""
+Offline benchmark suite for the ML inference service
+
+Run from the ml-service directory:
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json
+"""
@@ -0,0 +1,303 @@
+"""
+Benchmark runner for the ML inference service
+
+Measures feature preprocessing, model scoring, the /predict and
+/predict/batch endpoints (in-process, no network) and model load time at
+several batch sizes and concurrency levels. Results are written as JSON and
+can be compared against a stored baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services.feature_service import FeatureService
+from app.services.model_service import ModelService
+from app.services.scheduler import RequestScheduler
+from app.utils.config import get_settings
+from .stats import summarize_latencies, compare_results
+from .synthetic import (
+    generate_feature_vectors,
+    generate_raw_applications,
+    train_synthetic_model,
+    LIGHTGBM_AVAILABLE
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZES = "1,10,100"
+DEFAULT_CONCURRENCY = "1,4,16"
+
+
+class BenchmarkRunner:
+    """Runs the benchmark cases and collects their latency summaries"""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.batch_sizes = _parse_int_list(args.batch_sizes)
+        self.concurrency_levels = _parse_int_list(args.concurrency)
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.model_dir: Optional[Path] = None
+        self.model_service: Optional[ModelService] = None
+        self.feature_service = FeatureService()
+
+        pool_size = max(self.batch_sizes) * 4
+        self.vectors = generate_feature_vectors(pool_size, seed=args.seed)
+        self.applications = generate_raw_applications(pool_size, seed=args.seed)
+
+    async def setup(self, workdir: Path) -> None:
+        """Prepare the model directory and load the model service"""
+        self.model_dir = workdir / "models"
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.args.model_path:
+            self.model_dir = Path(self.args.model_path)
+        elif self.args.model == "lightgbm":
+            if not LIGHTGBM_AVAILABLE:
+                raise RuntimeError("LightGBM is not installed; use --model mock")
+            train_synthetic_model(self.model_dir, seed=self.args.seed)
+
+        self.model_service = ModelService(str(self.model_dir))
+        await self.model_service.load_models()
+
+    async def run(self) -> Dict[str, Dict[str, Any]]:
+        """Run every benchmark case"""
+        await self.bench_model_load()
+
+        for batch_size in self.batch_sizes:
+            for concurrency in self.concurrency_levels:
+                await self.bench_feature_preprocess(batch_size, concurrency)
+                await self.bench_model_predict(batch_size, concurrency)
+
+        await self.bench_api()
+        return self.results
+
+    async def bench_model_load(self) -> None:
+        """Time a full model directory load"""
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(self.args.load_iterations):
+            service = ModelService(str(self.model_dir))
+            t0 = time.perf_counter()
+            await service.load_models()
+            latencies.append((time.perf_counter() - t0) * 1000)
+            await service.cleanup()
+        wall = time.perf_counter() - start
+
+        self._record("model_load", latencies, wall)
+
+    async def bench_feature_preprocess(self, batch_size: int, concurrency: int) -> None:
+        """Time FeatureService.preprocess_features on raw applications"""
+
+        async def call(i: int) -> int:
+            offset = (i * batch_size) % (len(self.applications) - batch_size + 1)
+            for application in self.applications[offset:offset + batch_size]:
+                await self.feature_service.preprocess_features(application)
+            return batch_size
+
+        await self._run_case(
+            f"feature_preprocess[batch={batch_size},concurrency={concurrency}]",
+            call, concurrency
+        )
+
+    async def bench_model_predict(self, batch_size: int, concurrency: int) -> None:
+        """Time ModelService.predict on feature vectors"""
+
+        async def call(i: int) -> int:
+            offset = (i * batch_size) % (len(self.vectors) - batch_size + 1)
+            for row in self.vectors[offset:offset + batch_size]:
+                await self.model_service.predict(row.tolist())
+            return batch_size
+
+        await self._run_case(
+            f"model_predict[batch={batch_size},concurrency={concurrency}]",
+            call, concurrency
+        )
+
+    async def bench_api(self) -> None:
+        """Time the /predict and /predict/batch endpoints in-process"""
+        try:
+            import httpx
+            from app import main
+        except ImportError as e:
+            logger.warning(f"Skipping API benchmarks: {e}")
+            return
+
+        logging.getLogger().setLevel(self.args.log_level)
+        main.model_service = self.model_service
+        main.feature_service = self.feature_service
+        main.request_scheduler = RequestScheduler.from_settings(get_settings())
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for payload_kind in ("vector", "raw"):
+                for concurrency in self.concurrency_levels:
+
+                    async def predict_call(i: int, kind=payload_kind) -> int:
+                        response = await client.post("/predict", json=self._payload(kind, i))
+                        response.raise_for_status()
+                        return 1
+
+                    await self._run_case(
+                        f"api_predict_{payload_kind}[batch=1,concurrency={concurrency}]",
+                        predict_call, concurrency
+                    )
+
+                for batch_size in self.batch_sizes:
+                    if batch_size > 100:
+                        continue
+                    for concurrency in self.concurrency_levels:
+
+                        async def batch_call(i: int, kind=payload_kind, size=batch_size) -> int:
+                            body = [self._payload(kind, i * size + j) for j in range(size)]
+                            response = await client.post("/predict/batch", json=body)
+                            response.raise_for_status()
+                            return size
+
+                        await self._run_case(
+                            f"api_predict_batch_{payload_kind}[batch={batch_size},concurrency={concurrency}]",
+                            batch_call, concurrency
+                        )
+
+    def _payload(self, kind: str, i: int) -> Dict[str, Any]:
+        """Build a /predict request body"""
+        if kind == "raw":
+            return {"request_id": f"bench-{i}", "raw_features": self.applications[i % len(self.applications)]}
+        return {"request_id": f"bench-{i}", "feature_vector": self.vectors[i % len(self.vectors)].tolist()}
+
+    async def _run_case(
+        self,
+        name: str,
+        call: Callable[[int], Awaitable[int]],
+        concurrency: int
+    ) -> None:
+        """Run one case with a fixed number of calls spread over concurrent workers"""
+        for i in range(self.args.warmup):
+            await call(i)
+
+        latencies: List[float] = []
+        items = 0
+        next_call = 0
+
+        async def worker() -> None:
+            nonlocal items, next_call
+            while next_call < self.args.iterations:
+                i = next_call
+                next_call += 1
+                t0 = time.perf_counter()
+                items += await call(i)
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+        self._record(name, latencies, wall, items)
+
+    def _record(self, name: str, latencies: List[float], wall: float, items: int = None) -> None:
+        """Store and print a case summary"""
+        summary = summarize_latencies(latencies, wall, items)
+        self.results[name] = summary
+        print(
+            f"{name:<70} {summary['throughput_per_s']:>12.1f}/s "
+            f"p50={summary['p50_ms']:.3f}ms p95={summary['p95_ms']:.3f}ms p99={summary['p99_ms']:.3f}ms"
+        )
+
+
+def _parse_int_list(value: str) -> List[int]:
+    """Parse a comma-separated list of positive integers"""
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _environment_info(args: argparse.Namespace) -> Dict[str, Any]:
+    """Describe the environment the results were produced in"""
+    info = {
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'seed': args.seed,
+        'iterations': args.iterations,
+        'model': args.model_path or args.model
+    }
+    if LIGHTGBM_AVAILABLE:
+        import lightgbm
+        info['lightgbm'] = lightgbm.__version__
+    return info
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser"""
+    parser = argparse.ArgumentParser(description="Benchmark the ML inference service offline")
+    parser.add_argument("--batch-sizes", default=DEFAULT_BATCH_SIZES, help="Comma-separated batch sizes")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY, help="Comma-separated concurrency levels")
+    parser.add_argument("--iterations", type=int, default=200, help="Measured calls per case")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured warm-up calls per case")
+    parser.add_argument("--load-iterations", type=int, default=5, help="Model directory loads to time")
+    parser.add_argument("--model", choices=["lightgbm", "mock"], default="lightgbm",
+                        help="Synthetic LightGBM model or the built-in mock model")
+    parser.add_argument("--model-path", default=None, help="Benchmark an existing model directory instead")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data")
+    parser.add_argument("--output", default=None, help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="Compare results against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed relative p95/throughput regression against the baseline")
+    parser.add_argument("--log-level", default="WARNING", help="Service log level during the run")
+    return parser
+
+
+async def _main(args: argparse.Namespace) -> int:
+    logging.getLogger().setLevel(args.log_level)
+
+    with tempfile.TemporaryDirectory(prefix="ml-bench-") as workdir:
+        runner = BenchmarkRunner(args)
+        await runner.setup(Path(workdir))
+        results = await runner.run()
+
+    report = {'environment': _environment_info(args), 'results': results}
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        comparisons = compare_results(results, baseline.get('results', {}), args.tolerance)
+        report['comparison'] = {
+            'baseline': args.baseline,
+            'tolerance': args.tolerance,
+            'cases': comparisons
+        }
+
+        regressions = [c for c in comparisons if c['regressed']]
+        for c in regressions:
+            print(
+                f"REGRESSION {c['case']}: p95 {c['baseline_p95_ms']}ms -> {c['current_p95_ms']}ms, "
+                f"throughput {c['baseline_throughput_per_s']}/s -> {c['current_throughput_per_s']}/s"
+            )
+        print(f"{len(comparisons)} cases compared, {len(regressions)} regressed")
+        exit_code = 1 if regressions else 0
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    return exit_code
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    args = build_parser().parse_args(argv)
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
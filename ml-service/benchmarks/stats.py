@@ -0,0 +1,96 @@
+"""
+Latency statistics shared by the benchmark suite and load tools
+"""
+
+from typing import Dict, Any, List, Sequence
+import numpy as np
+
+
+def summarize_latencies(latencies_ms: Sequence[float], wall_time_s: float, items: int = None) -> Dict[str, Any]:
+    """
+    Summarize a set of latency samples
+
+    Args:
+        latencies_ms: Per-call latencies in milliseconds
+        wall_time_s: Wall clock time of the whole run in seconds
+        items: Number of scored items (defaults to number of calls)
+
+    Returns:
+        Dictionary with throughput and latency percentiles
+    """
+    samples = np.asarray(latencies_ms, dtype=np.float64)
+    calls = int(samples.size)
+    items = calls if items is None else int(items)
+
+    if calls == 0:
+        return {
+            'calls': 0,
+            'items': 0,
+            'wall_time_s': wall_time_s,
+            'throughput_per_s': 0.0,
+            'mean_ms': 0.0,
+            'p50_ms': 0.0,
+            'p95_ms': 0.0,
+            'p99_ms': 0.0,
+            'max_ms': 0.0
+        }
+
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        'calls': calls,
+        'items': items,
+        'wall_time_s': round(wall_time_s, 6),
+        'throughput_per_s': round(items / wall_time_s, 3) if wall_time_s > 0 else 0.0,
+        'mean_ms': round(float(samples.mean()), 4),
+        'p50_ms': round(float(p50), 4),
+        'p95_ms': round(float(p95), 4),
+        'p99_ms': round(float(p99), 4),
+        'max_ms': round(float(samples.max()), 4)
+    }
+
+
+def compare_results(
+    current: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float = 0.10
+) -> List[Dict[str, Any]]:
+    """
+    Compare benchmark results against a stored baseline
+
+    A case regresses when its p95 latency grows, or its throughput drops,
+    by more than ``tolerance`` (a fraction of the baseline value).
+
+    Returns:
+        One entry per case present in both result sets
+    """
+    comparisons = []
+    for case, result in sorted(current.items()):
+        base = baseline.get(case)
+        if not base:
+            continue
+
+        p95_change = _relative_change(result.get('p95_ms', 0.0), base.get('p95_ms', 0.0))
+        throughput_change = _relative_change(
+            result.get('throughput_per_s', 0.0), base.get('throughput_per_s', 0.0)
+        )
+        regressed = p95_change > tolerance or throughput_change < -tolerance
+
+        comparisons.append({
+            'case': case,
+            'baseline_p95_ms': base.get('p95_ms'),
+            'current_p95_ms': result.get('p95_ms'),
+            'p95_change': round(p95_change, 4),
+            'baseline_throughput_per_s': base.get('throughput_per_s'),
+            'current_throughput_per_s': result.get('throughput_per_s'),
+            'throughput_change': round(throughput_change, 4),
+            'regressed': regressed
+        })
+
+    return comparisons
+
+
+def _relative_change(current: float, baseline: float) -> float:
+    """Relative change of current against baseline"""
+    if not baseline:
+        return 0.0
+    return (current - baseline) / baseline
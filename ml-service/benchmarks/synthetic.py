@@ -0,0 +1,140 @@
+"""
+Synthetic data generation for offline benchmarks
+"""
+
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+import numpy as np
+import joblib
+
+from app.services.feature_service import FeatureService
+
+try:
+    import lightgbm as lgb
+    LIGHTGBM_AVAILABLE = True
+except ImportError:
+    LIGHTGBM_AVAILABLE = False
+    lgb = None
+
+PROVINCES = ["ON", "QC", "BC", "AB", "MB", "SK", "NS", "NB", "NL", "PE"]
+VEHICLE_MAKES = ["Honda", "Toyota", "Ford", "Chevrolet", "Hyundai", "Nissan", "Kia", "Mazda"]
+
+
+def generate_feature_vectors(n: int, seed: int = 42) -> np.ndarray:
+    """Generate feature vectors uniformly distributed within the feature bounds"""
+    rng = np.random.default_rng(seed)
+    bounds = FeatureService().feature_bounds
+    low = np.array([b[0] for b in bounds.values()], dtype=np.float64)
+    high = np.array([b[1] for b in bounds.values()], dtype=np.float64)
+    return rng.uniform(low, high, size=(n, len(bounds)))
+
+
+def generate_labels(X: np.ndarray, seed: int = 42) -> np.ndarray:
+    """Generate fraud labels with a simple risk rule plus noise"""
+    rng = np.random.default_rng(seed + 1)
+    logit = (
+        -3.0
+        + (650 - X[:, 0]) / 60.0      # credit_score
+        + (X[:, 1] - 40) / 20.0       # debt_to_income_ratio
+        + (X[:, 2] - 90) / 25.0       # loan_to_value_ratio
+        + X[:, 11] / 5.0              # recent_inquiries_6m
+    )
+    probability = 1.0 / (1.0 + np.exp(-logit))
+    return (rng.random(len(X)) < probability).astype(np.int32)
+
+
+def generate_raw_applications(n: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Generate raw application payloads shaped like the Laravel API submissions"""
+    rng = np.random.default_rng(seed)
+    current_year = date.today().year
+    applications = []
+
+    for i in range(n):
+        birth_year = int(rng.integers(current_year - 75, current_year - 19))
+        vehicle_value = float(rng.integers(5000, 90000))
+        applications.append({
+            "personal_info": {
+                "date_of_birth": f"{birth_year}-{int(rng.integers(1, 13)):02d}-{int(rng.integers(1, 29)):02d}",
+                "sin": f"{int(rng.integers(100000000, 999999999))}",
+                "province": PROVINCES[i % len(PROVINCES)],
+                "credit_score": int(rng.integers(300, 851))
+            },
+            "contact_info": {
+                "email": f"applicant{i}@example.com",
+                "phone": f"+1-416-555-{i % 10000:04d}",
+                "address": {
+                    "street": f"{int(rng.integers(1, 9999))} Main Street",
+                    "city": "Toronto",
+                    "province": PROVINCES[i % len(PROVINCES)],
+                    "postal_code": "M5V 3A8"
+                }
+            },
+            "financial_info": {
+                "annual_income": int(rng.integers(15000, 250000)),
+                "employment_status": "employed",
+                "employment_months": int(rng.integers(0, 240)),
+                "credit_history_years": int(rng.integers(0, 30)),
+                "delinquencies_24m": int(rng.integers(0, 5)),
+                "credit_utilization": float(rng.uniform(0, 100)),
+                "recent_inquiries_6m": int(rng.integers(0, 8))
+            },
+            "loan_info": {
+                "amount": float(rng.integers(5000, 80000)),
+                "term_months": int(rng.choice([36, 48, 60, 72, 84])),
+                "down_payment": float(rng.integers(0, 10000))
+            },
+            "vehicle_info": {
+                "year": int(rng.integers(current_year - 15, current_year + 1)),
+                "make": VEHICLE_MAKES[i % len(VEHICLE_MAKES)],
+                "value": vehicle_value,
+                "mileage": int(rng.integers(0, 200000))
+            },
+            "dealer_info": {
+                "dealer_id": f"DEALER{int(rng.integers(1, 200)):03d}"
+            }
+        })
+
+    return applications
+
+
+def train_synthetic_model(
+    output_dir: Path,
+    version: str = "bench",
+    n_rows: int = 20000,
+    n_estimators: int = 200,
+    seed: int = 42
+) -> Optional[Path]:
+    """
+    Train a small LightGBM model on synthetic data and save it as a joblib artifact
+
+    Returns:
+        Path to the saved artifact, or None if LightGBM is not installed
+    """
+    if not LIGHTGBM_AVAILABLE:
+        return None
+
+    X = generate_feature_vectors(n_rows, seed=seed)
+    y = generate_labels(X, seed=seed)
+
+    model = lgb.LGBMClassifier(
+        n_estimators=n_estimators,
+        num_leaves=31,
+        learning_rate=0.05,
+        random_state=seed,
+        verbose=-1
+    )
+    model.fit(X, y)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model_file = output_dir / f"{version}.joblib"
+    joblib.dump({
+        'model': model,
+        'metadata': {
+            'synthetic': True,
+            'training_rows': n_rows,
+            'n_estimators': n_estimators
+        }
+    }, model_file)
+
+    return model_file
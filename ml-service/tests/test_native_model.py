@@ -0,0 +1,78 @@
+"""
+Native model scoring against the LightGBM Booster it was flattened from
+"""
+
+import numpy as np
+import pytest
+
+lgb = pytest.importorskip("lightgbm")
+
+from app.services.native_model import (  # noqa: E402
+    MISSING_NAN, MISSING_NONE, MISSING_ZERO, NativeTreeModel, flatten_booster, load_native_model,
+    save_native_model
+)
+
+
+def _training_data(n=4000, seed=3):
+    """Features with NaNs, with many exact zeros, and with no missing values"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    X[rng.random(n) < 0.2, 0] = np.nan
+    X[rng.random(n) < 0.3, 1] = 0.0
+    logit = 1.5 * np.nan_to_num(X[:, 0], nan=1.0) + (X[:, 1] == 0) - X[:, 2] + 0.5 * X[:, 3]
+    y = (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(int)
+    return X, y
+
+
+def _scoring_data(n=2000, seed=4):
+    """Fresh rows including NaN, exact zero, negative zero and tiny values in every feature"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 4))
+    for j in range(4):
+        X[rng.random(n) < 0.1, j] = np.nan
+        X[rng.random(n) < 0.1, j] = 0.0
+        X[rng.random(n) < 0.02, j] = -0.0
+        X[rng.random(n) < 0.02, j] = 1e-40
+    return X
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["nan-missing", "zero-as-missing"])
+def booster(request):
+    X, y = _training_data()
+    params = {
+        'objective': 'binary',
+        'num_leaves': 15,
+        'learning_rate': 0.1,
+        'min_data_in_leaf': 10,
+        'zero_as_missing': request.param,
+        'verbose': -1,
+        'seed': 1
+    }
+    return lgb.train(params, lgb.Dataset(X, label=y), num_boost_round=60)
+
+
+def test_flattened_model_covers_every_missing_type(booster):
+    arrays, _ = flatten_booster(booster)
+    present = set(np.unique(arrays['missing_type']).tolist())
+    # With zero_as_missing every split treats zero (and NaN) as missing
+    expected = {MISSING_ZERO} if booster.params['zero_as_missing'] else {MISSING_NONE, MISSING_NAN}
+    assert expected <= present
+
+
+def test_predictions_match_booster_exactly(booster):
+    arrays, info = flatten_booster(booster)
+    model = NativeTreeModel(arrays, info)
+    X = _scoring_data()
+
+    np.testing.assert_array_equal(model.raw_score(X), booster.predict(X, raw_score=True))
+    np.testing.assert_array_equal(model.predict(X), booster.predict(X))
+
+
+def test_memory_mapped_artifact_matches_booster(booster, tmp_path):
+    path = tmp_path / "model.fdm"
+    save_native_model(path, booster, feature_names=[f"f{j}" for j in range(4)])
+    model = load_native_model(path)['model']
+    X = _scoring_data(seed=5)
+
+    np.testing.assert_array_equal(model.predict(X), booster.predict(X))
+    np.testing.assert_array_equal(model.predict_proba(X)[:, 1], booster.predict(X))
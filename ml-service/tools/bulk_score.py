@@ -0,0 +1,354 @@
+"""
+Score a dataset file offline with the serving model and feature pipeline
+
+Re-screening a portfolio through ``/predict/batch`` means 100 rows per
+request. This tool instead loads the model with ModelService and
+preprocesses with FeatureService in a pool of worker processes, so a file
+of any size is scored at the speed of the CPUs available.
+
+Input is CSV, JSON Lines (either optionally gzipped) or Parquet, read in
+chunks. A record is scored from, in order of preference:
+
+- a ``feature_vector`` field (15 values), as in the prediction API
+- a ``raw_features`` field, preprocessed like ``/predict``
+- all 15 feature columns, used as the feature vector
+- otherwise the record itself, preprocessed as raw features
+
+Each chunk is written to its own part file in the output directory
+(Parquet, or ``.npz`` when pyarrow is not installed) with the row number,
+request ID, fraud probability, risk tier, the error for rows that could not
+be scored (risk tier "error") and, with --contributions, the per-feature
+LightGBM contributions (raw score space, before calibration). CSV cells are
+read as numbers where they parse as one, except in the ID column, which is
+copied through as written.
+Part files are written atomically, so an interrupted run started again
+with the same arguments skips the chunks already written.
+
+Usage (from the ml-service directory):
+
+    python -m tools.bulk_score portfolio.csv.gz --output scores/ --workers 8
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.feature_service import FeatureService
+from app.services.model_service import ModelService
+from app.services.native_model import NATIVE_SUFFIX, extract_booster
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pa = None
+    pq = None
+
+MANIFEST_FILE = "manifest.json"
+
+# Scoring state of each worker process, set up once by the pool initializer
+_model_service: Optional[ModelService] = None
+_feature_service: Optional[FeatureService] = None
+_model_version: Optional[str] = None
+
+
+def _coerce(value: str) -> Any:
+    """CSV cell as a number where it parses as one (integers stay exact)"""
+    if value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def read_records(path: str, text_columns: Sequence[str] = ()) -> Iterator[Dict[str, Any]]:
+    """Yield records from a CSV, JSON Lines or Parquet file; CSV ``text_columns`` are not coerced"""
+    name = path[:-3] if path.endswith(".gz") else path
+    opener = gzip.open if path.endswith(".gz") else open
+
+    if name.endswith(".parquet"):
+        if not PYARROW_AVAILABLE:
+            raise ValueError("Reading Parquet input requires pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    elif name.endswith((".jsonl", ".ndjson")):
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    elif name.endswith(".csv"):
+        with opener(path, "rt", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                yield {
+                    key: value if key in text_columns else _coerce(value)
+                    for key, value in row.items()
+                }
+    else:
+        raise ValueError(f"Unsupported input format: {path}")
+
+
+def read_chunks(path: str, chunk_size: int, text_columns: Sequence[str] = ()) -> Iterator[List[Dict[str, Any]]]:
+    """Group the records of a file into chunks"""
+    chunk: List[Dict[str, Any]] = []
+    for record in read_records(path, text_columns):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker(model_path: str, model_version: str) -> None:
+    """Load the model once per worker process"""
+    global _model_service, _feature_service, _model_version
+    _model_service = ModelService(model_path)
+    _model_service.model_files.update(_model_service.discover_model_files())
+    _model_service.load_version_sync(_model_service.model_files[model_version])
+    _feature_service = FeatureService()
+    _model_version = model_version
+
+
+def _feature_vector(record: Dict[str, Any], feature_names: List[str]) -> List[float]:
+    """Feature vector of a record, preprocessing raw features where needed"""
+    if record.get("feature_vector") is not None:
+        features = [float(value) for value in record["feature_vector"]]
+    elif record.get("raw_features") is not None:
+        features = _feature_service.preprocess_features_sync(record["raw_features"])
+    elif all(record.get(name) is not None for name in feature_names):
+        features = [float(record[name]) for name in feature_names]
+    else:
+        features = _feature_service.preprocess_features_sync(record)
+
+    if len(features) != len(feature_names):
+        raise ValueError(f"Expected {len(feature_names)} features, got {len(features)}")
+    return features
+
+
+def score_chunk(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Score one chunk and write its part file (runs in a worker process)"""
+    start = time.perf_counter()
+    records = task['records']
+    feature_names = _model_service.feature_names
+
+    X = np.full((len(records), len(feature_names)), np.nan, dtype=np.float64)
+    valid = np.zeros(len(records), dtype=bool)
+    errors = [""] * len(records)
+    for i, record in enumerate(records):
+        try:
+            X[i] = _feature_vector(record, feature_names)
+            valid[i] = True
+        except Exception as e:
+            errors[i] = f"{type(e).__name__}: {e}"
+
+    probabilities = np.full(len(records), np.nan, dtype=np.float64)
+    if valid.any():
+        probabilities[valid] = _model_service.predict_probabilities(X[valid], _model_version)
+
+    columns: Dict[str, Any] = {
+        'row': np.arange(task['first_row'], task['first_row'] + len(records), dtype=np.int64),
+        'request_id': [str(r.get(task['id_column'], "")) for r in records],
+        'fraud_probability': probabilities,
+        'risk_tier': [
+            _model_service._get_risk_tier(p).value if ok else "error"
+            for p, ok in zip(probabilities.tolist(), valid.tolist())
+        ],
+        'error': errors
+    }
+
+    if task['contributions']:
+        booster = extract_booster(_model_service._get_model(_model_version))
+        contributions = np.full((len(records), len(feature_names) + 1), np.nan, dtype=np.float64)
+        if valid.any():
+            contributions[valid] = booster.predict(X[valid], pred_contrib=True)
+        for j, name in enumerate(feature_names):
+            columns[f"contribution_{name}"] = contributions[:, j]
+        columns['contribution_bias'] = contributions[:, -1]
+
+    _write_part(Path(task['part_path']), columns)
+    return {
+        'chunk': task['chunk'],
+        'rows': len(records),
+        'errors': int(len(records) - valid.sum()),
+        'seconds': time.perf_counter() - start
+    }
+
+
+def _write_part(path: Path, columns: Dict[str, Any]) -> None:
+    """Write a part file via a temporary file, so a partial part never looks complete"""
+    tmp = path.with_name(path.name + ".tmp")
+    if path.suffix == ".parquet":
+        pq.write_table(pa.table(columns), tmp)
+    else:
+        with open(tmp, "wb") as f:
+            np.savez(f, **{name: np.asarray(values) for name, values in columns.items()})
+    os.replace(tmp, path)
+
+
+def _check_manifest(output: Path, manifest: Dict[str, Any]) -> None:
+    """Refuse to resume into an output directory written with different settings"""
+    path = output / MANIFEST_FILE
+    if path.exists():
+        existing = json.loads(path.read_text())
+        changed = sorted(key for key in manifest if existing.get(key) != manifest[key])
+        if changed:
+            raise ValueError(f"{output} holds a run with different {', '.join(changed)}; use a new output directory")
+    else:
+        path.write_text(json.dumps(manifest, indent=2))
+
+
+def run(
+    input_path: str,
+    output: Path,
+    model_path: str,
+    model_version: Optional[str] = None,
+    chunk_size: int = 50000,
+    workers: int = 1,
+    output_format: str = "parquet",
+    contributions: bool = False,
+    id_column: str = "request_id"
+) -> Dict[str, Any]:
+    """
+    Score a file into part files under an output directory
+
+    Returns:
+        Rows scored, chunks skipped as already written, errors and rows per second
+    """
+    if output_format == "parquet" and not PYARROW_AVAILABLE:
+        raise ValueError("Parquet output requires pyarrow; use --format npz")
+
+    # Resolve "latest" once, so every worker scores with the same version
+    service = ModelService(model_path)
+    service.model_files.update(service.discover_model_files())
+    if model_version is None or model_version == "latest":
+        # Nothing is loaded here, so the latest artifact on disk (the service's ordering)
+        if not service.model_files:
+            raise ValueError(f"No model artifacts found in {model_path}")
+        model_version = max(service.model_files)
+    if model_version not in service.model_files:
+        raise ValueError(f"Model version {model_version} not found in {model_path}")
+    if contributions and service.model_files[model_version].suffix == NATIVE_SUFFIX:
+        raise ValueError("Contributions need the LightGBM model; score with its .joblib/.pkl artifact instead")
+
+    output.mkdir(parents=True, exist_ok=True)
+    input_stat = os.stat(input_path)
+    _check_manifest(output, {
+        'input': os.path.abspath(input_path),
+        'input_size': input_stat.st_size,
+        'input_mtime_ns': input_stat.st_mtime_ns,
+        'model_version': model_version,
+        'chunk_size': chunk_size,
+        'format': output_format,
+        'contributions': contributions,
+        'id_column': id_column
+    })
+
+    rows = errors = skipped = 0
+    start = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(model_path, model_version)
+    ) as pool:
+        in_flight = set()
+        first_row = 0
+        for chunk_index, records in enumerate(read_chunks(input_path, chunk_size, text_columns=(id_column,))):
+            part_path = output / f"part-{chunk_index:06d}.{output_format}"
+            chunk_rows = len(records)
+            if part_path.exists():
+                skipped += 1
+            else:
+                # Bound the chunks held in memory at once
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        rows += result['rows']
+                        errors += result['errors']
+                in_flight.add(pool.submit(score_chunk, {
+                    'chunk': chunk_index,
+                    'first_row': first_row,
+                    'records': records,
+                    'part_path': str(part_path),
+                    'contributions': contributions,
+                    'id_column': id_column
+                }))
+            first_row += chunk_rows
+
+        for future in in_flight:
+            result = future.result()
+            rows += result['rows']
+            errors += result['errors']
+
+    wall_time = time.perf_counter() - start
+    return {
+        'model_version': model_version,
+        'rows_scored': rows,
+        'rows_total': first_row,
+        'chunks_skipped': skipped,
+        'errors': errors,
+        'workers': workers,
+        'wall_time_s': round(wall_time, 3),
+        'rows_per_s': round(rows / wall_time, 1) if wall_time > 0 else 0.0
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser"""
+    parser = argparse.ArgumentParser(description="Score a dataset file offline with the serving model")
+    parser.add_argument("input", help="Input file (.csv, .jsonl or .parquet; .csv and .jsonl may be gzipped)")
+    parser.add_argument("--output", required=True, help="Output directory for part files")
+    parser.add_argument("--model-path", default="models/", help="Model directory")
+    parser.add_argument("--model-version", default=None, help="Model version to score with (latest if omitted)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Rows per chunk and part file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Scoring processes")
+    parser.add_argument(
+        "--format", choices=["parquet", "npz"], default="parquet" if PYARROW_AVAILABLE else "npz",
+        help="Part file format"
+    )
+    parser.add_argument("--contributions", action="store_true", help="Add per-feature contributions")
+    parser.add_argument("--id-column", default="request_id", help="Record field copied to the output")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    args = build_parser().parse_args(argv)
+    report = run(
+        args.input,
+        Path(args.output),
+        args.model_path,
+        model_version=args.model_version,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        output_format=args.format,
+        contributions=args.contributions,
+        id_column=args.id_column
+    )
+    print(
+        f"Scored {report['rows_scored']} of {report['rows_total']} rows with model {report['model_version']} "
+        f"in {report['wall_time_s']}s ({report['rows_per_s']:.0f} rows/s, {report['workers']} workers); "
+        f"{report['chunks_skipped']} chunks already written, {report['errors']} rows failed"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Convert pickled/joblib'd LightGBM models to the native .fdm artifact format
+
+The output keeps the feature schema, calibration table and metadata of the
+source artifact and can be dropped into the model directory next to (or
+instead of) the original; ModelService prefers the .fdm file for a version.
+With --verify the converted file is loaded back and scored against the
+original model on synthetic feature vectors, including missing and zero
+values, and the run fails if any score differs by more than --tolerance.
+
+Usage (from the ml-service directory):
+
+    python -m tools.convert_model models/v1.2.0.joblib --verify
+"""
+
+import argparse
+import hashlib
+import pickle
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+
+from app.services.calibration import load_calibration
+from app.services.native_model import NATIVE_SUFFIX, extract_booster, load_native_model, save_native_model
+from benchmarks.synthetic import generate_feature_vectors
+
+
+def load_source(path: Path) -> Dict[str, Any]:
+    """Load a .pkl/.joblib artifact into the dict form used by ModelService"""
+    if path.suffix == '.pkl':
+        with open(path, 'rb') as f:
+            model_data = pickle.load(f)
+    elif path.suffix == '.joblib':
+        model_data = joblib.load(path)
+    else:
+        raise ValueError(f"Unsupported model file format: {path.suffix}")
+
+    if not isinstance(model_data, dict):
+        model_data = {'model': model_data}
+    if model_data.get('model') is None:
+        raise ValueError("No model found in file")
+    return model_data
+
+
+def convert(source: Path, output: Path) -> Dict[str, Any]:
+    """Write the native artifact for a source model and return its header"""
+    model_data = load_source(source)
+    model = model_data['model']
+    calibration = load_calibration(model_data)
+
+    with open(source, 'rb') as f:
+        source_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+    metadata = {
+        **model_data.get('metadata', {}),
+        'converted_from': source.name,
+        'source_sha256': source_sha256,
+        'converted_at': time.time()
+    }
+
+    return save_native_model(
+        output,
+        extract_booster(model),
+        feature_names=model_data.get('feature_names'),
+        calibration=calibration.to_dict() if calibration is not None else None,
+        metadata=metadata,
+        feature_importance=getattr(model, 'feature_importances_', None)
+    )
+
+
+def verify(source: Path, output: Path, rows: int, seed: int) -> Dict[str, Any]:
+    """Score synthetic rows with the original and the converted model and compare"""
+    original = load_source(source)['model']
+    native = load_native_model(output)['model']
+
+    X = generate_feature_vectors(rows, seed=seed)
+    # Exercise the missing-value and zero branches of every split
+    rng = np.random.default_rng(seed + 1)
+    X[rng.random(X.shape) < 0.02] = np.nan
+    X[rng.random(X.shape) < 0.02] = 0.0
+
+    if hasattr(original, 'predict_proba'):
+        expected = np.asarray(original.predict_proba(X))[:, 1]
+    else:
+        expected = np.asarray(original.predict(X), dtype=np.float64).reshape(-1)
+    actual = native.predict(X)
+
+    difference = np.abs(expected - actual)
+    return {
+        'rows': rows,
+        'max_abs_diff': float(difference.max()) if rows else 0.0,
+        'exact_matches': int(np.count_nonzero(difference == 0.0)),
+        'original_ms_per_row': _time_per_row(original, X, 'predict_proba' if hasattr(original, 'predict_proba') else 'predict'),
+        'native_ms_per_row': _time_per_row(native, X, 'predict')
+    }
+
+
+def _time_per_row(model: Any, X: np.ndarray, method: str) -> float:
+    """Wall time per row of one batch prediction, in milliseconds"""
+    start = time.perf_counter()
+    getattr(model, method)(X)
+    return (time.perf_counter() - start) * 1000 / max(len(X), 1)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser"""
+    parser = argparse.ArgumentParser(description="Convert a LightGBM model artifact to the native .fdm format")
+    parser.add_argument("source", help="Source model file (.joblib or .pkl)")
+    parser.add_argument("--output", default=None, help="Output file (defaults to the source name with .fdm)")
+    parser.add_argument("--verify", action="store_true", help="Check the converted model scores identically")
+    parser.add_argument("--verify-rows", type=int, default=10000, help="Synthetic rows to score when verifying")
+    parser.add_argument("--tolerance", type=float, default=1e-12, help="Maximum allowed absolute score difference")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for verification data")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    args = build_parser().parse_args(argv)
+    source = Path(args.source)
+    output = Path(args.output) if args.output else source.with_suffix(NATIVE_SUFFIX)
+
+    header = convert(source, output)
+    print(
+        f"Converted {source} -> {output} ({output.stat().st_size / 1024:.1f} KB, "
+        f"{header['num_trees']} trees, {header['num_leaves']} leaves, "
+        f"calibrated={header['calibration'] is not None})"
+    )
+
+    if args.verify:
+        report = verify(source, output, args.verify_rows, args.seed)
+        print(
+            f"Verified {report['rows']} rows: max abs diff {report['max_abs_diff']:.3g}, "
+            f"{report['exact_matches']} exact matches, "
+            f"{report['original_ms_per_row']:.4f}ms/row original vs {report['native_ms_per_row']:.4f}ms/row native"
+        )
+        if report['max_abs_diff'] > args.tolerance:
+            print(f"Verification failed: difference exceeds tolerance {args.tolerance}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Replay captured traffic against an ML service instance
+
+Reads a capture file written by the service's traffic capture mode and
+re-issues each request at its recorded arrival offset, divided by the
+replay speed. Requests are sent the way the Laravel FraudDetectionJob sends
+them (JSON body, optional X-API-Key header, per-request timeout, retries on
+failure), so the run approximates the production caller.
+
+Usage (from the ml-service directory):
+
+    python -m tools.replay_traffic captures/traffic.jsonl.gz --target http://localhost:8000 --speed 4
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.stats import summarize_latencies
+
+
+def read_capture(path: str) -> Iterator[Tuple[float, str, Any]]:
+    """
+    Yield (offset_seconds, endpoint, payload) from a capture file
+
+    Offsets restart at zero in every capture segment; segments are laid end
+    to end so the replay keeps the recorded spacing within each segment.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    base = 0.0
+    last = 0.0
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "segment_start" in record:
+                base = last
+                continue
+            offset = base + float(record["t"])
+            last = offset
+            yield offset, record["e"], record["p"]
+
+
+class TrafficReplayer:
+    """Replays captured requests and collects latency and error statistics"""
+
+    def __init__(
+        self,
+        target: str,
+        speed: float = 1.0,
+        timeout: float = 30.0,
+        retries: int = 0,
+        api_key: Optional[str] = None,
+        max_in_flight: int = 1000
+    ):
+        self.target = target.rstrip("/")
+        self.speed = speed
+        self.timeout = timeout
+        self.retries = retries
+        self.headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if api_key:
+            self.headers["X-API-Key"] = api_key
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.items: Counter = Counter()
+        self.status_counts: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+        self.retry_count = 0
+        self.max_schedule_lag_ms = 0.0
+
+    async def replay(self, records: Iterator[Tuple[float, str, Any]], limit: Optional[int] = None) -> float:
+        """Replay records on their recorded schedule; returns wall time in seconds"""
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+        async with httpx.AsyncClient(base_url=self.target, timeout=self.timeout, limits=limits) as client:
+            tasks = []
+            start = time.perf_counter()
+
+            for i, (offset, endpoint, payload) in enumerate(records):
+                if limit is not None and i >= limit:
+                    break
+
+                due = offset / self.speed
+                delay = due - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    self.max_schedule_lag_ms = max(self.max_schedule_lag_ms, -delay * 1000)
+
+                await self._in_flight.acquire()
+                tasks.append(asyncio.create_task(self._send(client, endpoint, payload)))
+
+            await asyncio.gather(*tasks)
+            return time.perf_counter() - start
+
+    async def _send(self, client: httpx.AsyncClient, endpoint: str, payload: Any) -> None:
+        """Send one request, retrying like the queue job does"""
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    self.retry_count += 1
+
+                t0 = time.perf_counter()
+                try:
+                    response = await client.post(endpoint, json=payload, headers=self.headers)
+                except httpx.TimeoutException:
+                    self.errors[f"{endpoint} timeout"] += 1
+                    continue
+                except httpx.HTTPError as e:
+                    self.errors[f"{endpoint} {type(e).__name__}"] += 1
+                    continue
+
+                self.latencies[endpoint].append((time.perf_counter() - t0) * 1000)
+                self.status_counts[endpoint][str(response.status_code)] += 1
+                if response.is_success:
+                    self.items[endpoint] += len(payload) if isinstance(payload, list) else 1
+                    return
+        finally:
+            self._in_flight.release()
+
+    def report(self, wall_time: float) -> Dict[str, Any]:
+        """Build the replay report"""
+        endpoints = {}
+        # An endpoint whose every request failed in transport has errors but no latencies
+        names = set(self.latencies) | {key.rsplit(" ", 1)[0] for key in self.errors}
+        for endpoint in sorted(names):
+            samples = self.latencies.get(endpoint, [])
+            statuses = self.status_counts.get(endpoint, Counter())
+            total = sum(statuses.values()) + sum(
+                count for key, count in self.errors.items() if key.startswith(f"{endpoint} ")
+            )
+            failed = total - sum(count for status, count in statuses.items() if status.startswith("2"))
+            summary = summarize_latencies(samples, wall_time, self.items[endpoint])
+            summary['status_counts'] = dict(statuses)
+            summary['error_rate'] = round(failed / total, 6) if total else 0.0
+            endpoints[endpoint] = summary
+
+        return {
+            'target': self.target,
+            'speed': self.speed,
+            'wall_time_s': round(wall_time, 3),
+            'retries': self.retry_count,
+            'transport_errors': dict(self.errors),
+            'max_schedule_lag_ms': round(self.max_schedule_lag_ms, 3),
+            'endpoints': endpoints
+        }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser"""
+    parser = argparse.ArgumentParser(description="Replay captured ML service traffic")
+    parser.add_argument("capture", help="Capture file (.jsonl or .jsonl.gz)")
+    parser.add_argument("--target", default="http://localhost:8000", help="Base URL of the service")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay rate multiplier (1 = recorded rate)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--retries", type=int, default=0, help="Retries after a failed request")
+    parser.add_argument("--api-key", default=None, help="Value for the X-API-Key header")
+    parser.add_argument("--limit", type=int, default=None, help="Replay at most this many requests")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Cap on concurrent requests")
+    parser.add_argument("--output", default=None, help="Write the report to this JSON file")
+    return parser
+
+
+async def _main(args: argparse.Namespace) -> int:
+    replayer = TrafficReplayer(
+        target=args.target,
+        speed=args.speed,
+        timeout=args.timeout,
+        retries=args.retries,
+        api_key=args.api_key,
+        max_in_flight=args.max_in_flight
+    )
+    wall_time = await replayer.replay(read_capture(args.capture), limit=args.limit)
+    report = replayer.report(wall_time)
+
+    for endpoint, summary in report['endpoints'].items():
+        print(
+            f"{endpoint:<16} {summary['calls']:>8} calls {summary['throughput_per_s']:>10.1f} items/s "
+            f"p50={summary['p50_ms']:.1f}ms p95={summary['p95_ms']:.1f}ms p99={summary['p99_ms']:.1f}ms "
+            f"errors={summary['error_rate']:.2%}"
+        )
+    if report['transport_errors']:
+        print(f"Transport errors: {report['transport_errors']}")
+    print(f"Replayed at {args.speed}x in {report['wall_time_s']}s (max schedule lag {report['max_schedule_lag_ms']}ms)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    args = build_parser().parse_args(argv)
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,7 @@ FastAPI ML Training Service for Fraud Detection
 Provides machine learning model training capabilities
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
@@ -16,8 +16,12 @@ from contextlib import asynccontextmanager
 from .models.requests import TrainingJobRequest, DatasetUploadRequest
 from .models.responses import TrainingJobResponse, DatasetResponse, TrainingStatusResponse
 from .services.training_service import TrainingService
-from .services.dataset_service import DatasetService
+from .services.dataset_service import (
+    DatasetService, DatasetTooLargeError, DatasetValidationError, MultipartFileStream
+)
+from .services.job_queue import TrainingJobQueue, TrainingWorkerPool
 from .utils.config import get_settings
+from .utils.database import close_database, get_database_stats, is_process_local
 from .utils.logging_config import setup_logging
 
 # Setup logging
@@ -27,24 +31,42 @@ logger = logging.getLogger(__name__)
 # Global service instances
 training_service: Optional[TrainingService] = None
 dataset_service: Optional[DatasetService] = None
+worker_pool: Optional[TrainingWorkerPool] = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager for startup and shutdown events"""
-    global training_service, dataset_service
+    global training_service, dataset_service, worker_pool
     
     logger.info("Starting ML Training Service...")
     
     try:
         # Initialize services
         settings = get_settings()
+        if is_process_local(settings.database_url):
+            # Training workers run in their own processes and would each open an empty database
+            raise ValueError("DATABASE_URL sqlite://:memory: cannot be shared with training workers; use sqlite:///path")
         training_service = TrainingService(settings)
-        dataset_service = DatasetService(settings)
+        dataset_service = DatasetService(settings, feature_names=training_service.feature_names)
         
         # Initialize services
         await training_service.initialize()
         await dataset_service.initialize()
         
+        # Training runs in separate worker processes, never on this event loop
+        worker_pool = TrainingWorkerPool(
+            TrainingJobQueue(settings.job_queue_path),
+            max_concurrent_jobs=settings.training_max_concurrent_jobs,
+            threads_per_job=settings.training_threads_per_job,
+            cpu_count=settings.get_cpu_count(),
+            poll_interval=settings.job_queue_poll_interval,
+            cancel_grace_period=settings.training_cancel_grace_period,
+            max_attempts=settings.training_max_attempts,
+            on_job_crashed=training_service.mark_job_failed
+        )
+        training_service.worker_pool = worker_pool
+        await worker_pool.start()
+        
         logger.info("ML Training Service initialized successfully")
         
         yield
@@ -54,10 +76,13 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         logger.info("Shutting down ML Training Service...")
+        if worker_pool:
+            await worker_pool.stop()
         if training_service:
             await training_service.cleanup()
         if dataset_service:
             await dataset_service.cleanup()
+        await close_database()
 
 # Create FastAPI app
 app = FastAPI(
@@ -88,6 +113,12 @@ def get_dataset_service() -> DatasetService:
         raise HTTPException(status_code=503, detail="Dataset service not initialized")
     return dataset_service
 
+def get_worker_pool() -> TrainingWorkerPool:
+    """Dependency to get training worker pool instance"""
+    if worker_pool is None:
+        raise HTTPException(status_code=503, detail="Training worker pool not initialized")
+    return worker_pool
+
 @app.get("/", response_model=Dict[str, str])
 async def root():
     """Root endpoint"""
@@ -107,26 +138,50 @@ async def health_check():
             "version": "1.0.0",
             "services": {
                 "training": "healthy" if training_service else "unhealthy",
-                "dataset": "healthy" if dataset_service else "unhealthy"
+                "dataset": "healthy" if dataset_service else "unhealthy",
+                "worker_pool": "healthy" if worker_pool else "unhealthy"
             }
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail=f"Service unhealthy: {str(e)}")
 
+@app.get("/metrics")
+async def get_metrics():
+    """Database pool and training worker metrics"""
+    return {
+        "database": get_database_stats(),
+        "dataset_cache": training_service.dataset_cache.get_stats()
+        if training_service and training_service.dataset_cache else None,
+        "worker_pool": worker_pool.get_stats() if worker_pool else None
+    }
+
 # Dataset Management Endpoints
 
 @app.post("/datasets/upload", response_model=DatasetResponse)
 async def upload_dataset(
+    request: Request,
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
     name: str = None,
     description: str = None
 ):
-    """Upload a training dataset"""
+    """
+    Upload a training dataset (multipart field "file")
+    
+    The body is read as it arrives rather than spooled first, so oversized
+    or malformed uploads are rejected before the client finishes sending.
+    """
     try:
         dataset_svc = get_dataset_service()
         
+        # Declared size over the limit: reject before reading anything
+        content_length = request.headers.get('content-length')
+        if content_length and content_length.isdigit() and int(content_length) > dataset_svc.max_upload_size + 64 * 1024:
+            raise DatasetTooLargeError(f"Upload exceeds the maximum size of {dataset_svc.max_upload_size} bytes")
+        
+        file = MultipartFileStream(request.stream(), request.headers.get('content-type'))
+        await file.open()
+        
         # Validate file
         if not file.filename.endswith(('.csv', '.json')):
             raise HTTPException(status_code=400, detail="Only CSV and JSON files are supported")
@@ -138,11 +193,18 @@ async def upload_dataset(
             file=file
         )
         
-        # Process dataset in background
-        background_tasks.add_task(dataset_svc.process_dataset, dataset.id)
+        # Process dataset in background, then convert it to the columnar cache
+        background_tasks.add_task(dataset_svc.process_dataset, dataset['id'])
+        background_tasks.add_task(get_training_service().cache_dataset, dataset['id'])
         
         return DatasetResponse.from_dataset(dataset)
         
+    except HTTPException:
+        raise
+    except DatasetTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except DatasetValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Dataset upload failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -180,19 +242,16 @@ async def get_dataset(dataset_id: int):
 # Training Job Endpoints
 
 @app.post("/training/jobs", response_model=TrainingJobResponse)
-async def create_training_job(
-    request: TrainingJobRequest,
-    background_tasks: BackgroundTasks
-):
-    """Create and start a new training job"""
+async def create_training_job(request: TrainingJobRequest):
+    """Create a new training job and queue it for the worker pool"""
     try:
         training_svc = get_training_service()
         
         # Create training job
         job = await training_svc.create_training_job(request)
         
-        # Start training in background
-        background_tasks.add_task(training_svc.run_training_job, job.job_id)
+        # Queue for a worker process
+        get_worker_pool().submit(job['job_id'])
         
         return TrainingJobResponse.from_job(job)
         
@@ -251,6 +310,11 @@ async def cancel_training_job(job_id: str):
         logger.error(f"Failed to cancel training job: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/training/workers")
+async def get_training_workers():
+    """Get training worker pool and queue statistics"""
+    return get_worker_pool().get_stats()
+
 # Model Management Endpoints
 
 @app.get("/models")
@@ -14,8 +14,20 @@ class TrainingJobRequest(BaseModel):
     preset: Optional[str] = Field("balanced", description="Training preset: fast, balanced, or thorough")
     cv_folds: Optional[int] = Field(5, description="Number of cross-validation folds")
     test_size: Optional[float] = Field(0.2, description="Proportion of data to use for testing")
+    calibration_size: Optional[float] = Field(0.1, description="Proportion of training data held out to fit probability calibration (0 disables)")
     random_state: Optional[int] = Field(42, description="Random state for reproducibility")
     hyperparameters: Optional[Dict[str, Any]] = Field({}, description="Custom hyperparameters")
+    job_type: Optional[str] = Field("train", description="Job type: train, or search (hyperparameter search, then train the best configuration)")
+    search: Optional[Dict[str, Any]] = Field({}, description="Search options: n_candidates, eta, min_rounds, max_rounds, cpu_time_budget_s, seed")
+    base_model_id: Optional[str] = Field(None, description="Registered model to warm-start from instead of training from scratch")
+    warm_start_mode: Optional[str] = Field("boost", description="Warm start mode: boost (add rounds via init_model) or refit (refit leaf values)")
+    warm_start_rounds: Optional[int] = Field(100, description="Additional boosting rounds in boost mode")
+    refit_decay_rate: Optional[float] = Field(0.9, description="Weight of the old leaf values in refit mode")
+    min_holdout_improvement: Optional[float] = Field(0.0, description="Holdout AUC gain over the base model required to accept a warm-start update")
+    out_of_core: Optional[bool] = Field(False, description="Stream the dataset from disk in batches instead of loading it into memory")
+    negative_sample_rate: Optional[float] = Field(1.0, description="Fraction of non-fraud training rows kept; kept rows are weighted by its inverse (1 disables)")
+    downsample_strata: Optional[List[str]] = Field([], description="Dataset columns (e.g. month, segment) within which negatives are sampled at the same rate")
+    compare_full_data: Optional[bool] = Field(False, description="Also train on all rows and report the speedup and metric difference of downsampling")
     created_by: Optional[str] = Field(None, description="User who created the job")
 
 
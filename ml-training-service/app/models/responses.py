@@ -0,0 +1,62 @@
+"""
+Response models for the training service
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+
+class DatasetResponse(BaseModel):
+    """Response model for a training dataset"""
+    id: int = Field(..., description="Dataset ID")
+    name: str = Field(..., description="Name of the dataset")
+    version: str = Field(..., description="Dataset version")
+    description: Optional[str] = Field(None, description="Description of the dataset")
+    file_type: str = Field(..., description="File type: csv or json")
+    file_size: int = Field(..., description="File size in bytes")
+    record_count: int = Field(0, description="Number of records")
+    status: str = Field(..., description="Dataset status: uploading, processing, ready or error")
+    metadata: Optional[Dict[str, Any]] = Field(None, description="Upload statistics: content hash, column null counts, label balance")
+    quality_metrics: Optional[Dict[str, Any]] = Field(None, description="Data quality metrics")
+    error_message: Optional[str] = Field(None, description="Processing error, if any")
+    uploaded_by: Optional[str] = Field(None, description="User who uploaded the dataset")
+    created_at: Optional[datetime] = Field(None, description="Upload time")
+
+    @classmethod
+    def from_dataset(cls, dataset: Dict[str, Any]) -> "DatasetResponse":
+        """Build from a training_datasets row"""
+        return cls(**{name: dataset.get(name) for name in cls.model_fields if name in dataset})
+
+
+class TrainingJobResponse(BaseModel):
+    """Response model for a training job"""
+    job_id: str = Field(..., description="Training job ID")
+    dataset_id: int = Field(..., description="ID of the dataset used for training")
+    name: str = Field(..., description="Name of the training job")
+    description: Optional[str] = Field(None, description="Description of the training job")
+    status: str = Field(..., description="Job status: queued, running, completed, failed or cancelled")
+    config: Optional[Dict[str, Any]] = Field(None, description="Training configuration")
+    created_by: Optional[str] = Field(None, description="User who created the job")
+    created_at: Optional[datetime] = Field(None, description="Creation time")
+
+    @classmethod
+    def from_job(cls, job: Dict[str, Any]) -> "TrainingJobResponse":
+        """Build from a training_jobs row"""
+        return cls(**{name: job.get(name) for name in cls.model_fields if name in job})
+
+
+class TrainingStatusResponse(BaseModel):
+    """Response model for training job status and progress"""
+    job_id: str = Field(..., description="Training job ID")
+    status: str = Field(..., description="Job status: queued, running, completed, failed or cancelled")
+    progress: int = Field(0, description="Progress percentage (0-100)")
+    status_message: Optional[str] = Field(None, description="Latest status message")
+    metrics: Optional[Dict[str, Any]] = Field(None, description="Training metrics once completed")
+    model_path: Optional[str] = Field(None, description="Path of the saved model")
+    updated_at: Optional[datetime] = Field(None, description="Last update time")
+
+    @classmethod
+    def from_job(cls, job: Dict[str, Any]) -> "TrainingStatusResponse":
+        """Build from a training_jobs row"""
+        return cls(**{name: job.get(name) for name in cls.model_fields if name in job})
@@ -0,0 +1,104 @@
+"""
+Periodic training checkpoints
+
+While a job boosts, a LightGBM callback writes the model every N
+iterations or T seconds, whichever comes first, to
+``<checkpoint_path>/<job_id>/``. Writes go to a temporary file that is
+then renamed, so a worker killed mid-write leaves the previous checkpoint
+intact. A job that is run again after its worker died resumes from the
+latest checkpoint; checkpoints are removed when the job finishes.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import lightgbm as lgb
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "checkpoint.txt"
+META_FILE = "checkpoint.json"
+
+
+class TrainingCheckpoints:
+    """Writes, loads and removes per-job model checkpoints"""
+
+    def __init__(self, checkpoint_path: str, interval_iterations: int = 100, interval_seconds: float = 300.0):
+        self.checkpoint_path = Path(checkpoint_path)
+        self.interval_iterations = interval_iterations
+        self.interval_seconds = interval_seconds
+        self.checkpoint_path.mkdir(parents=True, exist_ok=True)
+
+    def _job_dir(self, job_id: str) -> Path:
+        return self.checkpoint_path / job_id
+
+    def callback(self, job_id: str, rounds_done: int = 0) -> Callable:
+        """
+        LightGBM callback checkpointing a job's booster
+
+        Args:
+            job_id: Training job ID
+            rounds_done: Rounds already trained before this run (when resuming)
+        """
+        job_dir = self._job_dir(job_id)
+        job_dir.mkdir(parents=True, exist_ok=True)
+        state = {'last_iteration': 0, 'last_time': time.monotonic()}
+
+        def _callback(env):
+            iteration = env.iteration - env.begin_iteration + 1
+            due_iterations = iteration - state['last_iteration'] >= self.interval_iterations
+            due_time = time.monotonic() - state['last_time'] >= self.interval_seconds
+            if not (due_iterations or due_time) or iteration == env.end_iteration - env.begin_iteration:
+                # The finished model is saved by the job itself
+                return
+
+            self._write(job_dir, env.model, {
+                'job_id': job_id,
+                'rounds_done': rounds_done + iteration,
+                'total_iterations': env.model.current_iteration(),
+                'written_at': time.time()
+            })
+            state['last_iteration'] = iteration
+            state['last_time'] = time.monotonic()
+
+        return _callback
+
+    def _write(self, job_dir: Path, booster: lgb.Booster, meta: Dict[str, Any]) -> None:
+        start = time.perf_counter()
+        model_tmp = job_dir / (MODEL_FILE + ".tmp")
+        meta_tmp = job_dir / (META_FILE + ".tmp")
+
+        booster.save_model(str(model_tmp))
+        meta_tmp.write_text(json.dumps(meta))
+        # Model first: the metadata never points at rounds the model file lacks
+        os.replace(model_tmp, job_dir / MODEL_FILE)
+        os.replace(meta_tmp, job_dir / META_FILE)
+
+        logger.info(
+            f"Checkpointed job {meta['job_id']} at {meta['rounds_done']} rounds "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    def load(self, job_id: str) -> Optional[Tuple[lgb.Booster, Dict[str, Any]]]:
+        """Latest checkpoint of a job, if any"""
+        job_dir = self._job_dir(job_id)
+        try:
+            meta = json.loads((job_dir / META_FILE).read_text())
+            booster = lgb.Booster(model_file=str(job_dir / MODEL_FILE))
+        except (OSError, ValueError, lgb.basic.LightGBMError) as e:
+            if job_dir.exists():
+                logger.warning(f"Ignoring unreadable checkpoint of job {job_id}: {e}")
+            return None
+
+        # The model file is replaced first, so it may hold a few rounds more than the metadata says
+        meta['rounds_done'] += booster.current_iteration() - meta['total_iterations']
+        return booster, meta
+
+    def remove(self, job_id: str) -> None:
+        """Delete a job's checkpoints"""
+        shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
@@ -0,0 +1,360 @@
+"""
+Columnar cache of parsed datasets
+
+Uploaded CSV/JSON files are parsed once and stored as one ``.npy`` file
+per column under a directory named after the SHA-256 of the source file.
+Loading maps the column files read-only instead of parsing text again.
+Sources are parsed ``chunk_rows`` rows at a time and each column is
+assembled on disk, so building an entry needs memory for one chunk, not
+the whole file (JSON arrays, which have no row boundaries to stream on,
+are the exception; JSON Lines files are chunked like CSV).
+
+A small per-source index remembers the size, mtime and hash of each source
+file, so an unchanged file is not re-hashed on every load. When the size
+or mtime changes the file is hashed again; a different hash (or a cache
+entry that is incomplete or from an older format) triggers a rebuild, and
+the entry of the old contents is deleted unless another source still has
+those contents.
+
+Builds of the same contents are serialized with a per-hash lock file, so the
+background conversion after an upload and a training job that needs the
+entry at the same time parse the file once; the second waits and then uses
+the first one's entry.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_content_hash(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _column_array(series: pd.Series) -> np.ndarray:
+    """Column as an array np.load can map (no pickled objects)"""
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        return series.fillna('').astype(str).to_numpy(dtype=str)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.astype(str).to_numpy(dtype=str)
+    if pd.api.types.is_bool_dtype(series.dtype) and series.isna().any():
+        return series.astype(float).to_numpy()
+    return series.to_numpy()
+
+
+def _common_dtype(dtypes: List[np.dtype]) -> np.dtype:
+    """dtype a column's chunks are combined into (chunks may infer different types)"""
+    strings = [d for d in dtypes if d.kind == 'U']
+    if not strings:
+        return np.result_type(*dtypes)
+    if len(strings) == len(dtypes):
+        return max(strings, key=lambda d: d.itemsize)
+    # Numbers in an otherwise textual column are kept as text
+    return np.dtype(f"<U{max(32, max(d.itemsize // 4 for d in strings))}")
+
+
+def is_json_lines(path: str) -> bool:
+    """Whether a JSON file holds one record per line rather than a single array"""
+    with open(path, 'rb') as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped:
+                return stripped.startswith(b'{')
+    return False
+
+
+def build_entry(cache_path: str, chunk_rows: int, source_path: str, file_type: str) -> Dict[str, Any]:
+    """Build a source's cache entry; a picklable entry point for a separate process"""
+    return DatasetCache(cache_path, chunk_rows=chunk_rows).ensure(source_path, file_type)
+
+
+class DatasetCache:
+    """Content-addressed columnar cache of parsed dataset files"""
+
+    def __init__(self, cache_path: str, chunk_rows: int = 100000):
+        self.cache_path = Path(cache_path)
+        self.chunk_rows = chunk_rows
+        self.sources_path = self.cache_path / "sources"
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self.sources_path.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.builds = 0
+        self.stale_rebuilds = 0
+
+    def ensure(self, source_path: str, file_type: str) -> Dict[str, Any]:
+        """
+        Make sure an up-to-date cache entry exists for a source file
+
+        Returns:
+            The entry's manifest
+        """
+        content_hash = self._source_hash(source_path)
+        manifest = self._read_manifest(content_hash)
+        if manifest is not None:
+            self.hits += 1
+            return manifest
+
+        with self._build_lock(content_hash):
+            # Another process may have built the entry while this one waited for the lock
+            manifest = self._read_manifest(content_hash)
+            if manifest is not None:
+                self.hits += 1
+                return manifest
+
+            previous_hash = self._previous_hash(source_path, content_hash)
+            if previous_hash:
+                self.stale_rebuilds += 1
+                logger.info(f"Dataset cache for {source_path} is stale, rebuilding")
+
+            manifest = self._build(source_path, file_type, content_hash)
+        if previous_hash:
+            self._remove_unused_entry(previous_hash)
+        return manifest
+
+    def load(self, source_path: str, file_type: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load a dataset through the cache, building the entry first if needed"""
+        manifest = self.ensure(source_path, file_type)
+        entry_path = self.entry_path(manifest)
+
+        start = time.perf_counter()
+        wanted = columns or [c['name'] for c in manifest['columns']]
+        by_name = {c['name']: c for c in manifest['columns']}
+        missing = [name for name in wanted if name not in by_name]
+        if missing:
+            raise ValueError(f"Dataset {source_path} has no columns {missing}")
+
+        data = {
+            name: np.load(entry_path / by_name[name]['file'], mmap_mode='r', allow_pickle=False)
+            for name in wanted
+        }
+        frame = pd.DataFrame(data, copy=False)
+
+        logger.info(
+            f"Loaded {manifest['rows']} rows x {len(wanted)} columns of {source_path} "
+            f"from cache in {time.perf_counter() - start:.2f}s"
+        )
+        return frame
+
+    def entry_path(self, manifest: Dict[str, Any]) -> Path:
+        """Directory holding an entry's column files"""
+        return self.cache_path / manifest['content_hash']
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache usage counters"""
+        return {
+            'cache_path': str(self.cache_path),
+            'hits': self.hits,
+            'builds': self.builds,
+            'stale_rebuilds': self.stale_rebuilds
+        }
+
+    def _source_hash(self, source_path: str) -> str:
+        """Content hash of a source file, re-hashed only when its size or mtime changed"""
+        stat = os.stat(source_path)
+        index_file = self._index_file(source_path)
+
+        if index_file.exists():
+            try:
+                index = json.loads(index_file.read_text())
+                if index['size'] == stat.st_size and index['mtime_ns'] == stat.st_mtime_ns:
+                    return index['content_hash']
+            except (ValueError, KeyError):
+                pass
+
+        content_hash = file_content_hash(source_path)
+        self._write_json(index_file, {
+            'source_path': os.path.abspath(source_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'content_hash': content_hash,
+            'previous_hash': self._indexed_hash(index_file)
+        })
+        return content_hash
+
+    def _previous_hash(self, source_path: str, content_hash: str) -> Optional[str]:
+        """Hash the source was cached under before its contents changed, if any"""
+        try:
+            index = json.loads(self._index_file(source_path).read_text())
+        except (OSError, ValueError):
+            return None
+        previous = index.get('previous_hash')
+        return previous if previous and previous != content_hash else None
+
+    def _remove_unused_entry(self, content_hash: str) -> None:
+        """Delete a stale entry unless another indexed source has the same contents"""
+        for index_file in self.sources_path.glob("*.json"):
+            if self._indexed_hash(index_file) == content_hash:
+                return
+        shutil.rmtree(self.cache_path / content_hash, ignore_errors=True)
+        (self.cache_path / f".{content_hash}.lock").unlink(missing_ok=True)
+        logger.info(f"Removed stale dataset cache entry {content_hash[:12]}")
+
+    def _indexed_hash(self, index_file: Path) -> Optional[str]:
+        try:
+            return json.loads(index_file.read_text()).get('content_hash')
+        except (OSError, ValueError):
+            return None
+
+    def _index_file(self, source_path: str) -> Path:
+        key = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()
+        return self.sources_path / f"{key}.json"
+
+    def _read_manifest(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Manifest of a complete, current-format entry"""
+        entry_path = self.cache_path / content_hash
+        try:
+            manifest = json.loads((entry_path / "manifest.json").read_text())
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get('format_version') != FORMAT_VERSION:
+            return None
+        if not all((entry_path / c['file']).exists() for c in manifest['columns']):
+            return None
+        return manifest
+
+    @contextmanager
+    def _build_lock(self, content_hash: str) -> Iterator[None]:
+        """Hold the build lock of an entry (exclusive across processes where fcntl exists)"""
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        with open(self.cache_path / f".{content_hash}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_chunks(self, source_path: str, file_type: str) -> Iterator[pd.DataFrame]:
+        """Parse a source a chunk of rows at a time"""
+        if file_type == 'csv':
+            yield from pd.read_csv(source_path, chunksize=self.chunk_rows)
+        elif file_type == 'json':
+            if is_json_lines(source_path):
+                yield from pd.read_json(source_path, lines=True, chunksize=self.chunk_rows)
+            else:
+                yield pd.read_json(source_path)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+
+    def _build(self, source_path: str, file_type: str, content_hash: str) -> Dict[str, Any]:
+        """Parse the source once, chunk by chunk, and write its columns"""
+        start = time.perf_counter()
+
+        # Written to a temporary directory and renamed, so readers never see a partial entry
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{content_hash[:12]}-", dir=self.cache_path))
+        try:
+            # Each chunk's columns go to part files first; a column's type is only known after the last chunk
+            names: List[str] = []
+            parts: List[List[Path]] = []
+            dtypes: List[List[np.dtype]] = []
+            rows = 0
+            for k, chunk in enumerate(self._read_chunks(source_path, file_type)):
+                if not names:
+                    names = [str(name) for name in chunk.columns]
+                    parts = [[] for _ in names]
+                    dtypes = [[] for _ in names]
+                for i, name in enumerate(chunk.columns):
+                    array = np.ascontiguousarray(_column_array(chunk[name]))
+                    part = tmp_dir / f"col_{i:04d}.{k:06d}.part.npy"
+                    np.save(part, array, allow_pickle=False)
+                    parts[i].append(part)
+                    dtypes[i].append(array.dtype)
+                rows += len(chunk)
+            parse_time = time.perf_counter() - start
+
+            columns = []
+            for i, name in enumerate(names):
+                file_name = f"col_{i:04d}.npy"
+                dtype = self._combine_parts(parts[i], dtypes[i], rows, tmp_dir / file_name)
+                columns.append({'name': name, 'dtype': dtype.str, 'file': file_name})
+
+            manifest = {
+                'format_version': FORMAT_VERSION,
+                'content_hash': content_hash,
+                'source_path': os.path.abspath(source_path),
+                'file_type': file_type,
+                'rows': rows,
+                'columns': columns,
+                'parse_time_s': round(parse_time, 3),
+                'created_at': time.time()
+            }
+            self._write_json(tmp_dir / "manifest.json", manifest)
+
+            existing = self._read_manifest(content_hash)
+            if existing is not None:
+                # Built concurrently without a lock (no fcntl): keep the entry readers may be using
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return existing
+
+            entry_path = self.cache_path / content_hash
+            if entry_path.exists():
+                # Incomplete or from an older format; nothing can be reading it
+                shutil.rmtree(entry_path)
+            os.replace(tmp_dir, entry_path)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self.builds += 1
+        logger.info(
+            f"Cached {rows} rows x {len(columns)} columns of {source_path} "
+            f"(parsed in {parse_time:.1f}s, total {time.perf_counter() - start:.1f}s)"
+        )
+        return manifest
+
+    @staticmethod
+    def _combine_parts(parts: List[Path], dtypes: List[np.dtype], rows: int, path: Path) -> np.dtype:
+        """Concatenate a column's chunk files into one column file, a chunk at a time"""
+        dtype = _common_dtype(dtypes)
+        if len(parts) == 1 and dtypes[0] == dtype:
+            os.replace(parts[0], path)
+            return dtype
+
+        column = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(rows,))
+        offset = 0
+        for part in parts:
+            values = np.load(part, mmap_mode='r', allow_pickle=False)
+            column[offset:offset + len(values)] = values.astype(dtype, copy=False)
+            offset += len(values)
+            del values
+            part.unlink()
+        column.flush()
+        del column
+        return dtype
+
+    @staticmethod
+    def _write_json(path: Path, data: Dict[str, Any]) -> None:
+        # Per process, so concurrent writers of the same source index do not collide
+        tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, path)
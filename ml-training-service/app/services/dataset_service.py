@@ -0,0 +1,462 @@
+"""
+Dataset service for managing training dataset uploads
+
+Uploads are streamed to disk in fixed-size chunks. While a chunk is
+written, the content hash, row count, per-column null counts and the
+``fraud_label`` balance are updated from the complete lines it contains,
+so memory use depends on the chunk size, not on the file size. CSV
+uploads are validated as they arrive: a missing ``fraud_label`` column,
+a label other than 0/1 or a non-numeric feature value rejects the upload
+at the chunk where it appears, and uploads over the size limit are cut
+off at the limit.
+
+The upload endpoint reads the raw request body through
+``MultipartFileStream`` rather than a spooled ``UploadFile``, so these
+rejections happen while the client is still sending, not after the whole
+body has been received. Parsing and validation run in the executor.
+
+JSON uploads are summarized after they are stored, in a separate process:
+JSON Lines files a chunk of rows at a time, JSON arrays (which can only be
+parsed whole) in one piece, so neither is parsed inside the API process.
+"""
+
+import asyncio
+import csv
+import hashlib
+import logging
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+from .dataset_cache import is_json_lines
+from ..utils.database import get_database_connection
+
+logger = logging.getLogger(__name__)
+
+LABEL_COLUMN = 'fraud_label'
+NULL_VALUES = {'', 'na', 'nan', 'null', 'none'}
+
+
+class DatasetValidationError(ValueError):
+    """Upload rejected because its contents do not match the expected schema"""
+
+
+class DatasetTooLargeError(ValueError):
+    """Upload rejected because it exceeds the maximum upload size"""
+
+
+def summarize_json(file_path: str, feature_names: List[str], chunk_rows: int) -> Dict[str, Any]:
+    """
+    Statistics and schema checks for a JSON dataset
+
+    JSON Lines files are read ``chunk_rows`` rows at a time; a JSON array is
+    parsed whole. Runs in a separate process (see ``DatasetService``).
+    """
+    import pandas as pd
+
+    if is_json_lines(file_path):
+        frames = pd.read_json(file_path, lines=True, chunksize=chunk_rows)
+    else:
+        frames = [pd.read_json(file_path)]
+
+    columns: List[str] = []
+    null_counts: Dict[str, int] = {}
+    rows = positives = 0
+    for frame in frames:
+        if LABEL_COLUMN not in frame.columns:
+            raise DatasetValidationError(f"Dataset must contain '{LABEL_COLUMN}' column")
+        if not frame[LABEL_COLUMN].isin([0, 1]).all():
+            raise DatasetValidationError(f"{LABEL_COLUMN} must be 0 or 1")
+
+        for name in frame.columns:
+            name = str(name)
+            if name not in null_counts:
+                # A key first seen in this chunk was missing from every earlier row
+                columns.append(name)
+                null_counts[name] = rows
+        chunk_nulls = {str(k): int(v) for k, v in frame.isna().sum().items()}
+        for name in columns:
+            null_counts[name] += chunk_nulls.get(name, len(frame))
+
+        rows += len(frame)
+        positives += int(frame[LABEL_COLUMN].sum())
+
+    return {
+        'columns': columns,
+        'rows': rows,
+        'null_counts': null_counts,
+        'label_counts': {'0': rows - positives, '1': positives},
+        'fraud_rate': positives / rows if rows else 0.0,
+        'missing_features': [name for name in feature_names if name not in null_counts]
+    }
+
+
+class MultipartFileStream:
+    """
+    The file part of a multipart/form-data body, readable while the body arrives
+
+    Provides the ``filename`` and ``read(size)`` of an ``UploadFile`` over
+    the request's byte stream. Parts other than the file field are skipped.
+    """
+
+    def __init__(self, body: AsyncIterator[bytes], content_type: str, field_name: str = 'file'):
+        mime_type, options = parse_options_header(content_type or '')
+        boundary = options.get(b'boundary')
+        if mime_type != b'multipart/form-data' or not boundary:
+            raise DatasetValidationError("Upload must be multipart/form-data")
+
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self._body = body.__aiter__()
+        self._pending: List[bytes] = []
+        self._in_file = False
+        self._file_done = False
+        self._body_done = False
+        self._header_field = b''
+        self._header_value = b''
+        self._disposition = b''
+
+        self._parser = MultipartParser(boundary, callbacks={
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end
+        })
+
+    async def open(self) -> None:
+        """Read until the file part's headers, so ``filename`` is known"""
+        while self.filename is None and not self._file_done:
+            if not await self._feed():
+                raise DatasetValidationError(f"Upload has no '{self.field_name}' file field")
+
+    async def read(self, size: int = -1) -> bytes:
+        """Next bytes of the file (b'' at its end); returns what has arrived, up to about ``size``"""
+        while not self._pending and not self._file_done:
+            if not await self._feed():
+                break
+        data = b''.join(self._pending)
+        self._pending = []
+        return data
+
+    async def _feed(self) -> bool:
+        """Parse the next chunk of the body; False once the body is exhausted"""
+        if self._body_done:
+            return False
+        try:
+            chunk = await self._body.__anext__()
+        except StopAsyncIteration:
+            self._body_done = True
+            self._parser.finalize()
+            return False
+        self._parser.write(chunk)
+        return True
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b''
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_field.lower() == b'content-disposition':
+            self._disposition = self._header_value
+        self._header_field = b''
+        self._header_value = b''
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        if options.get(b'name', b'').decode('utf-8') == self.field_name and b'filename' in options \
+                and self.filename is None:
+            self.filename = options[b'filename'].decode('utf-8')
+            self._in_file = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self._file_done = True
+
+
+class CSVUploadValidator:
+    """Incremental statistics and schema checks over CSV lines"""
+
+    def __init__(self, feature_names: List[str]):
+        self.feature_names = feature_names
+        self.columns: Optional[List[str]] = None
+        self.rows = 0
+        self.null_counts: List[int] = []
+        self.label_counts: Dict[str, int] = {}
+        self._label_index = -1
+        self._feature_indices: List[int] = []
+
+    def feed_bytes(self, data: bytes) -> None:
+        """Consume complete UTF-8 lines (the first chunk may start with a BOM)"""
+        self.feed(data.decode('utf-8-sig' if self.columns is None else 'utf-8').splitlines())
+
+    def feed(self, lines: List[str]) -> None:
+        """Consume complete lines"""
+        reader = csv.reader(lines)
+        if self.columns is None:
+            header = next(reader, None)
+            if header is None:
+                return
+            self._set_header(header)
+
+        n_columns = len(self.columns)
+        for row in reader:
+            if not row:
+                continue
+            self.rows += 1
+            if len(row) != n_columns:
+                raise DatasetValidationError(
+                    f"Row {self.rows} has {len(row)} fields, expected {n_columns}"
+                )
+
+            for i, value in enumerate(row):
+                if value.strip().lower() in NULL_VALUES:
+                    self.null_counts[i] += 1
+
+            label = row[self._label_index].strip()
+            if label not in ('0', '1', '0.0', '1.0'):
+                raise DatasetValidationError(f"Row {self.rows}: {LABEL_COLUMN} must be 0 or 1, got {label!r}")
+            label = label[0]
+            self.label_counts[label] = self.label_counts.get(label, 0) + 1
+
+            for i in self._feature_indices:
+                value = row[i].strip()
+                if value.lower() in NULL_VALUES:
+                    continue
+                try:
+                    float(value)
+                except ValueError:
+                    raise DatasetValidationError(
+                        f"Row {self.rows}: feature {self.columns[i]} is not numeric ({value!r})"
+                    )
+
+    def _set_header(self, header: List[str]) -> None:
+        self.columns = [name.strip() for name in header]
+        if LABEL_COLUMN not in self.columns:
+            raise DatasetValidationError(f"Dataset must contain '{LABEL_COLUMN}' column")
+        if len(set(self.columns)) != len(self.columns):
+            raise DatasetValidationError("Dataset has duplicate column names")
+
+        self.null_counts = [0] * len(self.columns)
+        self._label_index = self.columns.index(LABEL_COLUMN)
+        self._feature_indices = [i for i, name in enumerate(self.columns) if name in self.feature_names]
+
+    def summary(self) -> Dict[str, Any]:
+        """Statistics collected so far"""
+        if self.columns is None:
+            raise DatasetValidationError("Dataset is empty")
+        positives = self.label_counts.get('1', 0)
+        return {
+            'columns': self.columns,
+            'rows': self.rows,
+            'null_counts': dict(zip(self.columns, self.null_counts)),
+            'label_counts': {'0': self.label_counts.get('0', 0), '1': positives},
+            'fraud_rate': positives / self.rows if self.rows else 0.0,
+            'missing_features': [name for name in self.feature_names if name not in self.columns]
+        }
+
+
+class DatasetService:
+    """Service for managing training datasets"""
+
+    def __init__(self, settings, feature_names: Optional[List[str]] = None):
+        self.settings = settings
+        self.datasets_path = Path(settings.datasets_path)
+        self.uploads_path = self.datasets_path / "uploads"
+        self.chunk_size = settings.upload_chunk_size
+        self.max_upload_size = settings.max_upload_size
+        self.chunk_rows = settings.upload_chunk_size_rows
+        self.feature_names = feature_names or []
+        self._summary_executor: Optional[ProcessPoolExecutor] = None  # parses JSON outside the API process
+
+    async def initialize(self):
+        """Initialize the dataset service"""
+        logger.info("Initializing dataset service")
+        self.uploads_path.mkdir(parents=True, exist_ok=True)
+        logger.info("Dataset service initialized")
+
+    async def create_dataset(self, name: str, description: Optional[str], file,
+                             uploaded_by: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Stream an upload to disk, validating it on the way, and record it
+
+        Raises:
+            DatasetValidationError: Contents do not match the expected schema
+            DatasetTooLargeError: Upload exceeds the maximum size
+        """
+        file_type = 'json' if file.filename.lower().endswith('.json') else 'csv'
+        tmp_path = self.uploads_path / f"{uuid.uuid4()}.part"
+        stats = await self._stream_to_disk(file, tmp_path, file_type)
+
+        # Identical uploads share one file
+        file_path = self.datasets_path / f"{stats['content_hash']}.{file_type}"
+        os.replace(tmp_path, file_path)
+
+        metadata = {
+            'content_hash': stats['content_hash'],
+            'original_filename': file.filename,
+            **stats.get('summary', {})
+        }
+
+        async with get_database_connection() as conn:
+            query = """
+                INSERT INTO training_datasets
+                (name, version, description, file_path, file_type, file_size, record_count, metadata,
+                 status, uploaded_by, created_at, updated_at)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW(), NOW())
+                RETURNING *
+            """
+            result = await conn.fetchrow(
+                query,
+                name, stats['content_hash'][:12], description, str(file_path), file_type,
+                stats['bytes'], metadata.get('rows', 0), metadata, 'processing', uploaded_by
+            )
+
+        logger.info(
+            f"Uploaded dataset {name} ({stats['bytes']} bytes, {metadata.get('rows', 'unknown')} rows) "
+            f"to {file_path}"
+        )
+        return dict(result)
+
+    async def _stream_to_disk(self, file, path: Path, file_type: str) -> Dict[str, Any]:
+        """Write an upload chunk by chunk, hashing and validating as it goes"""
+        digest = hashlib.sha256()
+        validator = CSVUploadValidator(self.feature_names) if file_type == 'csv' else None
+        remainder = b''
+        total = 0
+        loop = asyncio.get_running_loop()
+
+        out = open(path, 'wb')
+        try:
+            while True:
+                chunk = await file.read(self.chunk_size)
+                if not chunk:
+                    break
+
+                total += len(chunk)
+                if total > self.max_upload_size:
+                    raise DatasetTooLargeError(f"Upload exceeds the maximum size of {self.max_upload_size} bytes")
+
+                digest.update(chunk)
+                await loop.run_in_executor(None, out.write, chunk)
+
+                if validator is not None:
+                    # Only complete lines are parsed; the tail waits for the next chunk
+                    data = remainder + chunk
+                    cut = data.rfind(b'\n') + 1
+                    remainder = data[cut:]
+                    if cut:
+                        # Parsing every field is CPU-bound; keep it off the event loop
+                        await loop.run_in_executor(None, validator.feed_bytes, data[:cut])
+
+            if validator is not None and remainder.strip():
+                await loop.run_in_executor(None, validator.feed_bytes, remainder)
+            out.close()
+        except BaseException:
+            out.close()
+            path.unlink(missing_ok=True)
+            raise
+
+        stats = {'bytes': total, 'content_hash': digest.hexdigest()}
+        if validator is not None:
+            stats['summary'] = validator.summary()
+        return stats
+
+    async def process_dataset(self, dataset_id: int):
+        """Compute quality metrics from the upload statistics and mark the dataset ready"""
+        try:
+            dataset = await self.get_dataset(dataset_id)
+            if not dataset:
+                logger.warning(f"Dataset {dataset_id} not found")
+                return
+
+            metadata = dataset.get('metadata') or {}
+            if dataset['file_type'] == 'json':
+                # JSON documents are not validated while streaming; parse once here
+                metadata.update(await self._summarize_json(dataset['file_path']))
+
+            rows = metadata.get('rows', 0)
+            null_counts = metadata.get('null_counts', {})
+            quality_metrics = {
+                'null_rates': {name: count / rows for name, count in null_counts.items()} if rows else {},
+                'fraud_rate': metadata.get('fraud_rate', 0.0),
+                'missing_features': metadata.get('missing_features', []),
+                'feature_coverage': 1 - len(metadata.get('missing_features', [])) / len(self.feature_names)
+                if self.feature_names else 1.0
+            }
+
+            async with get_database_connection() as conn:
+                query = """
+                    UPDATE training_datasets
+                    SET status = 'ready', record_count = $1, metadata = $2, quality_metrics = $3, updated_at = NOW()
+                    WHERE id = $4
+                """
+                await conn.execute(query, rows, metadata, quality_metrics, dataset_id)
+
+            logger.info(f"Dataset {dataset_id} processed: {rows} rows")
+
+        except Exception as e:
+            logger.error(f"Failed to process dataset {dataset_id}: {e}")
+            async with get_database_connection() as conn:
+                query = """
+                    UPDATE training_datasets
+                    SET status = 'error', error_message = $1, updated_at = NOW()
+                    WHERE id = $2
+                """
+                await conn.execute(query, str(e), dataset_id)
+
+    async def _summarize_json(self, file_path: str) -> Dict[str, Any]:
+        """Statistics and schema checks for a JSON dataset, computed in a separate process"""
+        if self._summary_executor is None:
+            self._summary_executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._summary_executor, summarize_json, file_path, self.feature_names, self.chunk_rows
+        )
+
+    async def list_datasets(self, status: str = None, limit: int = 50, offset: int = 0):
+        """List datasets with filters"""
+        async with get_database_connection() as conn:
+            if status:
+                query = """
+                    SELECT * FROM training_datasets WHERE status = $1
+                    ORDER BY created_at DESC LIMIT $2 OFFSET $3
+                """
+                results = await conn.fetch(query, status, limit, offset)
+            else:
+                query = "SELECT * FROM training_datasets ORDER BY created_at DESC LIMIT $1 OFFSET $2"
+                results = await conn.fetch(query, limit, offset)
+            return [dict(row) for row in results]
+
+    async def get_dataset(self, dataset_id: int):
+        """Get dataset by ID"""
+        async with get_database_connection() as conn:
+            query = "SELECT * FROM training_datasets WHERE id = $1"
+            result = await conn.fetchrow(query, dataset_id)
+            return dict(result) if result else None
+
+    async def cleanup(self):
+        """Cleanup resources"""
+        logger.info("Cleaning up dataset service")
+        if self._summary_executor is not None:
+            self._summary_executor.shutdown(wait=False, cancel_futures=True)
+            self._summary_executor = None
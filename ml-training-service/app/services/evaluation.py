@@ -0,0 +1,186 @@
+"""
+Single-pass threshold-sweep evaluation
+
+Scores are sorted once, descending. Walking the sorted labels in chunks
+with running true/false positive counts yields, in one vectorized pass:
+
+- exact ROC AUC, average precision and trapezoidal PR AUC (ties handled
+  as one step)
+- ROC and PR curves, thinned to a fixed number of points
+- a threshold table: precision, recall, FPR and alert rate at each cut-off
+- lift and cumulative capture by score decile
+- confusion matrices at the risk-tier boundaries
+
+Only one chunk of sorted scores and labels is materialized at a time, so
+multi-million-row holdouts need little more than the sort permutation.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+def _threshold_grid(tier_boundaries: Sequence[float], step: float = 0.01) -> np.ndarray:
+    grid = np.round(np.arange(0.0, 1.0 + step / 2, step), 6)
+    return np.unique(np.concatenate([grid, np.asarray(tier_boundaries, dtype=np.float64), [0.5]]))
+
+
+def evaluate_scores(
+    y_true: Any,
+    scores: Any,
+    tier_boundaries: Sequence[float] = (0.3, 0.7),
+    thresholds: Optional[Sequence[float]] = None,
+    curve_points: int = 200,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Evaluate scores against binary labels at every cut-off in one pass
+
+    Args:
+        y_true: Binary labels
+        scores: Predicted fraud probabilities
+        tier_boundaries: Score boundaries between risk tiers (low/medium/high)
+        thresholds: Cut-offs for the threshold table (default 0.00-1.00 by 0.01)
+        curve_points: Maximum number of points kept per curve
+        chunk_size: Sorted rows processed per step
+
+    Returns:
+        AUCs, curves, threshold table, decile lift and tier confusion matrices
+    """
+    y = np.asarray(y_true).astype(np.int8, copy=False).ravel()
+    s = np.asarray(scores, dtype=np.float64).ravel()
+    n = len(y)
+    if n == 0 or n != len(s):
+        raise ValueError("Labels and scores must be non-empty and of equal length")
+
+    positives = int(y.sum())
+    negatives = n - positives
+    if thresholds is None:
+        thresholds = _threshold_grid(tier_boundaries)
+    # Tier boundaries and 0.5 always get a row
+    thresholds = np.unique(np.concatenate([np.asarray(thresholds, dtype=np.float64),
+                                           np.asarray(tier_boundaries, dtype=np.float64), [0.5]]))
+    neg_thresholds = -thresholds
+
+    order = np.argsort(-s, kind='stable')
+
+    # Running state carried across chunks
+    tp_carry = 0
+    prev_tpr = prev_fpr = 0.0
+    prev_recall = 0.0
+    prev_precision = 1.0
+    roc_area = 0.0
+    average_precision = 0.0
+    pr_area = 0.0
+    alerts_at = np.zeros(len(thresholds), dtype=np.int64)
+    tp_at = np.zeros(len(thresholds), dtype=np.int64)
+    decile_ranks = np.array([int(round(n * d / 10)) for d in range(1, 11)], dtype=np.int64)
+    tp_at_decile = np.zeros(10, dtype=np.int64)
+    curve: List[tuple] = [(0.0, 0.0, 1.0, 1.0)]  # (fpr, tpr, precision, threshold)
+    last_bucket = 0
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        idx = order[start:stop]
+        s_chunk = s[idx]
+        tp = tp_carry + np.cumsum(y[idx], dtype=np.int64)
+        rank = np.arange(start + 1, stop + 1, dtype=np.int64)
+        fp = rank - tp
+
+        # Threshold table: rows with score >= t are the first k of the chunk
+        k = np.searchsorted(-s_chunk, neg_thresholds, side='right')
+        alerts_at += k
+        tp_at += np.where(k > 0, tp[np.maximum(k, 1) - 1] - tp_carry, 0)
+
+        # Decile cut-offs falling in this chunk
+        in_chunk = (decile_ranks > start) & (decile_ranks <= stop)
+        tp_at_decile[in_chunk] = tp[decile_ranks[in_chunk] - start - 1]
+
+        # Curve points at the end of each group of tied scores
+        next_score = s[order[stop]] if stop < n else -np.inf
+        boundary = np.flatnonzero(s_chunk != np.append(s_chunk[1:], next_score))
+        tp_b, fp_b = tp[boundary], fp[boundary]
+        tpr = tp_b / positives if positives else np.zeros(len(boundary))
+        fpr = fp_b / negatives if negatives else np.zeros(len(boundary))
+        precision = tp_b / (tp_b + fp_b)
+
+        prev_f = np.concatenate([[prev_fpr], fpr[:-1]])
+        prev_t = np.concatenate([[prev_tpr], tpr[:-1]])
+        roc_area += float(np.sum((fpr - prev_f) * (tpr + prev_t) / 2))
+        prev_r = np.concatenate([[prev_recall], tpr[:-1]])
+        average_precision += float(np.sum((tpr - prev_r) * precision))
+        # Trapezoids between PR points, starting from (recall 0, precision 1)
+        prev_p = np.concatenate([[prev_precision], precision[:-1]])
+        pr_area += float(np.sum((tpr - prev_r) * (precision + prev_p) / 2))
+
+        buckets = (rank[boundary] * curve_points) // n
+        keep = np.flatnonzero(buckets != np.concatenate([[last_bucket], buckets[:-1]]))
+        curve.extend(zip(fpr[keep].tolist(), tpr[keep].tolist(), precision[keep].tolist(),
+                         s_chunk[boundary[keep]].tolist()))
+
+        if len(boundary):
+            prev_fpr, prev_tpr, prev_recall = float(fpr[-1]), float(tpr[-1]), float(tpr[-1])
+            prev_precision = float(precision[-1])
+            last_bucket = int(buckets[-1])
+        tp_carry = int(tp[-1])
+
+    defined = positives > 0 and negatives > 0
+    fpr_curve, tpr_curve, precision_curve, threshold_curve = (list(c) for c in zip(*curve))
+
+    threshold_table = []
+    for t, alerts, tp in zip(thresholds.tolist(), alerts_at.tolist(), tp_at.tolist()):
+        fp = alerts - tp
+        precision = tp / alerts if alerts else 0.0
+        recall = tp / positives if positives else 0.0
+        threshold_table.append({
+            'threshold': t,
+            'alerts': alerts,
+            'true_positives': tp,
+            'alert_rate': alerts / n,
+            'precision': precision,
+            'recall': recall,
+            'fpr': fp / negatives if negatives else 0.0,
+            'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        })
+
+    base_rate = positives / n
+    decile_lift = []
+    prev_rank = prev_tp = 0
+    for d, (rank, tp) in enumerate(zip(decile_ranks.tolist(), tp_at_decile.tolist()), start=1):
+        rows = rank - prev_rank
+        rate = (tp - prev_tp) / rows if rows else 0.0
+        decile_lift.append({
+            'decile': d,
+            'rows': rows,
+            'fraud_rate': rate,
+            'lift': rate / base_rate if base_rate else 0.0,
+            'cumulative_capture': tp / positives if positives else 0.0
+        })
+        prev_rank, prev_tp = rank, tp
+
+    by_threshold = dict(zip(thresholds.tolist(), zip(alerts_at.tolist(), tp_at.tolist())))
+    tier_confusion = {}
+    for boundary in tier_boundaries:
+        alerts, tp = by_threshold[float(boundary)]
+        fp = alerts - tp
+        tier_confusion[str(boundary)] = [[negatives - fp, fp], [positives - tp, tp]]
+
+    return {
+        'rows': n,
+        'positives': positives,
+        'auc_roc': roc_area if defined else None,
+        'average_precision': average_precision if defined else None,
+        'auc_pr': pr_area if defined else None,
+        'roc_curve': {'fpr': fpr_curve, 'tpr': tpr_curve, 'thresholds': threshold_curve},
+        'pr_curve': {'precision': precision_curve, 'recall': tpr_curve, 'thresholds': threshold_curve},
+        'threshold_table': threshold_table,
+        'decile_lift': decile_lift,
+        'tier_confusion_matrices': tier_confusion
+    }
+
+
+def threshold_row(evaluation: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    """Threshold table row at a cut-off"""
+    return next(row for row in evaluation['threshold_table'] if row['threshold'] == threshold)
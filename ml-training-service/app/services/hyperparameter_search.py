@@ -0,0 +1,270 @@
+"""
+Parallel hyperparameter search with successive halving
+
+Candidates are drawn at random from a search space and evaluated on the
+job's binned dataset (loaded by each worker from its ``save_binary`` file,
+so nothing is re-binned). All candidates first train for a few boosting
+rounds; only the best 1/eta by validation AUC are promoted to the next
+rung, which trains eta times as many rounds. Weak configurations
+therefore stop early and most of the budget goes to promising ones.
+
+Rungs run on a spawn process pool with LightGBM's threads divided among
+the workers. The CPU time of every evaluation is added as it completes;
+once the search's CPU-time budget is used up, evaluations that have not
+started are cancelled and no new rung is started.
+
+Every worker holds its own copy of the binned dataset, so with a memory
+limit the number of workers is capped at what fits (each worker is counted
+as ``WORKER_MEMORY_FACTOR`` times the binary file's size).
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import lightgbm as lgb
+
+from .parallel_cv import plan_workers
+from .training_data import load_binary, training_params
+
+logger = logging.getLogger(__name__)
+
+# (kind, low, high) per parameter; binning parameters are fixed by the dataset
+SEARCH_SPACE = {
+    'num_leaves': ('int', 15, 255),
+    'learning_rate': ('log', 0.01, 0.3),
+    'feature_fraction': ('uniform', 0.5, 1.0),
+    'bagging_fraction': ('uniform', 0.5, 1.0),
+    'bagging_freq': ('int', 0, 10),
+    'min_child_samples': ('int', 5, 200),
+    'reg_alpha': ('log', 1e-3, 10.0),
+    'reg_lambda': ('log', 1e-3, 10.0)
+}
+
+# Estimated worker memory as a multiple of the binary dataset file: the
+# loaded dataset plus the subsets and histograms built from it
+WORKER_MEMORY_FACTOR = 2.0
+
+# Binned dataset per worker process, loaded once per search
+_datasets: Dict[str, lgb.Dataset] = {}
+
+
+def sample_candidates(n: int, seed: int = 42, space: Optional[Dict[str, tuple]] = None) -> List[Dict[str, Any]]:
+    """Draw random configurations from the search space"""
+    rng = np.random.default_rng(seed)
+    space = space or SEARCH_SPACE
+    candidates = []
+    for _ in range(n):
+        params = {}
+        for name, (kind, low, high) in space.items():
+            if kind == 'int':
+                params[name] = int(rng.integers(low, high + 1))
+            elif kind == 'log':
+                params[name] = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+            else:
+                params[name] = float(rng.uniform(low, high))
+        candidates.append(params)
+    return candidates
+
+
+def _evaluate_candidate(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Train one candidate for a rung's rounds and score it (runs in a worker process)"""
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+
+    dataset = _datasets.get(task['binary_path'])
+    if dataset is None:
+        dataset = load_binary(task['binary_path'], task['dataset_params']).construct()
+        _datasets.clear()
+        _datasets[task['binary_path']] = dataset
+
+    train_data = dataset.subset(task['train_idx'])
+    valid_data = dataset.subset(task['valid_idx'])
+    # Subsets only take their reference's metadata when constructed, so weights go on afterwards
+    for subset, weight in ((train_data, task['train_weight']), (valid_data, task['valid_weight'])):
+        if weight is not None:
+            subset.construct()
+            subset.set_weight(weight)
+
+    booster = lgb.train(
+        {**task['base_params'], **task['params'], 'metric': 'auc'},
+        train_data,
+        num_boost_round=task['rounds'],
+        valid_sets=[valid_data],
+        valid_names=['valid'],
+        callbacks=[lgb.early_stopping(max(5, task['rounds'] // 5), verbose=False)]
+    )
+
+    return {
+        'candidate': task['candidate'],
+        'rounds': task['rounds'],
+        'auc': float(booster.best_score['valid']['auc']),
+        'best_iteration': booster.best_iteration or task['rounds'],
+        'cpu_time_s': time.process_time() - cpu_start,
+        'wall_time_s': time.perf_counter() - start
+    }
+
+
+def _sorted_rows(indices: Any, weight: Optional[np.ndarray]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Row indices in ascending order (as Dataset.subset needs), with their weights in the same order"""
+    indices = np.asarray(indices, dtype=np.int32)
+    order = np.argsort(indices, kind='stable')
+    if weight is not None:
+        weight = np.asarray(weight, dtype=np.float32)[order]
+    return indices[order], weight
+
+
+def plan_search_workers(binary_path: str, n_candidates: int, cpu_count: int, memory_limit_mb: float = 0) -> Tuple[int, int]:
+    """Workers and threads per worker, with workers capped by memory when a limit is set"""
+    max_workers = 0
+    if memory_limit_mb > 0:
+        worker_mb = os.path.getsize(binary_path) * WORKER_MEMORY_FACTOR / (1024 * 1024)
+        max_workers = max(1, int(memory_limit_mb // worker_mb)) if worker_mb > 0 else 0
+    return plan_workers(n_candidates, cpu_count, max_workers)
+
+
+def run_successive_halving(
+    binary_path: str,
+    train_idx: np.ndarray,
+    valid_idx: np.ndarray,
+    base_params: Dict[str, Any],
+    n_candidates: int = 27,
+    eta: int = 3,
+    min_rounds: int = 25,
+    max_rounds: int = 500,
+    cpu_time_budget_s: float = 3600.0,
+    cpu_count: int = 1,
+    memory_limit_mb: float = 0,
+    seed: int = 42,
+    train_weight: Optional[np.ndarray] = None,
+    valid_weight: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """
+    Search hyperparameters on a binned dataset
+
+    Args:
+        binary_path: Dataset saved with ``Dataset.save_binary``
+        train_idx: Rows to train candidates on
+        valid_idx: Rows to score candidates on
+        base_params: Fixed parameters (objective etc.), including the binning
+            parameters the binary was saved with
+        n_candidates: Configurations sampled for the first rung
+        eta: Promotion ratio between rungs
+        min_rounds: Boosting rounds in the first rung
+        max_rounds: Upper bound on rounds in any rung
+        cpu_time_budget_s: CPU seconds after which no further evaluation is started
+        cpu_count: CPUs available to the search
+        memory_limit_mb: Memory for all workers' dataset copies (0 = no limit)
+        seed: Random seed for candidate sampling
+        train_weight: Instance weights of ``train_idx`` (e.g. from negative
+            downsampling), so candidates are tuned on the loss the final model trains on
+        valid_weight: Instance weights of ``valid_idx``
+
+    Returns:
+        All evaluations, the best configuration and budget usage
+    """
+    candidates = sample_candidates(n_candidates, seed)
+    dataset_params = base_params
+    base_params = {
+        k: v for k, v in training_params(base_params).items() if k not in SEARCH_SPACE and k != 'metric'
+    }
+    train_idx, train_weight = _sorted_rows(train_idx, train_weight)
+    valid_idx, valid_weight = _sorted_rows(valid_idx, valid_weight)
+
+    workers, threads = plan_search_workers(binary_path, n_candidates, cpu_count, memory_limit_mb)
+    base_params = {**base_params, 'num_threads': threads, 'verbose': -1}
+
+    surviving = list(range(n_candidates))
+    rounds = min_rounds
+    evaluations: List[Dict[str, Any]] = []
+    cpu_used = 0.0
+    rungs = []
+    budget_exhausted = False
+    start = time.perf_counter()
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        while surviving:
+            if cpu_used >= cpu_time_budget_s:
+                budget_exhausted = True
+                break
+
+            tasks = [
+                {
+                    'candidate': i,
+                    'params': candidates[i],
+                    'base_params': base_params,
+                    'rounds': rounds,
+                    'binary_path': binary_path,
+                    'dataset_params': dataset_params,
+                    'train_idx': train_idx,
+                    'valid_idx': valid_idx,
+                    'train_weight': train_weight,
+                    'valid_weight': valid_weight
+                }
+                for i in surviving
+            ]
+            futures = [pool.submit(_evaluate_candidate, task) for task in tasks]
+            results = []
+            rung_cpu = 0.0
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                result = future.result()
+                results.append(result)
+                rung_cpu += result['cpu_time_s']
+                cpu_used += result['cpu_time_s']
+                if cpu_used >= cpu_time_budget_s and not budget_exhausted:
+                    # Evaluations already running finish; the rest never start
+                    budget_exhausted = True
+                    for pending in futures:
+                        pending.cancel()
+            evaluations.extend(results)
+
+            results.sort(key=lambda r: r['auc'], reverse=True)
+            rungs.append({
+                'rounds': rounds,
+                'candidates': len(results),
+                'best_auc': results[0]['auc'],
+                'cpu_time_s': round(rung_cpu, 3)
+            })
+            logger.info(
+                f"Search rung {len(rungs)}: {len(results)} candidates x {rounds} rounds, "
+                f"best AUC {results[0]['auc']:.4f}"
+            )
+
+            if budget_exhausted or len(results) == 1 or rounds >= max_rounds:
+                break
+            surviving = [r['candidate'] for r in results[:max(1, len(results) // eta)]]
+            rounds = min(rounds * eta, max_rounds)
+
+    # Best result from the deepest rung reached
+    deepest = max(r['rounds'] for r in evaluations)
+    best = max((r for r in evaluations if r['rounds'] == deepest), key=lambda r: r['auc'])
+    wall_time = time.perf_counter() - start
+
+    logger.info(
+        f"Hyperparameter search finished: best AUC {best['auc']:.4f} after {len(evaluations)} evaluations, "
+        f"{cpu_used:.0f} CPU s in {wall_time:.0f}s"
+    )
+
+    return {
+        'method': 'random_successive_halving',
+        'best_params': candidates[best['candidate']],
+        'best_auc': best['auc'],
+        'best_iteration': best['best_iteration'],
+        'rungs': rungs,
+        'evaluations': [{**r, 'params': candidates[r['candidate']]} for r in evaluations],
+        'workers': workers,
+        'threads_per_worker': threads,
+        'memory_limit_mb': memory_limit_mb,
+        'cpu_time_s': round(cpu_used, 3),
+        'cpu_time_budget_s': cpu_time_budget_s,
+        'budget_exhausted': budget_exhausted,
+        'wall_time_s': round(wall_time, 3)
+    }
@@ -0,0 +1,358 @@
+"""
+Persistent training job queue and worker process pool
+
+Training jobs are queued in a local SQLite file and executed by separate
+worker processes, so CPU-bound ``lgb.train`` calls never run inside the API
+process's event loop. The pool runs up to ``max_concurrent_jobs`` jobs at a
+time, each with a fixed LightGBM thread budget. Every worker leads its own
+process group, so cancelling a running job terminates the worker together
+with any process pools it started (parallel CV, hyperparameter search).
+Jobs left running by a previous API process (crash or restart) are queued
+again at startup. A job whose worker crashes is queued again, resuming from
+its latest checkpoint, until it has been attempted ``max_attempts`` times.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+CRASHED = "crashed"
+CANCELLED = "cancelled"
+
+
+class TrainingJobQueue:
+    """SQLite-backed FIFO of training job ids"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS training_queue (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_pid INTEGER,
+                exit_code INTEGER,
+                enqueued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_training_queue_status ON training_queue (status, priority, enqueued_at)"
+        )
+        self._conn.commit()
+
+    def enqueue(self, job_id: str, priority: int = 0) -> None:
+        """Add a job to the end of the queue"""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO training_queue (job_id, status, priority, enqueued_at) VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, priority, time.time())
+            )
+
+    def claim_next(self) -> Optional[str]:
+        """Mark the next queued job as running and return its id"""
+        with self._conn:
+            row = self._conn.execute(
+                "SELECT job_id FROM training_queue WHERE status = ? "
+                "ORDER BY priority DESC, enqueued_at LIMIT 1",
+                (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE training_queue SET status = ?, attempts = attempts + 1, started_at = ? WHERE job_id = ?",
+                (RUNNING, time.time(), row['job_id'])
+            )
+        return row['job_id']
+
+    def set_worker(self, job_id: str, pid: int) -> None:
+        """Record the worker process running a job"""
+        with self._conn:
+            self._conn.execute("UPDATE training_queue SET worker_pid = ? WHERE job_id = ?", (pid, job_id))
+
+    def mark(self, job_id: str, status: str, exit_code: Optional[int] = None) -> None:
+        """Record the final state of a job"""
+        with self._conn:
+            self._conn.execute(
+                "UPDATE training_queue SET status = ?, exit_code = ?, finished_at = ? WHERE job_id = ?",
+                (status, exit_code, time.time(), job_id)
+            )
+
+    def requeue(self, job_id: str, exit_code: Optional[int] = None) -> None:
+        """Put a job whose worker crashed back in the queue, keeping its place"""
+        with self._conn:
+            self._conn.execute(
+                "UPDATE training_queue SET status = ?, worker_pid = NULL, exit_code = ? WHERE job_id = ?",
+                (QUEUED, exit_code, job_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the queue entry of a job"""
+        row = self._conn.execute("SELECT * FROM training_queue WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def requeue_interrupted(self) -> List[str]:
+        """Put jobs that were running when the previous process stopped back in the queue"""
+        with self._conn:
+            rows = self._conn.execute(
+                "SELECT job_id FROM training_queue WHERE status = ?", (RUNNING,)
+            ).fetchall()
+            self._conn.execute(
+                "UPDATE training_queue SET status = ?, worker_pid = NULL WHERE status = ?", (QUEUED, RUNNING)
+            )
+        return [row['job_id'] for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status"""
+        rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM training_queue GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def close(self) -> None:
+        """Close the database"""
+        self._conn.close()
+
+
+def _run_job_process(job_id: str, thread_budget: int) -> None:
+    """Worker process entry point: run one training job to completion"""
+    # New process group, so the job's own worker pools are signalled with it
+    if hasattr(os, 'setsid'):
+        os.setsid()
+
+    from ..utils.config import get_settings
+    from ..utils.database import close_database
+    from ..utils.logging_config import setup_logging
+    from .training_service import TrainingService
+
+    setup_logging()
+    service = TrainingService(get_settings(), thread_budget=thread_budget)
+
+    async def run() -> None:
+        try:
+            await service.initialize()
+            await service.run_training_job(job_id)
+        finally:
+            await service.cleanup()
+            await close_database()
+
+    asyncio.run(run())
+
+
+class TrainingWorkerPool:
+    """Runs queued training jobs in separate processes"""
+
+    def __init__(
+        self,
+        queue: TrainingJobQueue,
+        max_concurrent_jobs: int = 1,
+        threads_per_job: int = 0,
+        cpu_count: int = 1,
+        poll_interval: float = 1.0,
+        cancel_grace_period: float = 10.0,
+        max_attempts: int = 3,
+        on_job_crashed: Optional[Callable[[str, str], Awaitable[Any]]] = None
+    ):
+        self.queue = queue
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self.threads_per_job = threads_per_job or max(1, cpu_count // self.max_concurrent_jobs)
+        self.poll_interval = poll_interval
+        self.cancel_grace_period = cancel_grace_period
+        self.max_attempts = max(1, max_attempts)
+        self.on_job_crashed = on_job_crashed
+
+        self.running: Dict[str, multiprocessing.process.BaseProcess] = {}
+        self.started = 0
+        self.finished = 0
+        self.crashed = 0
+        self.retried = 0
+        self.cancelled = 0
+
+        self._context = multiprocessing.get_context("spawn")
+        self._cancelling: set = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Requeue interrupted jobs and start dispatching"""
+        interrupted = self.queue.requeue_interrupted()
+        if interrupted:
+            logger.warning(f"Requeued {len(interrupted)} training jobs interrupted by a restart: {interrupted}")
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Training worker pool started: {self.max_concurrent_jobs} concurrent jobs, "
+            f"{self.threads_per_job} threads per job"
+        )
+
+    async def stop(self) -> None:
+        """Stop dispatching and stop running workers; their jobs are requeued on next start"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        for job_id, process in list(self.running.items()):
+            logger.info(f"Stopping training worker for job {job_id}")
+            await self._terminate(process)
+        self.running.clear()
+        self.queue.close()
+
+    def submit(self, job_id: str, priority: int = 0) -> None:
+        """Queue a job for execution"""
+        self.queue.enqueue(job_id, priority)
+        self._wakeup.set()
+        logger.info(f"Queued training job {job_id}")
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued job, or stop the worker process of a running one
+
+        Returns:
+            True if the job was queued or running
+        """
+        entry = self.queue.get(job_id)
+        if entry is None or entry['status'] not in (QUEUED, RUNNING):
+            return False
+
+        process = self.running.get(job_id)
+        if process is not None:
+            self._cancelling.add(job_id)
+            try:
+                await self._terminate(process)
+            finally:
+                self.running.pop(job_id, None)
+                self._cancelling.discard(job_id)
+
+        self.queue.mark(job_id, CANCELLED, process.exitcode if process is not None else None)
+        self.cancelled += 1
+        self._wakeup.set()
+        logger.info(f"Cancelled training job {job_id}" + (" and stopped its worker" if process else ""))
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool and queue statistics"""
+        return {
+            'max_concurrent_jobs': self.max_concurrent_jobs,
+            'threads_per_job': self.threads_per_job,
+            'running': sorted(self.running),
+            'queue': self.queue.counts(),
+            'started': self.started,
+            'finished': self.finished,
+            'crashed': self.crashed,
+            'retried': self.retried,
+            'cancelled': self.cancelled
+        }
+
+    async def _run(self) -> None:
+        """Dispatch loop"""
+        while True:
+            try:
+                await self._reap()
+                self._dispatch()
+            except Exception as e:
+                logger.error(f"Training worker pool error: {e}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _reap(self) -> None:
+        """Record workers that have exited"""
+        for job_id, process in list(self.running.items()):
+            if process.is_alive() or job_id in self._cancelling:
+                continue
+
+            process.join()
+            del self.running[job_id]
+            # Pool workers outlive a crashed job process unless the group is swept
+            _signal_group(process, signal.SIGKILL)
+
+            if process.exitcode == 0:
+                # The job itself records completed/failed in the training_jobs table
+                self.queue.mark(job_id, FINISHED, 0)
+                self.finished += 1
+            else:
+                entry = self.queue.get(job_id)
+                attempts = entry['attempts'] if entry else self.max_attempts
+                if attempts < self.max_attempts:
+                    # The next worker resumes from the job's latest checkpoint
+                    self.queue.requeue(job_id, process.exitcode)
+                    self.retried += 1
+                    logger.warning(
+                        f"Training worker for job {job_id} exited with code {process.exitcode}; "
+                        f"requeued (attempt {attempts} of {self.max_attempts})"
+                    )
+                    continue
+
+                self.queue.mark(job_id, CRASHED, process.exitcode)
+                self.crashed += 1
+                logger.error(
+                    f"Training worker for job {job_id} exited with code {process.exitcode} "
+                    f"after {attempts} attempts"
+                )
+                if self.on_job_crashed:
+                    await self.on_job_crashed(job_id, f"Training worker exited with code {process.exitcode}")
+
+    def _dispatch(self) -> None:
+        """Start workers for queued jobs while there is capacity"""
+        while len(self.running) < self.max_concurrent_jobs:
+            job_id = self.queue.claim_next()
+            if job_id is None:
+                return
+
+            process = self._context.Process(
+                target=_run_job_process,
+                args=(job_id, self.threads_per_job),
+                name=f"training-{job_id}"
+            )
+            process.start()
+            self.running[job_id] = process
+            self.queue.set_worker(job_id, process.pid)
+            self.started += 1
+            logger.info(f"Started training worker {process.pid} for job {job_id}")
+
+    async def _terminate(self, process) -> None:
+        """Stop a worker and its process group with SIGTERM, then SIGKILL after the grace period"""
+        if not _signal_group(process, signal.SIGTERM):
+            process.terminate()
+        await asyncio.to_thread(process.join, self.cancel_grace_period)
+        if process.is_alive():
+            process.kill()
+            await asyncio.to_thread(process.join)
+        # Children that ignored SIGTERM, or outlived the worker
+        _signal_group(process, signal.SIGKILL)
+
+
+def _signal_group(process, sig: int) -> bool:
+    """Signal a worker's process group; False if the group does not exist (yet)"""
+    if not hasattr(os, 'killpg') or process.pid is None:
+        return False
+    try:
+        os.killpg(process.pid, sig)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
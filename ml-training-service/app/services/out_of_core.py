@@ -0,0 +1,195 @@
+"""
+Out-of-core training data sources
+
+LightGBM can build a Dataset from ``lgb.Sequence`` objects: it samples
+``bin_construct_sample_cnt`` rows to find the bin boundaries, then pushes
+the data through in batches of ``batch_size`` rows. Only the binned
+representation (one or two bytes per value instead of eight) is kept, so
+the raw feature matrix never has to fit in memory.
+
+Two sources are provided, both readable by random access and picklable as
+plain file paths so cross-validation workers can open them too:
+
+- ``ColumnFileSource`` reads the per-column ``.npy`` files of the dataset
+  cache through memory maps.
+- ``ChunkFileSource`` reads row chunks stored as 2-d ``.npy`` files. A
+  database cursor is spooled into such chunks by ``spool_query``.
+"""
+
+import logging
+import os
+import resource
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import lightgbm as lgb
+
+logger = logging.getLogger(__name__)
+
+
+def peak_memory_mb() -> float:
+    """Peak resident memory of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class ColumnFileSource(lgb.Sequence):
+    """Feature rows assembled from one memory-mapped ``.npy`` file per column"""
+
+    def __init__(self, column_files: List[Optional[str]], batch_size: int = 65536):
+        """
+        Args:
+            column_files: One path per feature, or None for a feature missing
+                from the dataset (read as 0.0)
+            batch_size: Rows LightGBM reads per batch
+        """
+        self.column_files = column_files
+        self.batch_size = batch_size
+        self._columns: Optional[List[Optional[np.ndarray]]] = None
+        self._rows: Optional[int] = None
+
+    def _open(self) -> List[Optional[np.ndarray]]:
+        if self._columns is None:
+            self._columns = [
+                np.load(path, mmap_mode='r', allow_pickle=False) if path else None
+                for path in self.column_files
+            ]
+            self._rows = next((len(c) for c in self._columns if c is not None), 0)
+        return self._columns
+
+    def __len__(self) -> int:
+        self._open()
+        return self._rows
+
+    def __getitem__(self, idx):
+        columns = self._open()
+        if isinstance(idx, (int, np.integer)):
+            return np.array([c[idx] if c is not None else 0.0 for c in columns], dtype=np.float64)
+        return self.take(idx)
+
+    def take(self, indices) -> np.ndarray:
+        """Rows at the given indices (or slice) as a float64 matrix"""
+        columns = self._open()
+        n = len(range(*indices.indices(self._rows))) if isinstance(indices, slice) else len(indices)
+        out = np.zeros((n, len(columns)), dtype=np.float64)
+        for j, column in enumerate(columns):
+            if column is not None:
+                out[:, j] = column[indices]
+        return out
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Memory maps are reopened by whoever unpickles the source
+        return {'column_files': self.column_files, 'batch_size': self.batch_size}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state['column_files'], state['batch_size'])
+
+
+class ChunkFileSource(lgb.Sequence):
+    """Feature rows stored as consecutive 2-d ``.npy`` chunk files"""
+
+    def __init__(self, chunk_files: List[str], batch_size: int = 65536):
+        self.chunk_files = chunk_files
+        self.batch_size = batch_size
+        self._chunks: Optional[List[np.ndarray]] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    def _open(self) -> List[np.ndarray]:
+        if self._chunks is None:
+            self._chunks = [np.load(path, mmap_mode='r', allow_pickle=False) for path in self.chunk_files]
+            self._offsets = np.concatenate([[0], np.cumsum([len(c) for c in self._chunks])])
+        return self._chunks
+
+    def __len__(self) -> int:
+        self._open()
+        return int(self._offsets[-1])
+
+    def __getitem__(self, idx):
+        chunks = self._open()
+        if isinstance(idx, (int, np.integer)):
+            if idx < 0:
+                idx += len(self)
+            k = int(np.searchsorted(self._offsets, idx, side='right')) - 1
+            return np.asarray(chunks[k][idx - self._offsets[k]], dtype=np.float64)
+        return self.take(idx)
+
+    def take(self, indices) -> np.ndarray:
+        """Rows at the given indices (or slice) as a float64 matrix"""
+        chunks = self._open()
+        if isinstance(indices, slice):
+            indices = np.arange(*indices.indices(len(self)))
+        indices = np.asarray(indices, dtype=np.int64)
+
+        out = np.empty((len(indices), chunks[0].shape[1] if chunks else 0), dtype=np.float64)
+        chunk_of_row = np.searchsorted(self._offsets, indices, side='right') - 1
+        for k in np.unique(chunk_of_row):
+            mask = chunk_of_row == k
+            out[mask] = chunks[k][indices[mask] - self._offsets[k]]
+        return out
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {'chunk_files': self.chunk_files, 'batch_size': self.batch_size}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state['chunk_files'], state['batch_size'])
+
+
+def column_file_source(
+    manifest: Dict[str, Any],
+    entry_path: str,
+    feature_names: List[str],
+    label_column: str,
+    batch_size: int = 65536
+) -> Tuple[ColumnFileSource, np.ndarray]:
+    """Source over a dataset cache entry, plus the labels (the only column read into memory)"""
+    files = {c['name']: os.path.join(entry_path, c['file']) for c in manifest['columns']}
+    if label_column not in files:
+        raise ValueError(f"Dataset must contain '{label_column}' column")
+
+    missing = [name for name in feature_names if name not in files]
+    if missing:
+        logger.warning(f"Only {len(feature_names) - len(missing)} of {len(feature_names)} features available")
+
+    y = np.load(files[label_column], allow_pickle=False)
+    return ColumnFileSource([files.get(name) for name in feature_names], batch_size), y
+
+
+async def spool_query(
+    conn,
+    query: str,
+    args: Sequence[Any],
+    feature_names: List[str],
+    label_column: str,
+    spool_dir: str,
+    chunk_rows: int = 65536
+) -> Tuple[ChunkFileSource, np.ndarray]:
+    """
+    Stream a query's rows through a cursor into chunk files
+
+    Only one chunk of rows is held in memory at a time.
+
+    Returns:
+        (source over the spooled chunks, labels)
+    """
+    os.makedirs(spool_dir, exist_ok=True)
+    chunk_files: List[str] = []
+    labels: List[np.ndarray] = []
+
+    async for rows in conn.iterate(query, *args, batch_size=chunk_rows):
+        chunk = np.array(
+            [[np.nan if row[name] is None else row[name] for name in feature_names] for row in rows],
+            dtype=np.float64
+        )
+        path = os.path.join(spool_dir, f"chunk_{len(chunk_files):06d}.npy")
+        np.save(path, chunk, allow_pickle=False)
+        chunk_files.append(path)
+        labels.append(np.array([row[label_column] for row in rows], dtype=np.float64))
+
+    if not chunk_files:
+        raise ValueError("Query returned no rows")
+
+    y = np.concatenate(labels)
+    logger.info(f"Spooled {len(y)} rows into {len(chunk_files)} chunks in {spool_dir}")
+    return ChunkFileSource(chunk_files, chunk_rows), y
@@ -0,0 +1,136 @@
+"""
+Coalesced training progress reporting
+
+LightGBM calls its callbacks synchronously on every boosting iteration.
+``ProgressReporter.record`` only stores the latest progress and appends the
+iteration's evaluation metrics to an in-memory learning curve; it is safe to
+call from the training thread. A flusher task on the event loop writes the
+latest state on a fixed interval, so database writes scale with wall time,
+not with iterations, and a slow write is simply superseded by the next state
+instead of queueing up behind it.
+"""
+
+import asyncio
+import logging
+import threading
+from array import array
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """Collects training progress in memory and flushes the latest state periodically"""
+
+    def __init__(
+        self,
+        job_id: str,
+        flush: Callable[[str, int, Optional[str]], Awaitable[Any]],
+        interval: float = 2.0
+    ):
+        self.job_id = job_id
+        self.interval = interval
+        self._flush = flush
+
+        self._lock = threading.Lock()
+        self._progress = 0
+        self._message: Optional[str] = None
+        self._version = 0
+        self._flushed_version = 0
+        self._iterations = array('i')
+        self._curve: Dict[str, array] = {}
+
+        self.flushes = 0
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, progress: int, message: Optional[str] = None,
+               iteration: Optional[int] = None, evaluation: Optional[List] = None) -> None:
+        """
+        Store the latest progress (thread-safe, never blocks on I/O)
+
+        Args:
+            progress: Job progress percentage
+            message: Status message
+            iteration: Boosting iteration the metrics belong to
+            evaluation: LightGBM ``evaluation_result_list`` of the iteration
+        """
+        with self._lock:
+            self._progress = progress
+            self._message = message
+            self._version += 1
+
+            if iteration is not None and evaluation:
+                self._iterations.append(iteration)
+                for data_name, eval_name, value, *_ in evaluation:
+                    key = f"{data_name}_{eval_name}"
+                    if key not in self._curve:
+                        # Metric first reported late: pad earlier iterations
+                        self._curve[key] = array('d', [float('nan')] * (len(self._iterations) - 1))
+                    self._curve[key].append(value)
+
+    def callback(self, total_rounds: int, start: int = 30, end: int = 80) -> Callable:
+        """LightGBM callback mapping iterations onto the [start, end] progress range"""
+
+        def _callback(env):
+            # Counted from begin_iteration so continued training (init_model) starts at 1
+            iteration = env.iteration - env.begin_iteration + 1
+            progress = start + int((iteration / total_rounds) * (end - start))
+            self.record(
+                progress,
+                f'Training iteration {iteration}/{total_rounds}',
+                iteration=iteration,
+                evaluation=env.evaluation_result_list
+            )
+
+        return _callback
+
+    def learning_curve(self) -> Dict[str, List[float]]:
+        """Per-iteration evaluation metrics recorded so far"""
+        with self._lock:
+            curve = {'iteration': self._iterations.tolist()}
+            curve.update({key: values.tolist() for key, values in self._curve.items()})
+        return curve
+
+    async def start(self) -> None:
+        """Start the periodic flusher"""
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write the final state"""
+        self._stop.set()
+        if self._task:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write the latest state if it changed since the last write"""
+        with self._lock:
+            if self._version == self._flushed_version:
+                return
+            version, progress, message = self._version, self._progress, self._message
+
+        try:
+            await self._flush(self.job_id, progress, message)
+            self._flushed_version = version
+            self.flushes += 1
+        except Exception as e:
+            # The next flush carries a newer state anyway
+            logger.warning(f"Failed to flush progress of job {self.job_id}: {e}")
+
+    async def _run(self) -> None:
+        """Flush on the interval until stopped"""
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    async def __aenter__(self) -> "ProgressReporter":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.stop()
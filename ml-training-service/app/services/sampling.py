@@ -0,0 +1,96 @@
+"""
+Negative downsampling with weight correction
+
+Fraud is a small minority of the training rows, so most boosting time is
+spent on legitimate applications. ``downsample_negatives`` keeps every
+positive and a fixed fraction of the negatives in each stratum (e.g. per
+month and segment, so no period or segment is thinned more than another)
+and weights each kept negative by its stratum's negatives over the number
+kept there (about 1 / rate). The weighted loss matches the full-data loss
+in expectation, so predicted probabilities stay on the original scale.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def strata_codes(frame: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """Integer stratum per row from the combination of some columns"""
+    missing = [c for c in columns if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Dataset has no strata columns {missing}")
+    return frame.groupby(columns, sort=False, dropna=False).ngroup().to_numpy(dtype=np.int64)
+
+
+def downsample_negatives(
+    indices: np.ndarray,
+    y: np.ndarray,
+    rate: float,
+    strata: Optional[np.ndarray] = None,
+    random_state: int = 42
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+    """
+    Keep all positives and ``rate`` of the negatives in every stratum
+
+    Args:
+        indices: Candidate rows (e.g. the training split)
+        y: Labels of all rows
+        rate: Fraction of negatives to keep (0 < rate <= 1)
+        strata: Stratum of every row, or None for a single stratum
+        random_state: Seed for the sample
+
+    Returns:
+        (sorted kept rows, their instance weights, sampling summary)
+    """
+    if not 0 < rate <= 1:
+        raise ValueError(f"Negative sample rate must be in (0, 1], got {rate}")
+
+    indices = np.asarray(indices)
+    labels = y[indices]
+    negatives = indices[labels == 0]
+    positives = indices[labels != 0]
+    rng = np.random.default_rng(random_state)
+
+    groups = strata[negatives] if strata is not None else np.zeros(len(negatives), dtype=np.int64)
+    kept_negatives = []
+    negative_weights = []
+    for group in np.unique(groups):
+        members = negatives[groups == group]
+        # At least one row per stratum, so no stratum disappears entirely
+        n_keep = max(1, int(round(len(members) * rate)))
+        kept_negatives.append(rng.choice(members, size=n_keep, replace=False))
+        # Rounding (and the one-row floor) changes the realized rate per stratum, so
+        # each stratum's kept negatives stand in for exactly its own negatives
+        negative_weights.append(np.full(n_keep, len(members) / n_keep))
+
+    kept = np.concatenate([positives, *kept_negatives]) if kept_negatives else positives
+    weights = np.concatenate([np.ones(len(positives)), *negative_weights]) if negative_weights \
+        else np.ones(len(positives))
+    order = np.argsort(kept)
+    kept = kept[order]
+    weights = weights[order]
+
+    n_kept_negatives = len(kept) - len(positives)
+    negative_weight = weights[y[kept] == 0]
+
+    summary = {
+        'negative_sample_rate': rate,
+        'negative_weight_min': float(negative_weight.min()) if n_kept_negatives else 1.0,
+        'negative_weight_max': float(negative_weight.max()) if n_kept_negatives else 1.0,
+        'strata': int(len(np.unique(groups))),
+        'rows_before': len(indices),
+        'rows_after': len(kept),
+        'positives': len(positives),
+        'negatives_before': len(negatives),
+        'negatives_after': n_kept_negatives
+    }
+    logger.info(
+        f"Downsampled negatives {len(negatives)} -> {n_kept_negatives} across {summary['strata']} strata "
+        f"(weights {summary['negative_weight_min']:.2f}-{summary['negative_weight_max']:.2f})"
+    )
+    return kept, weights, summary
@@ -0,0 +1,182 @@
+"""
+Training data binned once per job
+
+LightGBM spends a large share of training time bucketing feature values
+into histogram bins. ``BinnedTrainingData`` constructs one Dataset over all
+rows of a job and derives every stage's data from it by row subsetting:
+the train/validation/calibration splits, the cross-validation folds and any
+retraining reuse the same bins. For worker processes the constructed
+Dataset is written once with ``save_binary``; loading that file skips
+binning as well.
+
+The features may also be an out-of-core ``lgb.Sequence`` source; then only
+the bins are held in memory and raw rows are read back on demand. Holdout
+and validation rows are scored ``PREDICT_BATCH_ROWS`` at a time, so scoring
+never materializes a whole split as one dense matrix.
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import lightgbm as lgb
+from sklearn.model_selection import train_test_split
+
+logger = logging.getLogger(__name__)
+
+# Parameters fixed when a Dataset is constructed; training must use the same values
+BINNING_PARAMS = (
+    'max_bin',
+    'max_bin_by_feature',
+    'min_data_in_bin',
+    'bin_construct_sample_cnt',
+    'use_missing',
+    'zero_as_missing',
+    'linear_tree'
+)
+
+# Set when a Dataset is constructed or loaded, never by lgb.train; a Booster's
+# params carry them, so they are dropped before training on another Dataset
+DATASET_PARAMS = BINNING_PARAMS + (
+    'feature_pre_filter',
+    'categorical_feature',
+    'label_column',
+    'weight_column',
+    'group_column',
+    'ignore_column',
+    'two_round',
+    'header',
+    'data',
+    'valid'
+)
+
+# Round counts: lgb.train's num_boost_round is the only one that should apply
+ITERATION_PARAMS = (
+    'num_iterations',
+    'num_iteration',
+    'n_iter',
+    'num_tree',
+    'num_trees',
+    'num_round',
+    'num_rounds',
+    'num_boost_round',
+    'n_estimators',
+    'max_iter'
+)
+
+PREDICT_BATCH_ROWS = 65536
+
+
+def binning_params(params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Dataset parameters for binning, and for loading a binary saved with them"""
+    return {
+        **{k: v for k, v in (params or {}).items() if k in BINNING_PARAMS},
+        # Lets later stages use different min_data_in_leaf etc. on the same bins
+        'feature_pre_filter': False,
+        'verbose': -1
+    }
+
+
+def training_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Booster parameters without the Dataset and round-count settings"""
+    return {k: v for k, v in params.items() if k not in DATASET_PARAMS and k not in ITERATION_PARAMS}
+
+
+def load_binary(path: str, params: Optional[Dict[str, Any]] = None) -> lgb.Dataset:
+    """
+    Load a Dataset written by ``BinnedTrainingData.save_binary``
+
+    LightGBM checks a binary's binning parameters against the ones it is
+    loaded with, so ``params`` must carry the values it was binned with
+    (a Booster's ``params`` do).
+    """
+    return lgb.Dataset(path, params=binning_params(params))
+
+
+def predict_rows(model: Any, X: Any, indices: np.ndarray, batch_size: int = PREDICT_BATCH_ROWS) -> np.ndarray:
+    """
+    Scores of some rows of a matrix or out-of-core source, predicted a batch at a time
+
+    Args:
+        model: Anything with ``predict(matrix)`` (a Booster, an sklearn model)
+        X: Feature matrix, or a source with ``take(indices)``
+        indices: Rows to score
+        batch_size: Rows gathered and scored per call
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    scores = np.empty(len(indices), dtype=np.float64)
+    for start in range(0, len(indices), batch_size):
+        batch = indices[start:start + batch_size]
+        rows = X.take(batch) if isinstance(X, lgb.Sequence) else X[batch]
+        scores[start:start + len(batch)] = np.asarray(model.predict(rows), dtype=np.float64).reshape(-1)
+    return scores
+
+
+class BinnedTrainingData:
+    """Feature matrix binned once, with row-subset views for each training stage"""
+
+    def __init__(self, X: Any, y: Any, feature_names: List[str], params: Optional[Dict[str, Any]] = None):
+        self.out_of_core = isinstance(X, lgb.Sequence)
+        if not self.out_of_core:
+            # float32 matrices are binned as they are; anything else is widened to float64
+            X = np.asarray(X)
+            X = np.ascontiguousarray(X, dtype=np.float32 if X.dtype == np.float32 else np.float64)
+        self.X = X
+        self.y = np.asarray(y)
+        self.feature_names = feature_names
+        self.params = binning_params(params)
+
+        start = time.perf_counter()
+        self.dataset = lgb.Dataset(
+            self.X, label=self.y, feature_name=feature_names, params=self.params, free_raw_data=False
+        )
+        self.dataset.construct()
+        self.construction_time_s = time.perf_counter() - start
+
+        logger.info(f"Binned {len(self.y)} rows x {len(feature_names)} features in {self.construction_time_s:.2f}s")
+
+    @property
+    def num_rows(self) -> int:
+        """Number of rows"""
+        return len(self.y)
+
+    def split(
+        self,
+        indices: np.ndarray,
+        test_size: float,
+        random_state: int = 42
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Stratified split of a set of row indices"""
+        first, second = train_test_split(
+            indices, test_size=test_size, random_state=random_state, stratify=self.y[indices]
+        )
+        return np.sort(first), np.sort(second)
+
+    def subset(self, indices: np.ndarray, weight: Optional[np.ndarray] = None) -> lgb.Dataset:
+        """Dataset view over some rows, sharing this data's bins, optionally with instance weights"""
+        indices = np.asarray(indices, dtype=np.int32)
+        order = np.argsort(indices, kind='stable')
+        subset = self.dataset.subset(indices[order])
+        if weight is not None:
+            # Subsets only take their reference's metadata when constructed, so weights go on afterwards
+            subset.construct()
+            subset.set_weight(np.asarray(weight, dtype=np.float32)[order])
+        return subset
+
+    def predict(self, model: Any, indices: np.ndarray, batch_size: int = PREDICT_BATCH_ROWS) -> np.ndarray:
+        """Scores of some rows, read and predicted in batches"""
+        return predict_rows(model, self.X, indices, batch_size)
+
+    def rows(self, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Raw features and labels of some rows, for prediction"""
+        if self.out_of_core:
+            return self.X.take(indices), self.y[indices]
+        return self.X[indices], self.y[indices]
+
+    def save_binary(self, path: str) -> str:
+        """Write the binned Dataset so other processes can load it without re-binning"""
+        start = time.perf_counter()
+        self.dataset.save_binary(path)
+        logger.debug(f"Saved binned dataset to {path} in {time.perf_counter() - start:.2f}s")
+        return path
@@ -3,33 +3,74 @@ Training service for managing ML model training jobs
 """
 
 import asyncio
+import functools
 import logging
+import multiprocessing
 import uuid
 import time
 import os
+import re
+import shutil
+import tempfile
 import joblib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score, StratifiedKFold
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, precision_recall_curve, auc
+from sklearn.model_selection import StratifiedKFold
+from sklearn.metrics import roc_auc_score, brier_score_loss
+from sklearn.isotonic import IsotonicRegression
 import lightgbm as lgb
 
 from ..models.requests import TrainingJobRequest
-from ..utils.database import get_database_connection
+from .checkpoints import TrainingCheckpoints
+from .dataset_cache import DatasetCache, build_entry
+from .evaluation import evaluate_scores, threshold_row
+from .hyperparameter_search import run_successive_halving
+from .out_of_core import column_file_source, peak_memory_mb, spool_query
+from .parallel_cv import run_parallel_cv
+from .progress import ProgressReporter
+from .sampling import downsample_negatives, strata_codes
+from .training_data import BinnedTrainingData
+from ..utils.database import get_database_connection, init_database, prepared
 
 logger = logging.getLogger(__name__)
 
+# Hot queries, prepared once per pooled connection
+UPDATE_JOB_STATUS_QUERY = prepared("""
+    UPDATE training_jobs 
+    SET status = $1, status_message = $2, metrics = $3, model_path = $4, updated_at = NOW()
+    WHERE job_id = $5 AND status <> 'cancelled'
+""")
+UPDATE_JOB_PROGRESS_QUERY = prepared("""
+    UPDATE training_jobs 
+    SET progress = $1, status_message = $2, updated_at = NOW()
+    WHERE job_id = $3 AND status <> 'cancelled'
+""")
+GET_JOB_QUERY = prepared("SELECT * FROM training_jobs WHERE job_id = $1")
+
 
 class TrainingService:
     """Service for managing ML model training"""
     
-    def __init__(self, settings):
+    def __init__(self, settings, thread_budget: int = 0):
         self.settings = settings
+        self.thread_budget = thread_budget  # LightGBM threads for this process's jobs (0 = all CPUs)
+        self.worker_pool = None  # Set by the API process; runs jobs in worker processes
         self.models_path = Path(settings.models_path)
         self.datasets_path = Path(settings.datasets_path)
         self.running_jobs = {}  # Track running training jobs
+        self.dataset_cache = (
+            DatasetCache(settings.dataset_cache_path, chunk_rows=settings.dataset_cache_chunk_rows)
+            if settings.dataset_cache_enabled else None
+        )
+        self._cache_executor: Optional[ProcessPoolExecutor] = None  # converts uploads outside the API process
+        self.checkpoints = TrainingCheckpoints(
+            settings.checkpoint_path,
+            interval_iterations=settings.checkpoint_interval_iterations,
+            interval_seconds=settings.checkpoint_interval_seconds
+        ) if settings.checkpoint_enabled else None
         
         # Feature names for fraud detection
         self.feature_names = [
@@ -92,6 +133,9 @@ class TrainingService:
         self.models_path.mkdir(parents=True, exist_ok=True)
         self.datasets_path.mkdir(parents=True, exist_ok=True)
         
+        # Open the connection pool up front instead of on the first query
+        await init_database(self.settings)
+        
         logger.info("Training service initialized")
     
     async def create_training_job(self, request: TrainingJobRequest) -> Dict[str, Any]:
@@ -131,47 +175,137 @@ class TrainingService:
     
     async def run_training_job(self, job_id: str):
         """Run a training job in the background"""
+        spool_dir = None
         try:
             logger.info(f"Starting training job {job_id}")
             
+            # The job may have been cancelled while it waited in the queue
+            job_data = await self._get_job_data(job_id)
+            if job_data is None or job_data['status'] == 'cancelled':
+                logger.info(f"Training job {job_id} was cancelled before it started")
+                return
+            if job_data['status'] == 'running':
+                # Its previous worker died; boosting resumes from the latest checkpoint
+                logger.info(f"Restarting interrupted training job {job_id}")
+            
             # Mark job as running
             await self._update_job_status(job_id, 'running', 'Initializing training...')
             
-            # Load dataset and configuration
+            # Load job configuration
             job_data = await self._get_job_data(job_id)
-            dataset = await self._load_dataset(job_data['dataset_id'])
             config = job_data['config']
             
             # Prepare training data
             await self._update_job_progress(job_id, 10, 'Preparing training data...')
-            X, y = await self._prepare_training_data(dataset)
+            strata = None
+            if config.get('out_of_core'):
+                spool_dir = tempfile.mkdtemp(prefix=f"{job_id}-", dir=self._spool_path())
+                X, y = await self._open_out_of_core_source(job_data['dataset_id'], spool_dir)
+            else:
+                dataset = await self._load_dataset(job_data['dataset_id'])
+                X, y = await self._prepare_training_data(dataset)
+                if config.get('downsample_strata'):
+                    strata = strata_codes(dataset, config['downsample_strata'])
+            params, num_boost_round, early_stopping_rounds = self._resolve_training_params(config)
+            
+            # Bin once; every later stage trains on row subsets of the same bins
+            await self._update_job_progress(job_id, 15, 'Binning training data...')
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(
+                None, functools.partial(BinnedTrainingData, X, y, self.feature_names, params)
+            )
             
             # Split data
             await self._update_job_progress(job_id, 20, 'Splitting data...')
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, 
-                test_size=config.get('test_size', 0.2),
-                random_state=config.get('random_state', 42),
-                stratify=y
+            random_state = config.get('random_state', 42)
+            train_idx, test_idx = data.split(
+                np.arange(data.num_rows), test_size=config.get('test_size', 0.2), random_state=random_state
             )
+            y_test = data.y[test_idx]
             
-            # Train model
-            await self._update_job_progress(job_id, 30, 'Training model...')
-            model, training_metrics = await self._train_lightgbm_model(
-                X_train, y_train, X_test, y_test, config, job_id
-            )
+            # Hold out a slice of the training data for probability calibration
+            cal_idx = None
+            calibration_size = config.get('calibration_size', 0.1)
+            if calibration_size:
+                train_idx, cal_idx = data.split(train_idx, test_size=calibration_size, random_state=random_state)
+            
+            # Thin the training negatives; holdout, calibration and CV rows keep the natural fraud rate
+            full_train_idx, sample_weight, downsampling = train_idx, None, None
+            if config.get('negative_sample_rate', 1.0) < 1.0:
+                await self._update_job_progress(job_id, 22, 'Downsampling negatives...')
+                train_idx, sample_weight, downsampling = downsample_negatives(
+                    train_idx, data.y, config['negative_sample_rate'], strata=strata, random_state=random_state
+                )
+            
+            # Search jobs tune on a validation slice of the training rows, then train the winner
+            search_results = None
+            if config.get('job_type') == 'search':
+                await self._update_job_progress(job_id, 25, 'Searching hyperparameters...')
+                search_results = await self._search_hyperparameters(data, train_idx, params, config, sample_weight)
+                params.update(search_results['best_params'])
+            
+            # Train model, from scratch or starting from a registered model
+            warm_start = None
+            if config.get('base_model_id'):
+                await self._update_job_progress(job_id, 30, 'Warm-starting from registered model...')
+                base_model = await self._load_base_model(config['base_model_id'])
+                model, training_metrics = await self._warm_start_model(
+                    base_model, data, train_idx, test_idx, params, early_stopping_rounds, config, job_id
+                )
+            else:
+                await self._update_job_progress(job_id, 30, 'Training model...')
+                model, training_metrics = await self._train_lightgbm_model(
+                    data, train_idx, test_idx, params, num_boost_round, early_stopping_rounds, job_id,
+                    weight=sample_weight
+                )
             
             # Evaluate model
             await self._update_job_progress(job_id, 80, 'Evaluating model...')
-            evaluation_metrics = await self._evaluate_model(model, X_test, y_test)
+            evaluation_metrics = await self._evaluate_model(model, data, test_idx)
             
-            # Cross-validation
-            await self._update_job_progress(job_id, 90, 'Running cross-validation...')
-            cv_results = await self._cross_validate_model(model, X, y, config)
+            # Downsampling report: calibration on the holdout, and optionally the cost against all rows
+            if downsampling is not None:
+                downsampling.update({
+                    'boosting_time_s': training_metrics['boosting_time_s'],
+                    'test_mean_score': evaluation_metrics['test_mean_score'],
+                    'test_fraud_rate': float(np.mean(y_test))
+                })
+                if config.get('compare_full_data'):
+                    await self._update_job_progress(job_id, 82, 'Training full-data comparison model...')
+                    downsampling['full_data'] = await self._compare_full_data(
+                        data, full_train_idx, test_idx, params, num_boost_round, early_stopping_rounds,
+                        evaluation_metrics, training_metrics
+                    )
+            
+            # A warm-start update must beat its base model on the holdout
+            if config.get('base_model_id'):
+                warm_start = self._warm_start_decision(base_model, data, test_idx, evaluation_metrics, config)
+                if not warm_start['accepted']:
+                    await self._update_job_status(
+                        job_id, 'completed',
+                        f"Warm-start update rejected: holdout AUC {warm_start['holdout_auc']:.4f} "
+                        f"vs base {warm_start['base_holdout_auc']:.4f}",
+                        metrics={**training_metrics, **evaluation_metrics, 'warm_start': warm_start}
+                    )
+                    logger.info(f"Training job {job_id} rejected its warm-start update")
+                    return
+            
+            # Fit calibration on the held-out slice
+            calibration, calibration_metrics = None, {}
+            if cal_idx is not None:
+                await self._update_job_progress(job_id, 85, 'Fitting probability calibration...')
+                calibration, calibration_metrics = await self._fit_calibration(model, data, cal_idx, test_idx)
+            
+            # Cross-validation (retrains folds from scratch, which a warm start exists to avoid)
+            if warm_start is None:
+                await self._update_job_progress(job_id, 90, 'Running cross-validation...')
+                cv_results = await self._cross_validate_model(model, data, config)
+            else:
+                cv_results = {'skipped': 'warm start'}
             
             # Save model
             await self._update_job_progress(job_id, 95, 'Saving model...')
-            model_path = await self._save_model(model, job_id, config)
+            model_path = await self._save_model(model, job_id, config, calibration)
             
             # Calculate feature importance
             feature_importance = self._calculate_feature_importance(model)
@@ -181,17 +315,27 @@ class TrainingService:
                 **training_metrics,
                 **evaluation_metrics,
                 'cv_results': cv_results,
-                'feature_importance': feature_importance
+                'calibration': calibration_metrics,
+                'feature_importance': feature_importance,
+                'search': search_results,
+                'warm_start': warm_start,
+                'downsampling': downsampling,
+                'out_of_core': data.out_of_core,
+                # Each job runs in its own worker process, so this is the job's peak
+                'peak_memory_mb': round(peak_memory_mb(), 1),
+                'memory': self._memory_metrics(data)
             }
             
-            # Mark job as completed
-            await self._update_job_status(
+            # Mark job as completed, unless it was cancelled while finishing
+            if not await self._update_job_status(
                 job_id, 'completed', 'Training completed successfully',
                 metrics=final_metrics, model_path=model_path
-            )
+            ):
+                logger.info(f"Training job {job_id} was cancelled before it completed; not registering its model")
+                return
             
             # Create model registry entry
-            await self._create_model_registry_entry(job_id, model_path, final_metrics)
+            await self._create_model_registry_entry(job_id, model_path, final_metrics, warm_start)
             
             logger.info(f"Training job {job_id} completed successfully")
             
@@ -202,9 +346,14 @@ class TrainingService:
             # Clean up
             if job_id in self.running_jobs:
                 del self.running_jobs[job_id]
+            if spool_dir:
+                shutil.rmtree(spool_dir, ignore_errors=True)
+            # A killed worker never gets here, so its checkpoints survive for the restart
+            if self.checkpoints is not None:
+                self.checkpoints.remove(job_id)
     
-    async def _train_lightgbm_model(self, X_train, y_train, X_test, y_test, config, job_id):
-        """Train LightGBM model with progress tracking"""
+    def _resolve_training_params(self, config: Dict):
+        """LightGBM parameters, boosting rounds and early stopping rounds for a job"""
         
         # Get hyperparameters
         hyperparams = config.get('hyperparameters', {})
@@ -214,10 +363,6 @@ class TrainingService:
         if not hyperparams and preset in self.training_presets:
             hyperparams = self.training_presets[preset].copy()
         
-        # Prepare datasets
-        train_data = lgb.Dataset(X_train, label=y_train, feature_name=self.feature_names)
-        valid_data = lgb.Dataset(X_test, label=y_test, reference=train_data, feature_name=self.feature_names)
-        
         # Training parameters
         params = {
             'objective': 'binary',
@@ -232,101 +377,335 @@ class TrainingService:
         num_boost_round = params.pop('num_boost_round', 300)
         early_stopping_rounds = params.pop('early_stopping_rounds', 20)
         
-        # Progress callback
-        progress_callback = self._create_progress_callback(job_id, num_boost_round)
-        
-        # Train model
-        model = lgb.train(
-            params,
-            train_data,
-            num_boost_round=num_boost_round,
-            valid_sets=[train_data, valid_data],
-            valid_names=['train', 'valid'],
-            callbacks=[progress_callback],
-            early_stopping_rounds=early_stopping_rounds
-        )
+        # Stay within this worker's share of the CPUs
+        if self.thread_budget:
+            params['num_threads'] = self.thread_budget
+        
+        return params, num_boost_round, early_stopping_rounds
+    
+    async def _train_lightgbm_model(self, data, train_idx, valid_idx, params, num_boost_round,
+                                    early_stopping_rounds, job_id, init_model=None, weight=None):
+        """Train LightGBM model with progress tracking (continuing init_model if given)"""
+        
+        # Views over the job's binned data; nothing is re-binned
+        train_data = data.subset(train_idx, weight=weight)
+        valid_data = data.subset(valid_idx)
+        
+        # Resume an interrupted job from its latest checkpoint
+        callbacks = []
+        resumed_rounds = 0
+        if self.checkpoints is not None:
+            checkpoint = self.checkpoints.load(job_id)
+            if checkpoint is not None and data.out_of_core:
+                # init_model needs the raw rows to score the checkpoint
+                logger.warning(f"Job {job_id} is out-of-core; not resuming from its checkpoint")
+            elif checkpoint is not None:
+                init_model, meta = checkpoint
+                resumed_rounds = meta['rounds_done']
+                num_boost_round = max(num_boost_round - resumed_rounds, 1)
+                logger.info(f"Resuming job {job_id} after {resumed_rounds} rounds, {num_boost_round} to go")
+            callbacks.append(self.checkpoints.callback(job_id, rounds_done=resumed_rounds))
+        
+        # Iterations only update memory; the reporter writes the latest state on an interval
+        reporter = ProgressReporter(job_id, self._update_job_progress, self.settings.progress_flush_interval)
+        
+        # Train model off the event loop so the reporter can flush meanwhile
+        start = time.perf_counter()
+        async with reporter:
+            loop = asyncio.get_running_loop()
+            model = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    lgb.train,
+                    params,
+                    train_data,
+                    num_boost_round=num_boost_round,
+                    valid_sets=[train_data, valid_data],
+                    valid_names=['train', 'valid'],
+                    init_model=init_model,
+                    callbacks=[
+                        reporter.callback(num_boost_round),
+                        lgb.early_stopping(early_stopping_rounds, verbose=False),
+                        *callbacks
+                    ]
+                )
+            )
+        boosting_time = time.perf_counter() - start
         
         # Get training metrics
         training_metrics = {
             'best_iteration': model.best_iteration,
             'best_score': model.best_score,
-            'hyperparameters': params
+            'hyperparameters': params,
+            'dataset_construction_s': round(data.construction_time_s, 3),
+            'boosting_time_s': round(boosting_time, 3),
+            'resumed_from_round': resumed_rounds,
+            'progress_flushes': reporter.flushes,
+            'learning_curve': reporter.learning_curve()
         }
         
         return model, training_metrics
     
-    def _create_progress_callback(self, job_id: str, total_rounds: int):
-        """Create a callback to track training progress"""
+    async def _compare_full_data(self, data, train_idx, valid_idx, params, num_boost_round,
+                                 early_stopping_rounds, evaluation_metrics, training_metrics):
+        """Train the same configuration on all training rows and compare it with the downsampled model"""
+        train_data = data.subset(train_idx)
+        valid_data = data.subset(valid_idx)
         
-        def callback(env):
-            if env.iteration % 10 == 0:  # Update every 10 iterations
-                progress = 30 + int((env.iteration / total_rounds) * 50)  # 30-80% range
-                message = f'Training iteration {env.iteration}/{total_rounds}'
-                
-                # Update progress asynchronously
-                asyncio.create_task(self._update_job_progress(job_id, progress, message))
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        model = await loop.run_in_executor(
+            None,
+            functools.partial(
+                lgb.train,
+                params,
+                train_data,
+                num_boost_round=num_boost_round,
+                valid_sets=[train_data, valid_data],
+                valid_names=['train', 'valid'],
+                callbacks=[lgb.early_stopping(early_stopping_rounds, verbose=False)]
+            )
+        )
+        boosting_time = time.perf_counter() - start
+        full_metrics = await self._evaluate_model(model, data, valid_idx)
+        
+        def _diff(key):
+            if evaluation_metrics[key] is None or full_metrics[key] is None:
+                return None
+            return evaluation_metrics[key] - full_metrics[key]
+        
+        comparison = {
+            'rows': len(train_idx),
+            'boosting_time_s': round(boosting_time, 3),
+            'best_iteration': model.best_iteration,
+            'speedup': round(boosting_time / training_metrics['boosting_time_s'], 2)
+            if training_metrics['boosting_time_s'] else None,
+            'test_auc_roc': full_metrics['test_auc_roc'],
+            'test_auc_pr': full_metrics['test_auc_pr'],
+            'test_average_precision': full_metrics['test_average_precision'],
+            'test_mean_score': full_metrics['test_mean_score'],
+            'auc_roc_diff': _diff('test_auc_roc'),
+            'auc_pr_diff': _diff('test_auc_pr'),
+            'average_precision_diff': _diff('test_average_precision')
+        }
+        logger.info(
+            f"Downsampling sped up boosting {comparison['speedup']}x; "
+            f"AUC difference against full data {comparison['auc_roc_diff']}"
+        )
+        return comparison
+    
+    async def _load_base_model(self, model_id: str) -> Dict[str, Any]:
+        """Load a registered model to warm-start from"""
+        registry_entry = await self.get_model(model_id)
+        if not registry_entry:
+            raise ValueError(f"Base model {model_id} not found")
+        
+        loop = asyncio.get_running_loop()
+        model_data = await loop.run_in_executor(None, joblib.load, registry_entry['model_path'])
+        if list(model_data.get('feature_names', [])) != self.feature_names:
+            raise ValueError(f"Base model {model_id} was trained on different features")
         
-        return callback
+        return {'model_id': model_id, 'model': model_data['model']}
     
-    async def _evaluate_model(self, model, X_test, y_test):
-        """Evaluate trained model"""
+    async def _warm_start_model(self, base_model, data, train_idx, valid_idx, params,
+                                early_stopping_rounds, config, job_id):
+        """Continue boosting from, or refit the leaves of, a registered model on this job's data"""
+        if data.out_of_core:
+            # init_model needs the raw rows to compute the base model's initial scores
+            raise ValueError("Warm-start jobs cannot use out-of-core training")
         
-        # Make predictions
-        y_pred_proba = model.predict(X_test)
-        y_pred = (y_pred_proba > 0.5).astype(int)
+        mode = config.get('warm_start_mode', 'boost')
+        base_booster = base_model['model']
+        
+        if mode == 'boost':
+            model, training_metrics = await self._train_lightgbm_model(
+                data, train_idx, valid_idx, params, config.get('warm_start_rounds', 100),
+                early_stopping_rounds, job_id, init_model=base_booster
+            )
+        elif mode == 'refit':
+            X_train, y_train = data.rows(train_idx)
+            start = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            model = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    base_booster.refit, X_train, y_train, decay_rate=config.get('refit_decay_rate', 0.9)
+                )
+            )
+            training_metrics = {
+                'best_iteration': model.current_iteration(),
+                'hyperparameters': params,
+                'refit_time_s': round(time.perf_counter() - start, 3)
+            }
+        else:
+            raise ValueError(f"Unknown warm start mode: {mode}")
         
-        # Calculate metrics
-        auc_roc = roc_auc_score(y_test, y_pred_proba)
+        training_metrics['base_model_id'] = base_model['model_id']
+        training_metrics['base_iterations'] = base_booster.current_iteration()
+        return model, training_metrics
+    
+    def _warm_start_decision(self, base_model, data, test_idx, evaluation_metrics, config) -> Dict[str, Any]:
+        """Accept a warm-start update only if it beats its base model on the holdout"""
+        y_test = data.y[test_idx]
+        base_auc = float(roc_auc_score(y_test, data.predict(base_model['model'], test_idx)))
+        new_auc = float(evaluation_metrics['test_auc_roc'])
+        required = config.get('min_holdout_improvement', 0.0)
+        return {
+            'base_model_id': base_model['model_id'],
+            'mode': config.get('warm_start_mode', 'boost'),
+            'holdout_rows': len(y_test),
+            'base_holdout_auc': base_auc,
+            'holdout_auc': new_auc,
+            'required_improvement': required,
+            'accepted': new_auc >= base_auc + required
+        }
+    
+    async def _evaluate_model(self, model, data, test_idx):
+        """Evaluate trained model at every cut-off with a single sort of the scores"""
         
-        # Precision-Recall AUC
-        precision, recall, _ = precision_recall_curve(y_test, y_pred_proba)
-        auc_pr = auc(recall, precision)
+        # Make predictions, reading the holdout rows in batches
+        y_test = data.y[test_idx]
+        y_pred_proba = data.predict(model, test_idx)
         
-        # Classification report
-        class_report = classification_report(y_test, y_pred, output_dict=True)
+        loop = asyncio.get_running_loop()
+        evaluation = await loop.run_in_executor(
+            None,
+            functools.partial(
+                evaluate_scores,
+                y_test,
+                y_pred_proba,
+                tier_boundaries=self.settings.risk_tier_boundaries,
+                chunk_size=self.settings.evaluation_chunk_size
+            )
+        )
         
-        # Confusion matrix
-        cm = confusion_matrix(y_test, y_pred)
+        # Headline metrics at the 0.5 cut-off
+        at_half = threshold_row(evaluation, 0.5)
+        positives, rows = evaluation['positives'], evaluation['rows']
+        tp = at_half['true_positives']
+        fp = at_half['alerts'] - tp
         
         return {
-            'test_auc_roc': auc_roc,
-            'test_auc_pr': auc_pr,
-            'test_precision': class_report['1']['precision'],
-            'test_recall': class_report['1']['recall'],
-            'test_f1': class_report['1']['f1-score'],
-            'test_accuracy': class_report['accuracy'],
-            'confusion_matrix': cm.tolist(),
-            'classification_report': class_report
+            'test_auc_roc': evaluation['auc_roc'],
+            'test_auc_pr': evaluation['auc_pr'],
+            'test_average_precision': evaluation['average_precision'],
+            'test_precision': at_half['precision'],
+            'test_recall': at_half['recall'],
+            'test_f1': at_half['f1'],
+            'test_accuracy': (rows - positives - fp + tp) / rows,
+            'confusion_matrix': [[rows - positives - fp, fp], [positives - tp, tp]],
+            'test_mean_score': float(np.mean(y_pred_proba)),
+            'evaluation': evaluation
         }
     
-    async def _cross_validate_model(self, model, X, y, config):
-        """Perform cross-validation"""
+    async def _fit_calibration(self, model, data, cal_idx, test_idx):
+        """
+        Fit an isotonic calibrator on held-out predictions
+        
+        Returns the calibrator knots in the form served by the inference
+        service ({'method', 'x', 'y'}) and Brier scores on the test set
+        before and after calibration.
+        """
+        y_cal, y_test = data.y[cal_idx], data.y[test_idx]
+        raw_cal = data.predict(model, cal_idx)
+        if len(np.unique(y_cal)) < 2:
+            logger.warning("Calibration slice contains a single class, skipping calibration")
+            return None, {'skipped': 'single class in calibration slice'}
+        
+        calibrator = IsotonicRegression(out_of_bounds='clip', y_min=0.0, y_max=1.0)
+        calibrator.fit(raw_cal, y_cal)
+        
+        raw_test = data.predict(model, test_idx)
+        calibration = {
+            'method': 'isotonic',
+            'x': calibrator.X_thresholds_.tolist(),
+            'y': calibrator.y_thresholds_.tolist()
+        }
+        metrics = {
+            'method': 'isotonic',
+            'knots': len(calibration['x']),
+            'calibration_rows': len(y_cal),
+            'test_brier_raw': float(brier_score_loss(y_test, raw_test)),
+            'test_brier_calibrated': float(brier_score_loss(y_test, calibrator.predict(raw_test)))
+        }
+        return calibration, metrics
+    
+    async def _search_hyperparameters(self, data, train_idx, params, config, sample_weight=None):
+        """
+        Successive-halving search over the job's binned data
+        
+        With downsampled negatives, candidates are trained and scored with the
+        same instance weights as the final model.
+        """
+        search = config.get('search', {})
+        search_train_idx, search_valid_idx = data.split(
+            train_idx, test_size=0.2, random_state=config.get('random_state', 42)
+        )
+        search_train_weight = search_valid_weight = None
+        if sample_weight is not None:
+            # train_idx is sorted, so each split row's weight is found by position
+            search_train_weight = sample_weight[np.searchsorted(train_idx, search_train_idx)]
+            search_valid_weight = sample_weight[np.searchsorted(train_idx, search_valid_idx)]
+        
+        with tempfile.TemporaryDirectory(prefix="search_") as tmp_dir:
+            binary_path = data.save_binary(os.path.join(tmp_dir, "dataset.bin"))
+            
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None,
+                functools.partial(
+                    run_successive_halving,
+                    binary_path,
+                    search_train_idx,
+                    search_valid_idx,
+                    params,
+                    n_candidates=search.get('n_candidates', self.settings.search_n_candidates),
+                    eta=search.get('eta', self.settings.search_eta),
+                    min_rounds=search.get('min_rounds', self.settings.search_min_rounds),
+                    max_rounds=search.get('max_rounds', self.settings.search_max_rounds),
+                    cpu_time_budget_s=search.get('cpu_time_budget_s', self.settings.search_cpu_time_budget),
+                    cpu_count=self.thread_budget or self.settings.get_cpu_count(),
+                    memory_limit_mb=self.settings.search_memory_limit_mb,
+                    seed=search.get('seed', config.get('random_state', 42)),
+                    train_weight=search_train_weight,
+                    valid_weight=search_valid_weight
+                )
+            )
+    
+    async def _cross_validate_model(self, model, data, config):
+        """Perform cross-validation, training the folds in parallel on the job's binned data"""
         
         cv_folds = config.get('cv_folds', 5)
         cv = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=42)
+        # Only the row count and labels matter for the split
+        folds = list(cv.split(np.zeros(data.num_rows), data.y))
         
         # Create a new model with same parameters for CV
         params = model.params.copy()
         
-        cv_scores = []
-        for train_idx, val_idx in cv.split(X, y):
-            X_train_cv, X_val_cv = X.iloc[train_idx], X.iloc[val_idx]
-            y_train_cv, y_val_cv = y.iloc[train_idx], y.iloc[val_idx]
-            
-            # Train fold model
-            train_data = lgb.Dataset(X_train_cv, label=y_train_cv)
-            fold_model = lgb.train(params, train_data, num_boost_round=100, verbose_eval=False)
-            
-            # Evaluate fold
-            y_pred = fold_model.predict(X_val_cv)
-            score = roc_auc_score(y_val_cv, y_pred)
-            cv_scores.append(score)
+        max_workers = self.settings.cv_max_workers if self.settings.cv_parallel else 1
         
-        return {
-            'cv_scores': cv_scores,
-            'cv_mean': np.mean(cv_scores),
-            'cv_std': np.std(cv_scores)
-        }
+        # Workers load the saved bins instead of binning their fold again
+        with tempfile.TemporaryDirectory(prefix="cv_") as tmp_dir:
+            binary_path = data.save_binary(os.path.join(tmp_dir, "dataset.bin"))
+            
+            # Blocking pool work runs off the event loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None,
+                functools.partial(
+                    run_parallel_cv,
+                    data.X,
+                    data.y,
+                    folds,
+                    params,
+                    num_boost_round=100,
+                    feature_names=self.feature_names,
+                    cpu_count=self.thread_budget or self.settings.get_cpu_count(),
+                    max_workers=max_workers,
+                    binary_path=binary_path
+                )
+            )
     
     def _calculate_feature_importance(self, model):
         """Calculate feature importance"""
@@ -349,8 +728,8 @@ class TrainingService:
         
         return feature_importance
     
-    async def _save_model(self, model, job_id: str, config: Dict) -> str:
-        """Save trained model to disk"""
+    async def _save_model(self, model, job_id: str, config: Dict, calibration: Optional[Dict] = None) -> str:
+        """Save trained model and its calibration table to disk"""
         
         model_filename = f"model_{job_id}.joblib"
         model_path = self.models_path / model_filename
@@ -360,6 +739,7 @@ class TrainingService:
             'model': model,
             'config': config,
             'feature_names': self.feature_names,
+            'calibration': calibration,
             'created_at': time.time(),
             'job_id': job_id
         }
@@ -371,20 +751,43 @@ class TrainingService:
     def _prepare_training_config(self, request: TrainingJobRequest) -> Dict:
         """Prepare training configuration from request"""
         
+        if request.job_type not in (None, 'train', 'search'):
+            raise ValueError(f"Unknown job type: {request.job_type}")
+        if request.warm_start_mode not in (None, 'boost', 'refit'):
+            raise ValueError(f"Unknown warm start mode: {request.warm_start_mode}")
+        negative_sample_rate = request.negative_sample_rate if request.negative_sample_rate is not None else 1.0
+        if not 0 < negative_sample_rate <= 1:
+            raise ValueError(f"Negative sample rate must be in (0, 1], got {negative_sample_rate}")
+        if negative_sample_rate < 1 and request.base_model_id:
+            raise ValueError("Negative downsampling is not supported for warm-start jobs")
+        if request.downsample_strata and request.out_of_core:
+            raise ValueError("Downsampling strata require an in-memory dataset")
+        
         config = {
             'algorithm': 'lightgbm',
             'preset': request.preset or 'balanced',
             'cv_folds': request.cv_folds or 5,
             'test_size': request.test_size or 0.2,
+            'calibration_size': request.calibration_size if request.calibration_size is not None else 0.1,
             'random_state': request.random_state or 42,
-            'hyperparameters': request.hyperparameters or {}
+            'hyperparameters': request.hyperparameters or {},
+            'out_of_core': bool(request.out_of_core),
+            'negative_sample_rate': negative_sample_rate,
+            'downsample_strata': request.downsample_strata or [],
+            'compare_full_data': bool(request.compare_full_data),
+            'job_type': request.job_type or 'train',
+            'base_model_id': request.base_model_id,
+            'warm_start_mode': request.warm_start_mode or 'boost',
+            'warm_start_rounds': request.warm_start_rounds or 100,
+            'refit_decay_rate': request.refit_decay_rate if request.refit_decay_rate is not None else 0.9,
+            'min_holdout_improvement': request.min_holdout_improvement or 0.0,
+            'search': request.search or {}
         }
         
         return config
     
-    async def _load_dataset(self, dataset_id: int) -> pd.DataFrame:
-        """Load dataset from file"""
-        # Get dataset info from database
+    async def _get_dataset_file(self, dataset_id: int):
+        """File path and type of a dataset"""
         async with get_database_connection() as conn:
             query = "SELECT * FROM training_datasets WHERE id = $1"
             dataset_info = await conn.fetchrow(query, dataset_id)
@@ -392,75 +795,151 @@ class TrainingService:
             if not dataset_info:
                 raise ValueError(f"Dataset {dataset_id} not found")
             
-            file_path = dataset_info['file_path']
-            file_type = dataset_info['file_type']
-            
-            # Load data based on file type
-            if file_type == 'csv':
-                return pd.read_csv(file_path)
-            elif file_type == 'json':
-                return pd.read_json(file_path)
-            else:
-                raise ValueError(f"Unsupported file type: {file_type}")
+            return dataset_info['file_path'], dataset_info['file_type']
+    
+    async def _load_dataset(self, dataset_id: int) -> pd.DataFrame:
+        """Load dataset from the columnar cache, or parse the file if caching is disabled"""
+        file_path, file_type = await self._get_dataset_file(dataset_id)
+        
+        loop = asyncio.get_running_loop()
+        if self.dataset_cache is not None:
+            return await loop.run_in_executor(None, self.dataset_cache.load, file_path, file_type)
+        
+        # Load data based on file type
+        if file_type == 'csv':
+            return await loop.run_in_executor(None, pd.read_csv, file_path)
+        elif file_type == 'json':
+            return await loop.run_in_executor(None, pd.read_json, file_path)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+    
+    def _spool_path(self) -> str:
+        path = Path(self.settings.out_of_core_spool_path)
+        path.mkdir(parents=True, exist_ok=True)
+        return str(path)
+    
+    async def _open_out_of_core_source(self, dataset_id: int, spool_dir: str):
+        """
+        Out-of-core feature source and labels for a dataset
+        
+        File datasets are read from their columnar cache entry. Datasets of
+        type 'table' name a database table, which is streamed through a
+        cursor into chunk files under spool_dir.
+        """
+        file_path, file_type = await self._get_dataset_file(dataset_id)
+        batch_size = self.settings.out_of_core_batch_size
+        
+        if file_type == 'table':
+            if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?', file_path):
+                raise ValueError(f"Invalid dataset table name: {file_path}")
+            columns = ", ".join(self.feature_names + ['fraud_label'])
+            query = f"SELECT {columns} FROM {file_path}"
+            async with get_database_connection() as conn:
+                return await spool_query(
+                    conn, query, (), self.feature_names, 'fraud_label', spool_dir, chunk_rows=batch_size
+                )
+        
+        if self.dataset_cache is None:
+            raise ValueError("Out-of-core training of file datasets requires the dataset cache")
+        
+        loop = asyncio.get_running_loop()
+        manifest = await loop.run_in_executor(None, self.dataset_cache.ensure, file_path, file_type)
+        return column_file_source(
+            manifest, str(self.dataset_cache.entry_path(manifest)), self.feature_names, 'fraud_label', batch_size
+        )
+    
+    async def cache_dataset(self, dataset_id: int):
+        """
+        Convert an uploaded dataset to the columnar cache ahead of its first training job
+        
+        Parsing runs in a separate process, so a multi-GB upload does not
+        compete with the API's event loop for the interpreter.
+        """
+        if self.dataset_cache is None:
+            return
+        try:
+            file_path, file_type = await self._get_dataset_file(dataset_id)
+            if self._cache_executor is None:
+                self._cache_executor = ProcessPoolExecutor(
+                    max_workers=1, mp_context=multiprocessing.get_context("spawn")
+                )
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self._cache_executor,
+                build_entry,
+                str(self.dataset_cache.cache_path),
+                self.dataset_cache.chunk_rows,
+                file_path,
+                file_type
+            )
+        except Exception as e:
+            # Training falls back to building the entry on first load
+            logger.warning(f"Failed to cache dataset {dataset_id}: {e}")
     
     async def _prepare_training_data(self, dataset: pd.DataFrame):
-        """Prepare training data from dataset"""
+        """
+        Build the float32 feature matrix and uint8 labels from a dataset
+        
+        Columns are written one at a time into a single C-contiguous matrix
+        in feature_names order; no intermediate DataFrame is created.
+        """
         
         # Assume the dataset has a 'fraud_label' column and feature columns
         if 'fraud_label' not in dataset.columns:
             raise ValueError("Dataset must contain 'fraud_label' column")
         
-        # Extract features and target
-        y = dataset['fraud_label']
+        # Extract target
+        y = dataset['fraud_label'].to_numpy(dtype=np.uint8)
         
-        # Extract features (assume they match our feature names)
         available_features = [col for col in self.feature_names if col in dataset.columns]
         
         if len(available_features) < len(self.feature_names):
             logger.warning(f"Only {len(available_features)} of {len(self.feature_names)} features available")
         
-        X = dataset[available_features]
-        
-        # Fill missing features with defaults
-        for feature in self.feature_names:
-            if feature not in X.columns:
-                X[feature] = 0.0  # Default value
-        
-        # Ensure correct order
-        X = X[self.feature_names]
+        X = np.empty((len(dataset), len(self.feature_names)), dtype=np.float32)
+        for j, feature in enumerate(self.feature_names):
+            if feature in dataset.columns:
+                X[:, j] = dataset[feature].to_numpy(dtype=np.float32, na_value=np.nan)
+            else:
+                X[:, j] = 0.0  # Default value for missing features
         
         return X, y
     
+    def _memory_metrics(self, data: BinnedTrainingData) -> Dict[str, Any]:
+        """Feature matrix footprint and peak process memory per training row"""
+        rows = max(data.num_rows, 1)
+        metrics = {
+            'rows': data.num_rows,
+            'label_bytes_per_row': data.y.itemsize,
+            'peak_memory_mb': round(peak_memory_mb(), 1),
+            'peak_bytes_per_row': round(peak_memory_mb() * 1024 * 1024 / rows, 1)
+        }
+        if not data.out_of_core:
+            metrics['feature_dtype'] = str(data.X.dtype)
+            metrics['feature_bytes_per_row'] = data.X.itemsize * data.X.shape[1]
+        return metrics
+    
     async def _update_job_status(self, job_id: str, status: str, message: str = None, 
                                 metrics: Dict = None, model_path: str = None):
-        """Update job status in database"""
+        """Update job status in database; False if the job was cancelled (cancellation is final)"""
         async with get_database_connection() as conn:
-            query = """
-                UPDATE training_jobs 
-                SET status = $1, status_message = $2, metrics = $3, model_path = $4, updated_at = NOW()
-                WHERE job_id = $5
-            """
-            await conn.execute(query, status, message, metrics, model_path, job_id)
+            result = await conn.execute(UPDATE_JOB_STATUS_QUERY, status, message, metrics, model_path, job_id)
+            return result != "UPDATE 0"
     
     async def _update_job_progress(self, job_id: str, progress: int, message: str = None):
         """Update job progress in database"""
         async with get_database_connection() as conn:
-            query = """
-                UPDATE training_jobs 
-                SET progress = $1, status_message = $2, updated_at = NOW()
-                WHERE job_id = $3
-            """
-            await conn.execute(query, progress, message, job_id)
+            await conn.execute(UPDATE_JOB_PROGRESS_QUERY, progress, message, job_id)
     
     async def _get_job_data(self, job_id: str) -> Dict:
         """Get job data from database"""
         async with get_database_connection() as conn:
-            query = "SELECT * FROM training_jobs WHERE job_id = $1"
-            result = await conn.fetchrow(query, job_id)
+            result = await conn.fetchrow(GET_JOB_QUERY, job_id)
             return dict(result) if result else None
     
-    async def _create_model_registry_entry(self, job_id: str, model_path: str, metrics: Dict):
-        """Create entry in model registry"""
+    async def _create_model_registry_entry(self, job_id: str, model_path: str, metrics: Dict,
+                                           warm_start: Optional[Dict] = None):
+        """Create entry in model registry, with the lineage of warm-started models"""
         model_id = str(uuid.uuid4())
         
         async with get_database_connection() as conn:
@@ -471,8 +950,9 @@ class TrainingService:
             # Create model registry entry
             query = """
                 INSERT INTO model_registry 
-                (model_id, name, version, training_job_id, model_path, performance_metrics, status, created_at, updated_at)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, NOW(), NOW())
+                (model_id, name, version, training_job_id, base_model_id, warm_start_mode, model_path,
+                 performance_metrics, hyperparameters, training_metadata, status, created_at, updated_at)
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, NOW(), NOW())
             """
             
             await conn.execute(
@@ -481,8 +961,12 @@ class TrainingService:
                 f"Model_{job_info['name']}",
                 "1.0.0",
                 job_info['id'],
+                warm_start['base_model_id'] if warm_start else None,
+                warm_start['mode'] if warm_start else None,
                 model_path,
                 metrics,
+                metrics.get('hyperparameters'),
+                {'search': metrics.get('search'), 'downsampling': metrics.get('downsampling')},
                 'ready'
             )
     
@@ -540,8 +1024,28 @@ class TrainingService:
             # Clean up running job
             if job_id in self.running_jobs:
                 del self.running_jobs[job_id]
-            
-            return result != "UPDATE 0"
+        
+        # Stop the worker process if the job is already training
+        if self.worker_pool is not None:
+            await self.worker_pool.cancel(job_id)
+        if self.checkpoints is not None:
+            self.checkpoints.remove(job_id)
+        
+        return result != "UPDATE 0"
+    
+    async def mark_job_failed(self, job_id: str, message: str):
+        """Record a job whose worker process died without reporting a result"""
+        async with get_database_connection() as conn:
+            query = """
+                UPDATE training_jobs 
+                SET status = 'failed', status_message = $1, updated_at = NOW()
+                WHERE job_id = $2 AND status IN ('queued', 'running')
+            """
+            await conn.execute(query, message, job_id)
+        
+        # No further attempt will resume from its checkpoints
+        if self.checkpoints is not None:
+            self.checkpoints.remove(job_id)
     
     async def list_models(self, status: str = None, limit: int = 50, offset: int = 0):
         """List trained models"""
@@ -599,3 +1103,6 @@ class TrainingService:
         """Cleanup resources"""
         logger.info("Cleaning up training service")
         self.running_jobs.clear()
+        if self._cache_executor is not None:
+            self._cache_executor.shutdown(wait=False, cancel_futures=True)
+            self._cache_executor = None
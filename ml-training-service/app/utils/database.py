@@ -0,0 +1,483 @@
+"""
+Pooled async database access for the ML training service
+
+``DATABASE_URL`` selects the backend:
+
+- ``postgresql://...``: an asyncpg connection pool. JSON columns are
+  encoded and decoded transparently, and queries wrapped with
+  ``prepared()`` are prepared once per pooled connection and reused.
+- ``sqlite:///path/to/file.db``: a local SQLite database with the same
+  tables, for running the service and its benchmarks offline. Queries use
+  the PostgreSQL ``$n`` placeholder style in both cases.
+- ``sqlite://:memory:``: a private in-memory database, only for code that
+  runs entirely in one process. Training workers and the dataset cache
+  builder run in separate processes and would each see an empty database,
+  so the service refuses to start with it.
+
+Connections are borrowed with ``get_database_connection()``; time spent
+waiting for a free connection is recorded and reported by
+``get_database_stats()``.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+    asyncpg = None
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Columns stored as JSON (decoded to Python objects on read)
+JSON_COLUMNS = {
+    'config', 'metrics', 'validation_results', 'feature_importance', 'logs', 'metadata', 'quality_metrics',
+    'hyperparameters', 'performance_metrics', 'validation_metrics', 'training_metadata', 'deployment_config'
+}
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS training_datasets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL DEFAULT '1.0.0',
+    description TEXT,
+    file_path TEXT NOT NULL,
+    file_type TEXT NOT NULL DEFAULT 'csv',
+    file_size INTEGER NOT NULL DEFAULT 0,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    metadata TEXT,
+    quality_metrics TEXT,
+    status TEXT NOT NULL DEFAULT 'uploading',
+    error_message TEXT,
+    uploaded_by TEXT,
+    is_active INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    UNIQUE (name, version)
+);
+CREATE TABLE IF NOT EXISTS training_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL UNIQUE,
+    dataset_id INTEGER NOT NULL REFERENCES training_datasets (id),
+    name TEXT NOT NULL,
+    description TEXT,
+    config TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress INTEGER NOT NULL DEFAULT 0,
+    status_message TEXT,
+    started_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    duration_seconds INTEGER,
+    metrics TEXT,
+    validation_results TEXT,
+    feature_importance TEXT,
+    model_path TEXT,
+    error_message TEXT,
+    logs TEXT,
+    created_by TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS training_jobs_status_created_at_index ON training_jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS model_registry (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model_id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    description TEXT,
+    training_job_id INTEGER NOT NULL REFERENCES training_jobs (id),
+    base_model_id TEXT,
+    warm_start_mode TEXT,
+    algorithm TEXT NOT NULL DEFAULT 'lightgbm',
+    model_path TEXT NOT NULL,
+    model_size INTEGER,
+    hyperparameters TEXT,
+    performance_metrics TEXT NOT NULL,
+    validation_metrics TEXT,
+    feature_importance TEXT,
+    training_metadata TEXT,
+    status TEXT NOT NULL DEFAULT 'training',
+    is_production INTEGER NOT NULL DEFAULT 0,
+    deployed_at TIMESTAMP,
+    archived_at TIMESTAMP,
+    deployment_config TEXT,
+    created_by TEXT,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    UNIQUE (name, version)
+);
+"""
+
+
+class PreparedQuery(str):
+    """Query text marked for preparation once per connection"""
+
+
+def prepared(query: str) -> PreparedQuery:
+    """Mark a hot query to be executed through a per-connection prepared statement"""
+    return PreparedQuery(query)
+
+
+def _json_default(value: Any) -> Any:
+    """Encode numpy scalars and arrays"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
+
+
+def _encode_json(value: Any) -> str:
+    return json.dumps(value, default=_json_default)
+
+
+if ASYNCPG_AVAILABLE:
+    class _PreparingConnection(asyncpg.Connection):
+        """asyncpg connection that keeps its prepared hot statements"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.prepared_statements: Dict[str, Any] = {}
+
+
+class PostgresConnection:
+    """asyncpg connection borrowed from the pool"""
+
+    def __init__(self, conn, statements: Dict[str, Any], stats: Dict[str, int]):
+        self._conn = conn
+        self._statements = statements
+        self._stats = stats
+
+    async def _prepared(self, query: PreparedQuery):
+        statement = self._statements.get(query)
+        if statement is None:
+            statement = await self._conn.prepare(query)
+            self._statements[query] = statement
+            self._stats['statements_prepared'] += 1
+        else:
+            self._stats['prepared_reuses'] += 1
+        return statement
+
+    async def fetch(self, query: str, *args) -> List[Any]:
+        if isinstance(query, PreparedQuery):
+            return await (await self._prepared(query)).fetch(*args)
+        return await self._conn.fetch(query, *args)
+
+    async def fetchrow(self, query: str, *args) -> Optional[Any]:
+        if isinstance(query, PreparedQuery):
+            return await (await self._prepared(query)).fetchrow(*args)
+        return await self._conn.fetchrow(query, *args)
+
+    async def fetchval(self, query: str, *args) -> Any:
+        if isinstance(query, PreparedQuery):
+            return await (await self._prepared(query)).fetchval(*args)
+        return await self._conn.fetchval(query, *args)
+
+    async def execute(self, query: str, *args) -> str:
+        if isinstance(query, PreparedQuery):
+            statement = await self._prepared(query)
+            await statement.fetch(*args)
+            return statement.get_statusmsg()
+        return await self._conn.execute(query, *args)
+
+    async def iterate(self, query: str, *args, batch_size: int = 10000) -> AsyncIterator[List[Any]]:
+        """Yield result rows in batches through a server-side cursor"""
+        async with self._conn.transaction():
+            cursor = await self._conn.cursor(query, *args)
+            while True:
+                rows = await cursor.fetch(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+
+class PostgresDatabase:
+    """asyncpg connection pool"""
+
+    backend = "postgresql"
+
+    def __init__(self, url: str, min_size: int, max_size: int, acquire_timeout: float, command_timeout: float):
+        if not ASYNCPG_AVAILABLE:
+            raise RuntimeError("asyncpg is required for PostgreSQL database URLs")
+        self.url = url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.command_timeout = command_timeout
+        self.pool = None
+        self.stats = {'statements_prepared': 0, 'prepared_reuses': 0}
+
+    async def connect(self) -> None:
+        self.pool = await asyncpg.create_pool(
+            self.url,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            command_timeout=self.command_timeout,
+            connection_class=_PreparingConnection,
+            init=self._init_connection
+        )
+
+    async def _init_connection(self, conn) -> None:
+        for type_name in ('json', 'jsonb'):
+            await conn.set_type_codec(type_name, encoder=_encode_json, decoder=json.loads, schema='pg_catalog')
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PostgresConnection]:
+        async with self.pool.acquire(timeout=self.acquire_timeout) as conn:
+            # Statements live on the pooled connection and are dropped with it
+            yield PostgresConnection(conn, conn.prepared_statements, self.stats)
+
+    async def close(self) -> None:
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        return {
+            'size': self.pool.get_size() if self.pool else 0,
+            'idle': self.pool.get_idle_size() if self.pool else 0,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            **self.stats
+        }
+
+
+class SQLiteConnection:
+    """SQLite connection with asyncpg-style calls, run on the database thread"""
+
+    _PLACEHOLDER = re.compile(r'\$(\d+)')
+
+    def __init__(self, conn: sqlite3.Connection, executor: ThreadPoolExecutor):
+        self._conn = conn
+        self._executor = executor
+
+    @classmethod
+    def _translate(cls, query: str) -> str:
+        return cls._PLACEHOLDER.sub(r'?\1', query).replace('NOW()', 'CURRENT_TIMESTAMP')
+
+    @staticmethod
+    def _encode(args) -> tuple:
+        return tuple(_encode_json(a) if isinstance(a, (dict, list)) else a for a in args)
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        for key in JSON_COLUMNS.intersection(record):
+            if isinstance(record[key], str):
+                record[key] = json.loads(record[key])
+        return record
+
+    async def _run(self, fn, query: str, args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, self._translate(query), self._encode(args))
+
+    def _fetch(self, query: str, args) -> List[Dict[str, Any]]:
+        with self._conn:
+            return [self._decode(row) for row in self._conn.execute(query, args).fetchall()]
+
+    def _execute(self, query: str, args) -> str:
+        with self._conn:
+            cursor = self._conn.execute(query, args)
+        verb = query.lstrip().split(None, 1)[0].upper()
+        # Same status strings as asyncpg
+        return f"INSERT 0 {cursor.rowcount}" if verb == "INSERT" else f"{verb} {cursor.rowcount}"
+
+    async def fetch(self, query: str, *args) -> List[Dict[str, Any]]:
+        return await self._run(self._fetch, query, args)
+
+    async def fetchrow(self, query: str, *args) -> Optional[Dict[str, Any]]:
+        rows = await self._run(self._fetch, query, args)
+        return rows[0] if rows else None
+
+    async def fetchval(self, query: str, *args) -> Any:
+        row = await self.fetchrow(query, *args)
+        return next(iter(row.values())) if row else None
+
+    async def execute(self, query: str, *args) -> str:
+        return await self._run(self._execute, query, args)
+
+    async def iterate(self, query: str, *args, batch_size: int = 10000) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield result rows in batches without materializing the whole result"""
+        loop = asyncio.get_running_loop()
+        cursor = await loop.run_in_executor(
+            self._executor, self._conn.execute, self._translate(query), self._encode(args)
+        )
+        try:
+            while True:
+                rows = await loop.run_in_executor(self._executor, cursor.fetchmany, batch_size)
+                if not rows:
+                    break
+                yield [self._decode(row) for row in rows]
+        finally:
+            await loop.run_in_executor(self._executor, cursor.close)
+
+
+class SQLiteDatabase:
+    """Single SQLite connection served to one borrower at a time"""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, acquire_timeout: float):
+        self.path = path
+        self.acquire_timeout = acquire_timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = asyncio.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def connect(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+        def open_db() -> sqlite3.Connection:
+            # sqlite3 keeps its own per-connection cache of prepared statements
+            conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SQLITE_SCHEMA)
+            return conn
+
+        loop = asyncio.get_running_loop()
+        self._conn = await loop.run_in_executor(self._executor, open_db)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[SQLiteConnection]:
+        await asyncio.wait_for(self._lock.acquire(), timeout=self.acquire_timeout)
+        try:
+            yield SQLiteConnection(self._conn, self._executor)
+        finally:
+            self._lock.release()
+
+    async def close(self) -> None:
+        if self._conn:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._conn.close)
+            self._conn = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        return {'size': 1 if self._conn else 0, 'idle': 0 if self._lock.locked() else 1, 'path': self.path}
+
+
+class DatabasePool:
+    """Database backend plus connection wait metrics"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.acquisitions = 0
+        self.acquire_timeouts = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.in_use = 0
+
+    @asynccontextmanager
+    async def connection(self):
+        start = time.perf_counter()
+        acquired = False
+        try:
+            async with self.backend.acquire() as conn:
+                acquired = True
+                wait = time.perf_counter() - start
+                self.acquisitions += 1
+                self.total_wait_s += wait
+                self.max_wait_s = max(self.max_wait_s, wait)
+                self.in_use += 1
+                try:
+                    yield conn
+                finally:
+                    self.in_use -= 1
+        except asyncio.TimeoutError:
+            if not acquired:
+                self.acquire_timeouts += 1
+                logger.error("Timed out waiting for a database connection")
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'backend': self.backend.backend,
+            'pool': self.backend.get_pool_stats(),
+            'in_use': self.in_use,
+            'acquisitions': self.acquisitions,
+            'acquire_timeouts': self.acquire_timeouts,
+            'avg_wait_ms': round(self.total_wait_s / self.acquisitions * 1000, 3) if self.acquisitions else 0.0,
+            'max_wait_ms': round(self.max_wait_s * 1000, 3)
+        }
+
+
+_pool: Optional[DatabasePool] = None
+_init_lock: Optional[asyncio.Lock] = None
+
+
+def create_backend(settings):
+    """Backend for the configured database URL"""
+    url = settings.database_url
+    if url.startswith("sqlite:///"):
+        # sqlite:///relative/path.db, sqlite:////absolute/path.db
+        return SQLiteDatabase(url[len("sqlite:///"):], settings.database_pool_timeout)
+    if url.startswith("sqlite://"):
+        # sqlite://:memory: (single process only, see is_process_local)
+        return SQLiteDatabase(url[len("sqlite://"):], settings.database_pool_timeout)
+    return PostgresDatabase(
+        url,
+        min_size=settings.database_pool_min_size,
+        max_size=settings.database_pool_max_size,
+        acquire_timeout=settings.database_pool_timeout,
+        command_timeout=settings.database_command_timeout
+    )
+
+
+def is_process_local(url: str) -> bool:
+    """Whether a database URL names a database that other processes cannot open"""
+    return url.startswith("sqlite://") and url.endswith(":memory:")
+
+
+async def init_database(settings=None) -> DatabasePool:
+    """Open the connection pool (idempotent)"""
+    global _pool, _init_lock
+    if _pool is not None:
+        return _pool
+
+    if _init_lock is None:
+        _init_lock = asyncio.Lock()
+    async with _init_lock:
+        if _pool is None:
+            backend = create_backend(settings or get_settings())
+            await backend.connect()
+            _pool = DatabasePool(backend)
+            logger.info(f"Database pool opened ({backend.backend})")
+    return _pool
+
+
+async def close_database() -> None:
+    """Close the connection pool"""
+    global _pool, _init_lock
+    if _pool is not None:
+        await _pool.backend.close()
+        _pool = None
+        logger.info("Database pool closed")
+    _init_lock = None
+
+
+@asynccontextmanager
+async def get_database_connection():
+    """Borrow a pooled connection (opens the pool on first use)"""
+    pool = _pool or await init_database()
+    async with pool.connection() as conn:
+        yield conn
+
+
+def get_database_stats() -> Dict[str, Any]:
+    """Pool size and connection wait metrics"""
+    if _pool is None:
+        return {'status': 'closed'}
+    return _pool.get_stats()
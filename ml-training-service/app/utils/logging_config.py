@@ -0,0 +1,69 @@
+"""
+Logging configuration for the ML training service
+"""
+
+import logging
+import logging.config
+import os
+import sys
+
+from .config import get_settings
+
+
+class ContextFilter(logging.Filter):
+    """Filter to add service and process information to log records"""
+
+    def __init__(self, service_name: str):
+        super().__init__()
+        self.service_name = service_name
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Add context fields to log record"""
+        record.service_name = self.service_name
+        record.pid = os.getpid()
+        return True
+
+
+def setup_logging() -> None:
+    """Setup logging configuration (also called in training worker processes)"""
+    settings = get_settings()
+
+    config = {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {
+            "text": {
+                "format": "%(asctime)s - %(name)s - [%(pid)d] - %(levelname)s - %(message)s",
+                "datefmt": "%Y-%m-%d %H:%M:%S"
+            }
+        },
+        "filters": {
+            "context": {
+                "()": ContextFilter,
+                "service_name": settings.service_name
+            }
+        },
+        "handlers": {
+            "console": {
+                "class": "logging.StreamHandler",
+                "level": settings.log_level,
+                "formatter": "text",
+                "stream": sys.stdout,
+                "filters": ["context"]
+            }
+        },
+        "loggers": {
+            "": {
+                "level": settings.log_level,
+                "handlers": ["console"],
+                "propagate": False
+            },
+            "uvicorn": {
+                "level": "INFO",
+                "handlers": ["console"],
+                "propagate": False
+            }
+        }
+    }
+
+    logging.config.dictConfig(config)
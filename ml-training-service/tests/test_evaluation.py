@@ -0,0 +1,65 @@
+"""
+Single-pass evaluation against scikit-learn's metrics
+"""
+
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    auc, average_precision_score, confusion_matrix, precision_recall_curve, precision_score,
+    recall_score, roc_auc_score
+)
+
+from app.services.evaluation import evaluate_scores, threshold_row
+
+
+def _labels_and_scores(n=5000, decimals=2, seed=7):
+    """Imbalanced labels with informative scores, rounded so many scores tie"""
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n) < 0.05).astype(int)
+    scores = np.clip(rng.normal(0.3 + 0.3 * y, 0.15), 0.0, 1.0)
+    return y, np.round(scores, decimals)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 256, 1 << 20])
+@pytest.mark.parametrize("decimals", [1, 2, 6])
+def test_matches_sklearn_across_chunks_and_ties(chunk_size, decimals):
+    y, scores = _labels_and_scores(decimals=decimals)
+    evaluation = evaluate_scores(y, scores, tier_boundaries=(0.3, 0.7), chunk_size=chunk_size)
+
+    assert evaluation['auc_roc'] == pytest.approx(roc_auc_score(y, scores), abs=1e-12)
+    assert evaluation['average_precision'] == pytest.approx(average_precision_score(y, scores), abs=1e-12)
+    precision, recall, _ = precision_recall_curve(y, scores)
+    assert evaluation['auc_pr'] == pytest.approx(auc(recall, precision), abs=1e-12)
+
+    for boundary in (0.3, 0.7):
+        expected = confusion_matrix(y, (scores >= boundary).astype(int), labels=[0, 1])
+        assert evaluation['tier_confusion_matrices'][str(boundary)] == expected.tolist()
+
+
+def test_threshold_table_matches_sklearn():
+    y, scores = _labels_and_scores()
+    evaluation = evaluate_scores(y, scores, chunk_size=100)
+
+    for threshold in (0.2, 0.5, 0.6):
+        row = threshold_row(evaluation, threshold)
+        predicted = (scores >= threshold).astype(int)
+        assert row['alerts'] == int(predicted.sum())
+        assert row['precision'] == pytest.approx(precision_score(y, predicted, zero_division=0))
+        assert row['recall'] == pytest.approx(recall_score(y, predicted))
+
+
+def test_all_scores_tied():
+    y = np.array([0, 1, 0, 0, 1, 0])
+    scores = np.full(len(y), 0.4)
+    evaluation = evaluate_scores(y, scores, chunk_size=4)
+
+    assert evaluation['auc_roc'] == pytest.approx(roc_auc_score(y, scores))
+    assert evaluation['average_precision'] == pytest.approx(average_precision_score(y, scores))
+
+
+def test_single_class_has_no_auc():
+    evaluation = evaluate_scores(np.zeros(10, dtype=int), np.linspace(0, 1, 10), chunk_size=3)
+
+    assert evaluation['auc_roc'] is None
+    assert evaluation['average_precision'] is None
+    assert evaluation['auc_pr'] is None
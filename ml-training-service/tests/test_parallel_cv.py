@@ -0,0 +1,99 @@
+"""
+Cross-validation and hyperparameter search on a job's saved binned dataset
+"""
+
+import numpy as np
+import pytest
+
+lgb = pytest.importorskip("lightgbm")
+
+from sklearn.model_selection import StratifiedKFold  # noqa: E402
+
+from app.services.hyperparameter_search import run_successive_halving  # noqa: E402
+from app.services.parallel_cv import run_parallel_cv  # noqa: E402
+from app.services.training_data import BinnedTrainingData, training_params  # noqa: E402
+
+FEATURES = [f"f{j}" for j in range(5)]
+
+
+@pytest.fixture(scope="module")
+def trained(tmp_path_factory):
+    """Binned data with non-default binning, its saved binary and a Booster trained on it"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 5))
+    y = (X[:, 0] + rng.normal(size=3000) > 1).astype(int)
+    params = {'objective': 'binary', 'max_bin': 63, 'min_data_in_leaf': 5, 'verbose': -1}
+
+    data = BinnedTrainingData(X, y, FEATURES, params)
+    booster = lgb.train(params, data.subset(np.arange(2000)), num_boost_round=20)
+    binary_path = data.save_binary(str(tmp_path_factory.mktemp("cv") / "dataset.bin"))
+    return data, booster, binary_path
+
+
+def test_booster_params_carry_dataset_settings(trained):
+    _, booster, _ = trained
+    assert booster.params['feature_pre_filter'] is False
+    assert booster.params['num_iterations'] == 20
+
+    params = training_params(booster.params)
+    assert 'feature_pre_filter' not in params
+    assert 'max_bin' not in params
+    assert 'num_iterations' not in params
+    assert params['min_data_in_leaf'] == 5
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_cv_on_binary_with_booster_params(trained, max_workers):
+    data, booster, binary_path = trained
+    folds = list(StratifiedKFold(n_splits=3, shuffle=True, random_state=42).split(np.zeros(data.num_rows), data.y))
+
+    result = run_parallel_cv(
+        data.X, data.y, folds, booster.params.copy(),
+        num_boost_round=10,
+        feature_names=FEATURES,
+        cpu_count=3,
+        max_workers=max_workers,
+        binary_path=binary_path
+    )
+
+    assert len(result['cv_scores']) == 3
+    assert all(0.5 < score <= 1.0 for score in result['cv_scores'])
+
+
+def test_cv_results_do_not_depend_on_worker_count(trained):
+    data, booster, binary_path = trained
+    folds = list(StratifiedKFold(n_splits=3, shuffle=True, random_state=42).split(np.zeros(data.num_rows), data.y))
+
+    scores = [
+        run_parallel_cv(
+            data.X, data.y, folds, booster.params.copy(), num_boost_round=10,
+            cpu_count=3, max_workers=workers, binary_path=binary_path
+        )['cv_scores']
+        for workers in (1, 3)
+    ]
+    assert scores[0] == scores[1]
+
+
+def test_search_on_binary_with_booster_params(trained):
+    data, booster, binary_path = trained
+
+    result = run_successive_halving(
+        binary_path, np.arange(2000), np.arange(2000, 3000), booster.params.copy(),
+        n_candidates=3, eta=3, min_rounds=5, max_rounds=15, cpu_count=1
+    )
+
+    assert 0.5 < result['best_auc'] <= 1.0
+
+
+def test_search_with_instance_weights(trained):
+    data, booster, binary_path = trained
+    rng = np.random.default_rng(0)
+    train_idx = rng.permutation(2000)
+
+    result = run_successive_halving(
+        binary_path, train_idx, np.arange(2000, 3000), booster.params.copy(),
+        n_candidates=3, eta=3, min_rounds=5, max_rounds=15, cpu_count=1,
+        train_weight=rng.uniform(0.5, 2.0, len(train_idx)), valid_weight=np.full(1000, 2.0)
+    )
+
+    assert 0.5 < result['best_auc'] <= 1.0